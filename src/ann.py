@@ -0,0 +1,181 @@
+"""
+Approximate nearest-neighbor index over tag vectors
+IVF-style coarse quantizer: spherical k-means clusters plus exact re-ranking of the probed lists
+"""
+
+import argparse
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from src.tag_vectors import TAG_MATRIX_NAME, load_tag_matrix, similarity_rows
+from src.utils.topk import top_k_indices
+
+ANN_INDEX_NAME = 'ann_index.npz'
+
+
+def _nearest_centroids(tag_matrix: sp.csr_matrix, centroids: np.ndarray, block_size: int = 4096) -> np.ndarray:
+    """Assign every row to its most similar centroid, one block of rows at a time"""
+    n = tag_matrix.shape[0]
+    assignment = np.empty(n, dtype=np.int32)
+    for start in range(0, n, block_size):
+        scores = np.asarray(tag_matrix[start:start + block_size] @ centroids.T)
+        assignment[start:start + block_size] = scores.argmax(axis=1)
+    return assignment
+
+
+class IVFIndex:
+    """
+    Inverted-file index: each movie lives in the list of its nearest centroid.
+
+    A query scores the centroids, probes the ``nprobe`` best lists and ranks
+    only those candidates exactly. Raising ``nprobe`` trades latency for recall.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_rows: np.ndarray, nprobe: int = 8):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, tag_matrix: sp.csr_matrix, nlist: Optional[int] = None, n_iter: int = 10,
+              sample_size: int = 100_000, nprobe: int = 8, seed: int = 0) -> "IVFIndex":
+        """
+        Train spherical k-means on a sample of rows and assign every movie to a list.
+
+        nlist defaults to about 4·sqrt(N) lists.
+        """
+        rng = np.random.default_rng(seed)
+        n = tag_matrix.shape[0]
+        nlist = min(nlist or max(1, int(4 * np.sqrt(n))), n)
+
+        sample = tag_matrix
+        if n > sample_size:
+            sample = tag_matrix[np.sort(rng.choice(n, sample_size, replace=False))]
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].toarray()
+        for _ in range(n_iter):
+            assignment = _nearest_centroids(sample, centroids)
+
+            # Sum the members of every cluster with one sparse product, then re-normalize
+            membership = sp.csr_matrix(
+                (np.ones(len(assignment), dtype=np.float32), (assignment, np.arange(len(assignment)))),
+                shape=(nlist, sample.shape[0])
+            )
+            sums = np.asarray((membership @ sample).todense())
+
+            # Re-seed empty clusters with random rows
+            empty = np.flatnonzero(np.bincount(assignment, minlength=nlist) == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample.shape[0], len(empty), replace=False)].toarray()
+
+            centroids = normalize(sums, norm='l2').astype(np.float32)
+
+        assignment = _nearest_centroids(tag_matrix, centroids)
+        list_rows = np.argsort(assignment, kind='stable').astype(np.int32)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=list_offsets[1:])
+
+        return cls(centroids, list_offsets, list_rows, nprobe=nprobe)
+
+    def add(self, vectors: sp.csr_matrix, first_row: int) -> None:
+        """Insert movies appended at rows first_row, first_row + 1, ... into their nearest lists"""
+        new_assignment = _nearest_centroids(vectors, self.centroids)
+        old_assignment = np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.list_offsets))
+
+        assignment = np.concatenate([old_assignment, new_assignment])
+        rows = np.concatenate([self.list_rows, np.arange(first_row, first_row + len(new_assignment), dtype=np.int32)])
+        order = np.argsort(assignment, kind='stable')
+
+        self.list_rows = rows[order]
+        self.list_offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=self.nlist), out=self.list_offsets[1:])
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows stored in the lists of the nprobe centroids closest to a dense query vector"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probed = top_k_indices(self.centroids @ query, nprobe)
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probed])
+
+    def search(self, tag_matrix: sp.csr_matrix, index: int, k: int, nprobe: Optional[int] = None,
+               excluded: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k neighbors of a catalog movie, excluding the movie itself
+        and any row flagged in the boolean ``excluded`` mask
+        """
+        query = tag_matrix[index].toarray().ravel()
+        candidates = self.candidates(query, nprobe)
+        candidates = candidates[candidates != index]
+        if excluded is not None:
+            candidates = candidates[~excluded[candidates]]
+        candidates = np.sort(candidates)
+
+        scores = np.asarray(tag_matrix[candidates] @ query).ravel()
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def save(self, path: str) -> None:
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets,
+                 list_rows=self.list_rows, nprobe=self.nprobe)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data['centroids'], data['list_offsets'], data['list_rows'], int(data['nprobe']))
+
+
+def evaluate(index: IVFIndex, tag_matrix: sp.csr_matrix, k: int = 10, queries: int = 200, seed: int = 0):
+    """Measure recall@k and mean latency against exact search on random catalog movies"""
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(tag_matrix.shape[0], min(queries, tag_matrix.shape[0]), replace=False)
+
+    hits = 0
+    elapsed = 0.0
+    for row in sample:
+        exact_scores = similarity_rows(tag_matrix, [row])[0]
+        exact_scores[row] = -np.inf
+        exact = set(top_k_indices(exact_scores, k).tolist())
+
+        start = time.perf_counter()
+        approximate, _ = index.search(tag_matrix, row, k)
+        elapsed += time.perf_counter() - start
+        hits += len(exact.intersection(approximate.tolist()))
+
+    return {'recall': hits / (len(sample) * k), 'mean_latency_ms': elapsed / len(sample) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the approximate nearest-neighbor index from tag_matrix.npz")
+    parser.add_argument('--artifacts-dir', default='artifacts')
+    parser.add_argument('--nlist', type=int, default=None, help="number of clusters (default 4·sqrt(N))")
+    parser.add_argument('--nprobe', type=int, default=8, help="clusters probed per query")
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--evaluate', action='store_true', help="report recall@10 and latency")
+    args = parser.parse_args()
+
+    tag_matrix = load_tag_matrix(os.path.join(args.artifacts_dir, TAG_MATRIX_NAME))
+
+    start = time.perf_counter()
+    index = IVFIndex.build(tag_matrix, nlist=args.nlist, n_iter=args.iterations, nprobe=args.nprobe)
+    print(f"✅ Built IVF index with {index.nlist} lists in {time.perf_counter() - start:.1f}s")
+
+    output_path = os.path.join(args.artifacts_dir, ANN_INDEX_NAME)
+    index.save(output_path)
+    print(f"💾 Saved to {output_path}")
+
+    if args.evaluate:
+        report = evaluate(index, tag_matrix)
+        print(f"📊 recall@10 = {report['recall']:.3f}, mean latency = {report['mean_latency_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Memory-mapped artifact store for the recommender models
+Raw .npy files plus a small JSON manifest, loaded with np.load(mmap_mode='r')
+so every worker process on a host shares one page-cache copy
+
+Movie tables are stored column by column (typed arrays, or UTF-8 buffers with
+offsets for text), so readers load only the columns they need and the files do
+not depend on the pandas version that wrote them
+"""
+
+import argparse
+import json
+import os
+import pickle
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.neighbors import NeighborIndex
+from src.tag_vectors import TAG_MATRIX_NAME, load_tag_matrix
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+STORE_DIR_NAME = 'store'
+
+# Table holding the movie list (movie_id, title, tags); its columns are the manifest's 'columns'
+MOVIES_TABLE = 'movies'
+
+
+def _is_missing(value) -> bool:
+    return not isinstance(value, (list, tuple, dict, np.ndarray)) and bool(pd.isna(value))
+
+
+def _write_string_column(directory: str, name: str, values, kind: str = 'string') -> Dict:
+    """
+    Store strings as one UTF-8 byte buffer plus int64 offsets.
+    kind='json' stores JSON-encoded values (lists of genres, cast, ...).
+    Missing values are recorded in a boolean mask instead of becoming 'nan'.
+    """
+    missing = np.array([_is_missing(v) for v in values], dtype=bool)
+    encode = json.dumps if kind == 'json' else str
+    encoded = [b'' if absent else encode(v).encode('utf-8') for v, absent in zip(values, missing)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    entry = {'kind': kind, 'offsets': _save_npy(directory, f"{name}.offsets.npy", offsets),
+             'data': _save_npy(directory, f"{name}.data.npy", data)}
+    if missing.any():
+        entry['missing'] = _save_npy(directory, f"{name}.missing.npy", missing)
+    return entry
+
+
+def _save_npy(directory: str, filename: str, array: np.ndarray) -> str:
+    """
+    Save a .npy file under a temporary name and rename it into place, so
+    processes still mapping (or about to read) the old file never see a
+    half-written one; returns the filename
+    """
+    temp_path = os.path.join(directory, filename + '.tmp')
+    with open(temp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(temp_path, os.path.join(directory, filename))
+    return filename
+
+
+def _write_array(directory: str, name: str, array: np.ndarray) -> Dict:
+    """Store a numeric array as a raw .npy file, replaced atomically"""
+    array = np.ascontiguousarray(array)
+    filename = _save_npy(directory, f"{name}.npy", array)
+    return {'kind': 'array', 'file': filename, 'dtype': str(array.dtype), 'shape': list(array.shape)}
+
+
+def _write_table(directory: str, prefix: str, df: pd.DataFrame) -> Dict:
+    """
+    Store every column of a DataFrame: numeric, boolean and datetime columns as
+    typed arrays, lists/dicts as JSON strings, anything else as strings
+    """
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        name = f"{prefix}{column}"
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+            columns[column] = _write_array(directory, name, series.to_numpy())
+            continue
+
+        values = series.tolist()
+        nested = any(isinstance(v, (list, tuple, dict, np.ndarray)) for v in values)
+        if nested:
+            values = [v.tolist() if isinstance(v, np.ndarray) else v for v in values]
+        columns[column] = _write_string_column(directory, name, values, 'json' if nested else 'string')
+    return columns
+
+
+def export_artifacts(output_dir: str, new_df: pd.DataFrame, similarity: Optional[np.ndarray] = None,
+                     neighbor_index=None, tag_matrix=None, movies_full: Optional[pd.DataFrame] = None) -> Dict:
+    """
+    Write the movie list and similarity data as a memory-mappable store.
+
+    movies_full (the parsed TMDB columns) is stored as a second table, so it
+    replaces movies_full.pkl as well. The new manifest is written last and
+    swapped in atomically, so a crash part-way leaves the previous manifest in
+    place and a directory without one is never mistaken for a complete store.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    columns = _write_table(output_dir, '', new_df)
+    tables = {}
+    if movies_full is not None:
+        tables['movies_full'] = {'num_rows': len(movies_full),
+                                 'columns': _write_table(output_dir, 'movies_full.', movies_full)}
+
+    arrays = {}
+    if similarity is not None:
+        arrays['similarity'] = _write_array(output_dir, 'similarity', np.asarray(similarity))
+    if neighbor_index is not None:
+        arrays['neighbor_ids'] = _write_array(output_dir, 'neighbor_ids', neighbor_index.ids)
+        arrays['neighbor_scores'] = _write_array(output_dir, 'neighbor_scores', neighbor_index.scores)
+    if tag_matrix is not None:
+        arrays['tag_data'] = _write_array(output_dir, 'tag_data', tag_matrix.data)
+        arrays['tag_indices'] = _write_array(output_dir, 'tag_indices', tag_matrix.indices)
+        arrays['tag_indptr'] = _write_array(output_dir, 'tag_indptr', tag_matrix.indptr)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'num_movies': len(new_df),
+        'columns': columns,
+        'tables': tables,
+        'arrays': arrays,
+        'tag_matrix_shape': list(tag_matrix.shape) if tag_matrix is not None else None,
+    }
+    _write_manifest(manifest_path, manifest)
+    return manifest
+
+
+def _write_manifest(manifest_path: str, manifest: Dict) -> None:
+    """Write the manifest to a temporary file and rename it into place"""
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
+def add_arrays(directory: str, arrays: Dict[str, np.ndarray]) -> Dict:
+    """
+    Add (or replace) arrays in an existing store. The manifest is swapped in
+    atomically once the array files are written.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    for name, array in arrays.items():
+        manifest['arrays'][name] = _write_array(directory, name, np.asarray(array))
+
+    _write_manifest(manifest_path, manifest)
+    return manifest
+
+
+class ArtifactStore:
+    """Read-only view over a directory written by ``export_artifacts``"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format version: {self.manifest.get('format_version')}")
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, MANIFEST_NAME))
+
+    @property
+    def num_movies(self) -> int:
+        return self.manifest['num_movies']
+
+    def _columns(self, table: str) -> Dict:
+        if table == MOVIES_TABLE:
+            return self.manifest['columns']
+        return self.manifest.get('tables', {})[table]['columns']
+
+    def has_table(self, table: str) -> bool:
+        return table == MOVIES_TABLE or table in self.manifest.get('tables', {})
+
+    def column_names(self, table: str = MOVIES_TABLE) -> List[str]:
+        return list(self._columns(table))
+
+    def has_array(self, name: str) -> bool:
+        return name in self.manifest['arrays']
+
+    def _load(self, filename: str, mmap: bool = True) -> np.ndarray:
+        return np.load(os.path.join(self.directory, filename), mmap_mode='r' if mmap else None)
+
+    def array(self, name: str, mmap: bool = True) -> np.ndarray:
+        """Return a stored array, memory-mapped read-only by default"""
+        entry = self.manifest['arrays'][name]
+        array = self._load(entry['file'], mmap)
+        if list(array.shape) != entry['shape']:
+            raise ValueError(f"Array '{name}' has shape {array.shape}, manifest says {entry['shape']}")
+        return array
+
+    def tag_matrix(self):
+        """Rebuild the CSR tag matrix on top of the memory-mapped buffers"""
+        arrays = (self.array('tag_data'), self.array('tag_indices'), self.array('tag_indptr'))
+        return sp.csr_matrix(arrays, shape=tuple(self.manifest['tag_matrix_shape']), copy=False)
+
+    def column(self, name: str, table: str = MOVIES_TABLE) -> np.ndarray:
+        """Return a column; string columns are decoded into an object array (None where missing)"""
+        entry = self._columns(table)[name]
+        if entry['kind'] == 'array':
+            return self._load(entry['file'])
+
+        offsets = self._load(entry['offsets'])
+        buffer = self._load(entry['data']).tobytes()
+        text = [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+        missing = self._load(entry['missing']) if 'missing' in entry else np.zeros(len(text), dtype=bool)
+        values = np.empty(len(text), dtype=object)
+        if entry['kind'] == 'json':
+            values[:] = [None if absent else json.loads(t) for t, absent in zip(text, missing)]
+        else:
+            values[:] = text
+            values[missing] = None
+        return values
+
+    def dataframe(self, columns: Optional[List[str]] = None, table: str = MOVIES_TABLE) -> pd.DataFrame:
+        """
+        Build a DataFrame from the requested columns (all columns by default);
+        columns the table does not have are skipped, only the rest is read
+        """
+        available = self._columns(table)
+        columns = [name for name in columns if name in available] if columns is not None else list(available)
+        return pd.DataFrame({name: self.column(name, table) for name in columns})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled artifacts (movie_list.pkl, movies_full.pkl, "
+                                                 "similarity.pkl) into the memory-mapped store")
+    parser.add_argument('--artifacts-dir', default='artifacts')
+    parser.add_argument('--output-dir', default=None, help=f"defaults to <artifacts-dir>/{STORE_DIR_NAME}")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(args.artifacts_dir, STORE_DIR_NAME)
+
+    with open(os.path.join(args.artifacts_dir, 'movie_list.pkl'), 'rb') as f:
+        new_df = pickle.load(f)
+
+    movies_full = None
+    movies_full_path = os.path.join(args.artifacts_dir, 'movies_full.pkl')
+    if os.path.exists(movies_full_path):
+        with open(movies_full_path, 'rb') as f:
+            movies_full = pickle.load(f)
+
+    similarity = None
+    similarity_path = os.path.join(args.artifacts_dir, 'similarity.pkl')
+    if os.path.exists(similarity_path):
+        with open(similarity_path, 'rb') as f:
+            similarity = pickle.load(f)
+
+    neighbor_index = None
+    neighbors_path = os.path.join(args.artifacts_dir, 'neighbors.npz')
+    if os.path.exists(neighbors_path):
+        neighbor_index = NeighborIndex.load(neighbors_path)
+
+    tag_matrix = None
+    tag_matrix_path = os.path.join(args.artifacts_dir, TAG_MATRIX_NAME)
+    if os.path.exists(tag_matrix_path):
+        tag_matrix = load_tag_matrix(tag_matrix_path)
+
+    manifest = export_artifacts(output_dir, new_df, similarity, neighbor_index, tag_matrix, movies_full)
+    print(f"✅ Exported {manifest['num_movies']} movies to {output_dir} "
+          f"(tables: {', '.join([MOVIES_TABLE, *manifest['tables']])}; "
+          f"arrays: {', '.join(manifest['arrays']) or 'none'})")
+
+
+if __name__ == '__main__':
+    main()
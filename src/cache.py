@@ -0,0 +1,140 @@
+"""
+Result cache for recommendation requests
+Size-bounded LRU with TTL in process, optionally backed by a SQLite file so
+several worker processes share hits
+"""
+
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU/TTL cache with hit/miss counters.
+
+    Keys are built with ``make_key`` from plain values. When ``path`` is given,
+    entries are also written to a SQLite database there; a miss in memory
+    checks it before counting as a miss, so workers sharing the file share
+    hits. Model versions are part of the keys, so entries of an old model are
+    simply never read again.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 600, path: Optional[str] = None,
+                 max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_writes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(key TEXT PRIMARY KEY, value BLOB, expires REAL, created REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Stable string key from JSON-serializable parts (dicts are sorted, sets become sorted lists)"""
+        def plain(value):
+            if isinstance(value, dict):
+                return {str(k): plain(v) for k, v in sorted(value.items())}
+            if isinstance(value, (set, frozenset)):
+                return sorted(plain(v) for v in value)
+            if isinstance(value, (list, tuple)):
+                return [plain(v) for v in value]
+            if hasattr(value, 'item'):
+                return value.item()
+            return value
+        return json.dumps(plain(list(parts)), sort_keys=True, default=str)
+
+    def _expiry(self, now: float) -> float:
+        return now + self.ttl_seconds if self.ttl_seconds is not None else float('inf')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a cached value, or default when it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            value = self._disk_get(key, now)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._store(key, value, now)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Cache a value (written through to the shared store when configured)"""
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                 (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self._expiry(now), now))
+                self._disk_writes += 1
+                if self._disk_writes % 100 == 0:
+                    self._trim_disk(now)
+
+    def _store(self, key: str, value: Any, now: float) -> None:
+        self._entries[key] = (self._expiry(now), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._db is None:
+            return _MISSING
+        row = self._db.execute("SELECT value FROM results WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        return pickle.loads(row[0]) if row else _MISSING
+
+    def _trim_disk(self, now: float) -> None:
+        """Drop expired rows, then the oldest rows beyond max_disk_entries"""
+        self._db.execute("DELETE FROM results WHERE expires <= ?", (now,))
+        self._db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created DESC "
+                         "LIMIT -1 OFFSET ?)", (self.max_disk_entries,))
+
+    def clear(self) -> None:
+        """Drop every entry (in memory and in the shared store)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'shared_store': self.path,
+            }
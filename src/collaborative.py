@@ -0,0 +1,254 @@
+"""
+Collaborative filtering over MovieDataLoader ratings
+Alternating least squares on a SciPy CSR user×item matrix (implicit or explicit feedback)
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.utils.topk import top_k_indices
+
+ALS_MODEL_NAME = 'als_model.npz'
+
+
+def build_interaction_matrix(ratings_df: pd.DataFrame, user_col: str = 'userId', item_col: str = 'movieId',
+                             rating_col: str = 'rating') -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+    """
+    Build the user×item CSR matrix of ratings.
+
+    Returns (matrix, user_ids, item_ids) where row u / column i of the matrix
+    belong to user_ids[u] / item_ids[i]. Duplicate (user, item) pairs keep
+    the last rating.
+    """
+    ratings_df = ratings_df.drop_duplicates([user_col, item_col], keep='last')
+    user_rows, user_ids = pd.factorize(ratings_df[user_col], sort=True)
+    item_cols, item_ids = pd.factorize(ratings_df[item_col], sort=True)
+
+    matrix = sp.csr_matrix(
+        (ratings_df[rating_col].to_numpy(dtype=np.float32), (user_rows, item_cols)),
+        shape=(len(user_ids), len(item_ids))
+    )
+    matrix.sort_indices()
+    return matrix, np.asarray(user_ids), np.asarray(item_ids)
+
+
+class ALSRecommender:
+    """
+    Matrix factorization R ≈ X·Yᵀ trained with alternating least squares.
+
+    implicit=True follows Hu, Koren & Volinsky: every rating is a positive
+    interaction with confidence 1 + alpha·rating, and unrated items count as
+    weak negatives. implicit=False fits the observed ratings only.
+
+    Each half-step solves every user's (or item's) normal equations at once
+    with a few warm-started conjugate-gradient iterations, so there is no
+    per-user Python loop; row blocks run on a thread pool (NumPy/SciPy kernels
+    release the GIL), together holding about block_nnz ratings at a time.
+    """
+
+    def __init__(self, factors: int = 64, regularization: float = 0.05, iterations: int = 15,
+                 alpha: float = 10.0, implicit: bool = True, cg_steps: int = 3,
+                 num_threads: Optional[int] = None, block_nnz: int = 1_000_000, seed: int = 0):
+        self.factors = factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.alpha = alpha
+        self.implicit = implicit
+        self.cg_steps = cg_steps
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.block_nnz = block_nnz
+        self.seed = seed
+
+        self.user_factors = None
+        self.item_factors = None
+        self.user_ids = None
+        self.item_ids = None
+        self.user_items = None
+        self.titles = None
+        self._user_rows = {}
+
+    def fit(self, ratings_df: pd.DataFrame, movies_df: Optional[pd.DataFrame] = None) -> "ALSRecommender":
+        """Train on a ratings DataFrame (userId, movieId, rating); movies_df adds titles to results"""
+        start = time.perf_counter()
+        matrix, user_ids, item_ids = build_interaction_matrix(ratings_df)
+        self.fit_matrix(matrix, user_ids, item_ids)
+
+        if movies_df is not None and {'movieId', 'title'} <= set(movies_df.columns):
+            titles = movies_df.drop_duplicates('movieId').set_index('movieId')['title']
+            self.titles = titles.reindex(self.item_ids).to_numpy()
+
+        print(f"✅ Trained ALS on {matrix.nnz} ratings ({len(user_ids)} users × {len(item_ids)} movies) "
+              f"in {time.perf_counter() - start:.1f}s")
+        return self
+
+    def fit_matrix(self, matrix: sp.csr_matrix, user_ids: Optional[np.ndarray] = None,
+                   item_ids: Optional[np.ndarray] = None) -> "ALSRecommender":
+        """Train on a user×item CSR matrix"""
+        matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        n_users, n_items = matrix.shape
+        self.user_ids = np.arange(n_users) if user_ids is None else user_ids
+        self.item_ids = np.arange(n_items) if item_ids is None else item_ids
+        self._user_rows = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+        self.user_items = matrix
+
+        if self.implicit:
+            # b = Cp (confidence on observed entries), A = YᵀY + Yᵀ(C - I)Y + λI
+            targets = matrix.copy()
+            targets.data = 1 + self.alpha * targets.data
+            extra = matrix.copy()
+            extra.data = self.alpha * extra.data
+        else:
+            # b = R, A = Y_Iᵀ Y_I + λI over the observed entries only
+            targets = matrix
+            extra = matrix.copy()
+            extra.data = np.ones_like(extra.data)
+        targets_t, extra_t = targets.T.tocsr(), extra.T.tocsr()
+
+        rng = np.random.default_rng(self.seed)
+        self.user_factors = (rng.standard_normal((n_users, self.factors)) * 0.01).astype(np.float32)
+        self.item_factors = (rng.standard_normal((n_items, self.factors)) * 0.01).astype(np.float32)
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            for _ in range(self.iterations):
+                self._solve(self.user_factors, self.item_factors, targets, extra, executor)
+                self._solve(self.item_factors, self.user_factors, targets_t, extra_t, executor)
+        return self
+
+    def _solve(self, x: np.ndarray, y: np.ndarray, targets: sp.csr_matrix, extra: sp.csr_matrix,
+               executor: ThreadPoolExecutor) -> None:
+        """Update x in place with conjugate-gradient steps on every row's normal equations"""
+        gram = y.T @ y if self.implicit else None
+
+        # Every thread's block is in flight at once and gathers two block_nnz×factors
+        # arrays, so blocks get block_nnz / num_threads ratings to bound the total
+        block_nnz = max(1, self.block_nnz // self.num_threads)
+        cuts = np.searchsorted(extra.indptr, np.arange(0, extra.nnz, block_nnz), side='right') - 1
+        bounds = np.unique(np.concatenate([cuts, [extra.shape[0]]]))
+
+        def solve_block(start, end):
+            block_extra = extra[start:end]
+            counts = np.diff(block_extra.indptr)
+            gathered = y[block_extra.indices]
+            xb = x[start:end]
+
+            def apply(p):
+                # Row-wise A·p with A_u = [YᵀY] + Σ_i w_ui·y_i·y_iᵀ + λI, without forming any A_u;
+                # the sparse term only needs p_u·y_i on the rated entries
+                dots = np.einsum('ij,ij->i', np.repeat(p, counts, axis=0), gathered)
+                weighted = sp.csr_matrix((block_extra.data * dots, block_extra.indices, block_extra.indptr),
+                                         shape=block_extra.shape)
+                result = weighted @ y + self.regularization * p
+                if gram is not None:
+                    result += p @ gram
+                return result
+
+            residual = targets[start:end] @ y - apply(xb)
+            direction = residual.copy()
+            rs_old = np.einsum('ij,ij->i', residual, residual)
+
+            for _ in range(self.cg_steps):
+                applied = apply(direction)
+                curvature = np.einsum('ij,ij->i', direction, applied)
+                step = np.divide(rs_old, curvature, out=np.zeros_like(rs_old), where=curvature > 1e-20)
+                xb += step[:, None] * direction
+                residual -= step[:, None] * applied
+                rs_new = np.einsum('ij,ij->i', residual, residual)
+                ratio = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 1e-20)
+                direction = residual + ratio[:, None] * direction
+                rs_old = rs_new
+
+        list(executor.map(solve_block, bounds[:-1], bounds[1:]))
+
+    def recommend(self, user_id, num_recommendations: int = 10, exclude_seen: bool = True) -> pd.DataFrame:
+        """Top movies for a known user: one dot product against all item factors plus top-k"""
+        if self.user_factors is None:
+            print("❌ Model not trained. Call fit() first.")
+            return pd.DataFrame()
+
+        row = self._user_rows.get(user_id)
+        if row is None:
+            print(f"❌ User {user_id} not found in ratings")
+            return pd.DataFrame()
+
+        scores = self.item_factors @ self.user_factors[row]
+        if exclude_seen and self.user_items is not None:
+            seen = self.user_items.indices[self.user_items.indptr[row]:self.user_items.indptr[row + 1]]
+            scores[seen] = -np.inf
+
+        items = top_k_indices(scores, num_recommendations)
+        items = items[np.isfinite(scores[items])]
+        result = pd.DataFrame({'movieId': self.item_ids[items], 'score': np.round(scores[items].astype(np.float64), 3)})
+        if self.titles is not None:
+            result.insert(1, 'title', self.titles[items])
+        return result
+
+    def save(self, path: str) -> None:
+        """Save factors and id mappings as an uncompressed .npz file"""
+        arrays = {
+            'user_factors': self.user_factors, 'item_factors': self.item_factors,
+            'user_ids': self.user_ids, 'item_ids': self.item_ids,
+            'seen_indptr': self.user_items.indptr, 'seen_indices': self.user_items.indices,
+            'implicit': self.implicit,
+        }
+        if self.titles is not None:
+            arrays['titles'] = self.titles.astype(str)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ALSRecommender":
+        """Load a model saved with ``save``"""
+        with np.load(path) as data:
+            model = cls(factors=data['user_factors'].shape[1], implicit=bool(data['implicit']))
+            model.user_factors = data['user_factors']
+            model.item_factors = data['item_factors']
+            model.user_ids = data['user_ids']
+            model.item_ids = data['item_ids']
+            model.user_items = sp.csr_matrix(
+                (np.ones(len(data['seen_indices']), dtype=np.float32), data['seen_indices'], data['seen_indptr']),
+                shape=(len(model.user_ids), len(model.item_ids))
+            )
+            model.titles = data['titles'].astype(object) if 'titles' in data else None
+        model._user_rows = {user_id: row for row, user_id in enumerate(model.user_ids.tolist())}
+        return model
+
+
+def main():
+    from src.data_loader import MovieDataLoader
+
+    parser = argparse.ArgumentParser(description="Train the ALS collaborative-filtering model on MovieLens ratings")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output', default=os.path.join('artifacts', ALS_MODEL_NAME))
+    parser.add_argument('--factors', type=int, default=64)
+    parser.add_argument('--iterations', type=int, default=15)
+    parser.add_argument('--regularization', type=float, default=0.05)
+    parser.add_argument('--alpha', type=float, default=10.0, help="confidence scale for implicit feedback")
+    parser.add_argument('--explicit', action='store_true', help="fit rating values instead of implicit feedback")
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    loader = MovieDataLoader(args.data_dir)
+    if not loader.load_from_csv(ratings_columns=['userId', 'movieId', 'rating']) or loader.ratings_df is None:
+        print("❌ No ratings found")
+        return
+
+    model = ALSRecommender(factors=args.factors, regularization=args.regularization, iterations=args.iterations,
+                           alpha=args.alpha, implicit=not args.explicit, num_threads=args.threads)
+    model.fit(loader.ratings_df, loader.movies_df)
+    model.save(args.output)
+    print(f"💾 Saved to {args.output}")
+
+    start = time.perf_counter()
+    for user_id in model.user_ids[:100]:
+        model.recommend(user_id, 10)
+    print(f"📊 Mean scoring latency: {(time.perf_counter() - start) / min(100, len(model.user_ids)) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
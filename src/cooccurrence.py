@@ -0,0 +1,147 @@
+"""
+Item-item co-occurrence model from ratings ("people who liked this also liked")
+Cosine over binarized positive ratings, computed block by block into a top-K NeighborIndex
+"""
+
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.artifacts import ArtifactStore, STORE_DIR_NAME
+from src.neighbors import NeighborIndex
+from src.utils.topk import top_k_indices_batch
+
+COOCCURRENCE_INDEX_NAME = 'cooccurrence.npz'
+
+
+def build_cooccurrence_index(ratings_df: pd.DataFrame, item_rows: pd.Series, num_items: int, k: int = 50,
+                             min_rating: float = 4.0, block_size: int = 512,
+                             num_threads: Optional[int] = None) -> NeighborIndex:
+    """
+    Build a top-K item-item cosine index from ratings.
+
+    item_rows maps a ratings movieId to its catalog row; ratings of unmapped
+    movies are ignored. Ratings >= min_rating become 1 in a users×items CSR
+    matrix B, and cos(i, j) = (BᵀB)_ij / sqrt(n_i·n_j) is computed for
+    block_size items at a time, so only a block×items slab is ever dense.
+
+    Row i keeps the movie itself at position 0 (score 1) followed by its K-1
+    best co-rated movies; slots without any co-rating have score -inf.
+    """
+    positive = ratings_df.loc[ratings_df['rating'] >= min_rating, ['userId', 'movieId']]
+    rows = positive['movieId'].map(item_rows)
+    positive = positive[rows.notna().to_numpy()]
+    items = rows.dropna().to_numpy(dtype=np.int64)
+    users, _ = pd.factorize(positive['userId'])
+
+    binary = sp.csr_matrix((np.ones(len(items), dtype=np.float32), (users, items)),
+                           shape=(users.max() + 1 if len(users) else 0, num_items))
+    binary.data[:] = 1  # duplicate (user, movie) pairs count once
+    item_users = binary.T.tocsr()
+    norms = np.sqrt(np.diff(item_users.indptr)).astype(np.float32)
+    inverse_norms = np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)
+
+    k = min(k, num_items)
+    ids = np.empty((num_items, k), dtype=np.int32)
+    scores = np.empty((num_items, k), dtype=np.float32)
+
+    def fill_block(start):
+        end = min(start + block_size, num_items)
+        block = (item_users[start:end] @ binary).toarray()
+        block *= inverse_norms[start:end, None]
+        block *= inverse_norms[None, :]
+        block[block == 0] = -np.inf
+
+        # Pin every movie to position 0 of its own list
+        own = np.arange(start, end)
+        block[own - start, own] = np.inf
+        top = top_k_indices_batch(block, k)
+        ids[start:end] = top
+        scores[start:end] = np.take_along_axis(block, top, axis=1)
+        scores[start:end, 0] = 1.0
+
+    with ThreadPoolExecutor(max_workers=num_threads or os.cpu_count() or 1) as executor:
+        list(executor.map(fill_block, range(0, num_items, block_size)))
+
+    return NeighborIndex(ids, scores)
+
+
+def _catalog_movie_ids(artifacts_dir: str) -> np.ndarray:
+    """movie_id column of the served catalog (artifact store, else movie_list.pkl)"""
+    store_dir = os.path.join(artifacts_dir, STORE_DIR_NAME)
+    if ArtifactStore.exists(store_dir):
+        return np.asarray(ArtifactStore(store_dir).column('movie_id'))
+    with open(os.path.join(artifacts_dir, 'movie_list.pkl'), 'rb') as f:
+        return pickle.load(f)['movie_id'].to_numpy()
+
+
+def catalog_item_rows(catalog_ids: np.ndarray, links: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Map ratings movieIds to catalog rows: through links (MovieLens movieId ->
+    tmdbId) when given, else the ratings ids must be the catalog's movie ids.
+    Movies outside the catalog are left out; duplicate catalog ids keep their first row.
+    """
+    item_rows = pd.Series(np.arange(len(catalog_ids)), index=np.asarray(catalog_ids))
+    item_rows = item_rows[~item_rows.index.duplicated()]
+    if links is None:
+        return item_rows
+
+    links = links.dropna(subset=['movieId', 'tmdbId'])
+    return pd.Series(links['tmdbId'].astype(np.int64).map(item_rows).to_numpy(),
+                     index=links['movieId'].to_numpy()).dropna().astype(np.int64)
+
+
+def _find_links(data_dir: str) -> Optional[str]:
+    """MovieLens links.csv (movieId -> tmdbId), searched like load_from_csv searches ratings"""
+    for path in [os.path.join(data_dir, "links.csv"),
+                 os.path.join(data_dir, "ml-latest-small", "links.csv"),
+                 os.path.join(data_dir, "ml-25m", "links.csv")]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def main():
+    from src.data_loader import MovieDataLoader
+
+    parser = argparse.ArgumentParser(description="Build the item-item co-occurrence index from ratings")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--artifacts-dir', default='artifacts')
+    parser.add_argument('--links', default=None, help="links.csv mapping MovieLens ids to TMDB ids "
+                                                      "(default: search data-dir; without it ids must match)")
+    parser.add_argument('--k', type=int, default=50, help="neighbors kept per movie")
+    parser.add_argument('--min-rating', type=float, default=4.0, help="ratings at or above count as a like")
+    parser.add_argument('--block-size', type=int, default=512)
+    args = parser.parse_args()
+
+    loader = MovieDataLoader(args.data_dir)
+    if not loader.load_from_csv(ratings_columns=['userId', 'movieId', 'rating']) or loader.ratings_df is None:
+        print("❌ No ratings found")
+        return
+
+    catalog_ids = _catalog_movie_ids(args.artifacts_dir)
+    links_path = args.links or _find_links(args.data_dir)
+    links = pd.read_csv(links_path, usecols=['movieId', 'tmdbId']) if links_path else None
+    item_rows = catalog_item_rows(catalog_ids, links)
+    if links_path:
+        print(f"🔗 Mapped {len(item_rows)} MovieLens movies to the catalog via {links_path}")
+
+    start = time.perf_counter()
+    index = build_cooccurrence_index(loader.ratings_df, item_rows, len(catalog_ids), k=args.k,
+                                     min_rating=args.min_rating, block_size=args.block_size)
+    print(f"✅ Built {index.num_movies}×{index.k} co-occurrence index in {time.perf_counter() - start:.1f}s")
+
+    output_path = os.path.join(args.artifacts_dir, COOCCURRENCE_INDEX_NAME)
+    index.save(output_path)
+    print(f"💾 Saved to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
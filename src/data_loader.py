@@ -6,10 +6,182 @@ Supports multiple data sources: CSV files, online datasets, APIs
 import pandas as pd
 import numpy as np
 import requests
+import hashlib
+import json
 import os
-from typing import Optional, Dict, List
+import shutil
+import sys
+import time
+import zipfile
+from typing import Optional, Dict, Iterator, List, Sequence
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MOVIELENS_BASE_URL = "https://files.grouplens.org/datasets/movielens/"
+MOVIELENS_ARCHIVES = {"small": "ml-latest-small.zip", "25m": "ml-25m.zip"}
+
+# CSVs extracted from the MovieLens archives (genome scores etc. are skipped)
+MOVIELENS_FILES = ("movies.csv", "ratings.csv", "links.csv", "tags.csv")
+
+# Compact dtypes for MovieLens columns (ML-25M ids and timestamps fit in int32)
+RATINGS_DTYPES = {"userId": "int32", "movieId": "int32", "rating": "float32", "timestamp": "int32"}
+MOVIES_DTYPES = {"movieId": "int32"}
+
+# Parsed CSVs are cached next to the source as <file>.cache.npz
+CSV_CACHE_SUFFIX = ".cache.npz"
+CSV_CACHE_VERSION = 1
+
+# Where load_from_csv looks for data, relative to data_dir
+MOVIES_CANDIDATES = ("movies.csv", os.path.join("ml-latest-small", "movies.csv"),
+                     os.path.join("ml-25m", "movies.csv"), "tmdb_5000_movies.csv")
+RATINGS_CANDIDATES = ("ratings.csv", os.path.join("ml-latest-small", "ratings.csv"),
+                      os.path.join("ml-25m", "ratings.csv"), "tmdb_5000_credits.csv")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB (None where the resource module is missing)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _read_csv(path: str, dtypes: Dict[str, str], columns: Optional[Sequence[str]] = None, **kwargs):
+    """read_csv with the compact dtypes of the columns present, optionally only the given columns"""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in header if columns is None or column in columns]
+    dtype = {column: dtypes[column] for column in usecols if column in dtypes}
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, **kwargs)
+
+
+def _file_digest(path: str, algorithm: str = "md5") -> str:
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _checksum_matches(path: str, checksum: str) -> bool:
+    """Compare a file against "md5:<hex>" / "sha256:<hex>" (bare hex: md5 if 32 digits, else sha256)"""
+    algorithm, _, digest = checksum.rpartition(":")
+    digest = digest.strip().lower()
+    algorithm = algorithm or ("md5" if len(digest) == 32 else "sha256")
+    return _file_digest(path, algorithm) == digest
+
+
+def _cache_path(path: str) -> str:
+    return path + CSV_CACHE_SUFFIX
+
+
+def _write_csv_cache(path: str, df: pd.DataFrame, dtypes: Dict[str, str], digest: str):
+    """
+    Save a parsed CSV as an uncompressed .npz next to it: numeric columns as
+    typed arrays, text as one UTF-8 buffer plus offsets and a missing-value mask
+    """
+    stat = os.stat(path)
+    arrays = {}
+    kinds = {}
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series):
+            arrays[f"c{i}"] = series.to_numpy()
+            kinds[column] = "array"
+            continue
+        
+        missing = series.isna().to_numpy()
+        encoded = [b"" if absent else str(value).encode("utf-8") for value, absent in zip(series.tolist(), missing)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        arrays[f"c{i}.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays[f"c{i}.offsets"] = offsets
+        arrays[f"c{i}.missing"] = missing
+        kinds[column] = "string"
+    
+    meta = {"version": CSV_CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "digest": digest, "dtypes": dtypes, "columns": kinds}
+    arrays["meta"] = np.array(json.dumps(meta))
+    
+    temp_path = _cache_path(path) + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, _cache_path(path))
+
+
+def _read_csv_cache(path: str, dtypes: Dict[str, str],
+                    columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    The cached parse of path, or None when there is no cache or it is stale.
+    A cache is stale when the source size, or its content hash after an mtime
+    change, differs from when it was written, or the dtypes have changed.
+    """
+    cache_path = _cache_path(path)
+    if not os.path.exists(cache_path):
+        return None
+    
+    with np.load(cache_path) as cache:
+        meta = json.loads(str(cache["meta"]))
+        stat = os.stat(path)
+        if meta["version"] != CSV_CACHE_VERSION or meta["dtypes"] != dtypes or meta["size"] != stat.st_size:
+            return None
+        touched = meta["mtime_ns"] != stat.st_mtime_ns
+        if touched and _file_digest(path) != meta["digest"]:
+            return None
+        
+        data = {}
+        for i, (column, kind) in enumerate(meta["columns"].items()):
+            if columns is not None and column not in columns and not touched:
+                continue
+            if kind == "array":
+                data[column] = cache[f"c{i}"]
+                continue
+            
+            buffer = cache[f"c{i}.data"].tobytes()
+            offsets = cache[f"c{i}.offsets"]
+            values = np.empty(len(offsets) - 1, dtype=object)
+            values[:] = [buffer[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+            values[cache[f"c{i}.missing"]] = None
+            data[column] = values
+    
+    df = pd.DataFrame(data)
+    if touched:
+        # Same content under a new mtime (copied or touched): refresh so the hash is not needed next time
+        _write_csv_cache(path, df, dtypes, meta["digest"])
+    return df[[column for column in df.columns if column in columns]] if columns is not None else df
+
+
+def _read_csv_cached(path: str, dtypes: Dict[str, str], columns: Optional[Sequence[str]] = None,
+                     use_cache: bool = True) -> pd.DataFrame:
+    """
+    _read_csv backed by the binary cache: a fresh cache is read instead of the
+    text; otherwise the whole file is parsed once and cached for later starts
+    """
+    if not use_cache:
+        return _read_csv(path, dtypes, columns)
+    
+    try:
+        cached = _read_csv_cache(path, dtypes, columns)
+    except Exception as e:
+        # Truncated, corrupt or foreign cache files are rebuilt from the CSV
+        print(f"⚠️ Ignoring unreadable {_cache_path(path)}: {e}")
+        cached = None
+    if cached is not None:
+        print(f"⚡ Using cached parse {_cache_path(path)}")
+        return cached
+    
+    df = _read_csv(path, dtypes)
+    try:
+        _write_csv_cache(path, df, dtypes, _file_digest(path))
+    except OSError as e:
+        print(f"⚠️ Could not write {_cache_path(path)}: {e}")
+    return df[[column for column in df.columns if column in columns]] if columns is not None else df
+
+
 class MovieDataLoader:
     """Enhanced data loader for movie datasets"""
     
@@ -17,80 +189,191 @@ class MovieDataLoader:
         self.data_dir = data_dir
         self.movies_df = None
         self.ratings_df = None
+        self.load_stats = {}
+        
+    def download_movielens_dataset(self, size: str = "small", url: Optional[str] = None,
+                                   checksum: Optional[str] = None,
+                                   files: Sequence[str] = MOVIELENS_FILES, keep_archive: bool = False,
+                                   chunk_size: int = 1 << 20, retries: int = 3) -> bool:
+        """
+        Download a MovieLens dataset and extract its CSV files
         
-    def download_movielens_dataset(self, size: str = "small") -> bool:
-        """Download MovieLens dataset"""
+        The archive is streamed to disk in chunks; an interrupted download is
+        resumed from the partial file with an HTTP Range request. The archive is
+        verified against checksum ("md5:<hex>", "sha256:<hex>" or bare hex; by
+        default the .md5 file GroupLens publishes next to it) and only the CSVs
+        named in files are extracted. url (or MOVIELENS_URL) overrides the
+        download location, e.g. a mirror or a local test server.
+        """
         try:
-            if size == "small":
-                url = "https://files.grouplens.org/datasets/movielens/ml-latest-small.zip"
-                filename = "ml-latest-small.zip"
-            else:
-                url = "https://files.grouplens.org/datasets/movielens/ml-25m.zip"
-                filename = "ml-25m.zip"
+            filename = MOVIELENS_ARCHIVES["small" if size == "small" else "25m"]
+            url = url or os.getenv("MOVIELENS_URL") or MOVIELENS_BASE_URL + filename
+            filename = os.path.basename(url.split('?')[0]) or filename
             
             print(f"📥 Downloading MovieLens {size} dataset...")
             
             # Create data directory if it doesn't exist
             os.makedirs(self.data_dir, exist_ok=True)
-            
-            # Download and extract
-            import zipfile
-            response = requests.get(url)
             zip_path = os.path.join(self.data_dir, filename)
+            part_path = zip_path + ".part"
             
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
+            expected = checksum or self._published_checksum(url)
+            if os.path.exists(zip_path) and (expected is None or _checksum_matches(zip_path, expected)):
+                print(f"📦 Using existing {zip_path}")
+            else:
+                if not self._stream_download(url, part_path, chunk_size, retries):
+                    return False
+                
+                if expected is not None and not _checksum_matches(part_path, expected):
+                    os.remove(part_path)
+                    print(f"❌ Checksum mismatch for {filename}, removed the download")
+                    return False
+                if expected is None:
+                    print("⚠️ No checksum available, skipping verification")
+                os.replace(part_path, zip_path)
             
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(self.data_dir)
+            extracted = self._extract_members(zip_path, files)
             
             # Remove zip file
-            os.remove(zip_path)
+            if not keep_archive:
+                os.remove(zip_path)
             
-            print("✅ Dataset downloaded successfully!")
+            print(f"✅ Dataset downloaded successfully! ({', '.join(extracted)})")
             return True
             
         except Exception as e:
             print(f"❌ Error downloading dataset: {e}")
             return False
     
-    def load_from_csv(self, movies_file: str = None, ratings_file: str = None) -> bool:
-        """Load movie data from CSV files"""
+    def _published_checksum(self, url: str) -> Optional[str]:
+        """The md5 GroupLens publishes at <url>.md5, or None when there is none"""
+        try:
+            response = requests.get(url + ".md5", timeout=10)
+            if response.status_code != 200:
+                return None
+            digest = response.text.split()[0].strip().lower() if response.text.split() else ""
+            return f"md5:{digest}" if len(digest) == 32 else None
+        except requests.RequestException:
+            return None
+    
+    def _stream_download(self, url: str, part_path: str, chunk_size: int, retries: int) -> bool:
+        """
+        Stream url into part_path, resuming from its current size with a Range
+        request; connection errors are retried (resuming again) up to retries times
+        """
+        for attempt in range(retries + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with requests.get(url, headers=headers, stream=True, timeout=(10, 60)) as response:
+                    if response.status_code == 416:
+                        # Nothing left to send: the partial file is already complete
+                        return True
+                    response.raise_for_status()
+                    
+                    if offset and response.status_code == 206:
+                        print(f"⏯️ Resuming at {offset / 1e6:.1f} MB")
+                    else:
+                        # The server ignored the Range header and sends everything
+                        offset = 0
+                    
+                    length = response.headers.get("Content-Length")
+                    total = offset + int(length) if length is not None else None
+                    self._write_chunks(response, part_path, offset, total, chunk_size)
+                    
+                if total is None or os.path.getsize(part_path) >= total:
+                    return True
+                raise requests.ConnectionError("connection closed before the download was complete")
+                
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == retries:
+                    print(f"❌ Download interrupted ({e}); run again to resume from {part_path}")
+                    return False
+                print(f"⚠️ Download interrupted ({e}), retrying ({attempt + 1}/{retries})...")
+        return False
+    
+    def _write_chunks(self, response, part_path: str, offset: int, total: Optional[int], chunk_size: int):
+        """Append response chunks to part_path, reporting progress every 10%"""
+        written = offset
+        next_report = 0.1
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+                if total and written / total >= next_report:
+                    print(f"📥 {written / 1e6:.1f}/{total / 1e6:.1f} MB ({written / total:.0%})")
+                    next_report = np.floor(written / total * 10) / 10 + 0.1
+    
+    def _extract_members(self, zip_path: str, files: Sequence[str]) -> List[str]:
+        """Stream the archive members whose file name is in files into data_dir (keeping their folders)"""
+        extracted = []
+        data_dir = os.path.abspath(self.data_dir)
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or os.path.basename(member.filename) not in files:
+                    continue
+                
+                target = os.path.abspath(os.path.join(data_dir, member.filename))
+                if os.path.commonpath([data_dir, target]) != data_dir:
+                    continue
+                
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.open(member) as source, open(target + ".tmp", "wb") as destination:
+                    shutil.copyfileobj(source, destination, length=1 << 20)
+                os.replace(target + ".tmp", target)
+                extracted.append(member.filename)
+        return extracted
+    
+    def _find_file(self, candidates: Sequence[str]) -> Optional[str]:
+        """First of the candidate paths (relative to data_dir) that exists"""
+        for name in candidates:
+            path = os.path.join(self.data_dir, name)
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def _record_load(self, name: str, start: float, df: pd.DataFrame):
+        """Print and keep the load time, frame size and process peak memory of a loaded table"""
+        stats = {
+            'rows': len(df),
+            'seconds': round(time.perf_counter() - start, 2),
+            'memory_mb': round(float(df.memory_usage(deep=True).sum()) / 1e6, 1),
+            'peak_rss_mb': round(_peak_rss_mb(), 1) if resource is not None else None,
+        }
+        self.load_stats[name] = stats
+        peak = f", peak RSS {stats['peak_rss_mb']:.0f} MB" if stats['peak_rss_mb'] is not None else ""
+        print(f"✅ Loaded {stats['rows']} {name} in {stats['seconds']:.2f}s ({stats['memory_mb']:.1f} MB{peak})")
+    
+    def load_from_csv(self, movies_file: str = None, ratings_file: str = None,
+                      ratings_columns: Optional[Sequence[str]] = None, use_cache: bool = True) -> bool:
+        """
+        Load movie data from CSV files
+        
+        MovieLens columns are read with compact dtypes (int32 ids and timestamps,
+        float32 ratings); ratings_columns limits which ratings columns are read,
+        e.g. ["userId", "movieId", "rating"] when timestamps are not needed.
+        With use_cache, each parsed file is kept as <file>.cache.npz and reused
+        until the source's size, mtime + content hash, or the dtypes change.
+        """
         try:
             # Try to find CSV files automatically
             if movies_file is None:
-                potential_files = [
-                    os.path.join(self.data_dir, "movies.csv"),
-                    os.path.join(self.data_dir, "ml-latest-small", "movies.csv"),
-                    os.path.join(self.data_dir, "ml-25m", "movies.csv"),
-                    os.path.join(self.data_dir, "tmdb_5000_movies.csv")
-                ]
-                for file in potential_files:
-                    if os.path.exists(file):
-                        movies_file = file
-                        break
+                movies_file = self._find_file(MOVIES_CANDIDATES)
             
             if ratings_file is None:
-                potential_files = [
-                    os.path.join(self.data_dir, "ratings.csv"),
-                    os.path.join(self.data_dir, "ml-latest-small", "ratings.csv"),
-                    os.path.join(self.data_dir, "ml-25m", "ratings.csv"),
-                    os.path.join(self.data_dir, "tmdb_5000_credits.csv")
-                ]
-                for file in potential_files:
-                    if os.path.exists(file):
-                        ratings_file = file
-                        break
+                ratings_file = self._find_file(RATINGS_CANDIDATES)
             
             if movies_file and os.path.exists(movies_file):
                 print(f"📖 Loading movies from: {movies_file}")
-                self.movies_df = pd.read_csv(movies_file)
-                print(f"✅ Loaded {len(self.movies_df)} movies")
+                start = time.perf_counter()
+                self.movies_df = _read_csv_cached(movies_file, MOVIES_DTYPES, use_cache=use_cache)
+                self._record_load('movies', start, self.movies_df)
             
             if ratings_file and os.path.exists(ratings_file):
                 print(f"📖 Loading ratings from: {ratings_file}")
-                self.ratings_df = pd.read_csv(ratings_file)
-                print(f"✅ Loaded {len(self.ratings_df)} ratings")
+                start = time.perf_counter()
+                self.ratings_df = _read_csv_cached(ratings_file, RATINGS_DTYPES, ratings_columns, use_cache)
+                self._record_load('ratings', start, self.ratings_df)
             
             return self.movies_df is not None
             
@@ -98,6 +381,49 @@ class MovieDataLoader:
             print(f"❌ Error loading CSV files: {e}")
             return False
     
+    def iter_ratings(self, ratings_file: str = None, chunksize: int = 1_000_000,
+                     columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """Ratings in chunks of chunksize rows with compact dtypes, without loading the whole file"""
+        ratings_file = ratings_file or self._find_file(RATINGS_CANDIDATES)
+        if ratings_file is None:
+            raise FileNotFoundError(f"No ratings CSV found in {self.data_dir}")
+        
+        with _read_csv(ratings_file, RATINGS_DTYPES, columns, chunksize=chunksize) as reader:
+            yield from reader
+    
+    def rating_stats(self, ratings_file: str = None, by: str = "movieId",
+                     chunksize: int = 1_000_000) -> pd.DataFrame:
+        """
+        Number of ratings and mean rating per movie (or per user with by="userId"),
+        aggregated chunk by chunk so only one chunk of ratings is in memory at a time
+        """
+        try:
+            start = time.perf_counter()
+            counts = np.zeros(0, dtype=np.int64)
+            sums = np.zeros(0, dtype=np.float64)
+            
+            for chunk in self.iter_ratings(ratings_file, chunksize, columns=[by, "rating"]):
+                ids = chunk[by].to_numpy()
+                size = max(len(counts), int(ids.max()) + 1)
+                if size > len(counts):
+                    counts = np.pad(counts, (0, size - len(counts)))
+                    sums = np.pad(sums, (0, size - len(sums)))
+                counts += np.bincount(ids, minlength=size)
+                sums += np.bincount(ids, weights=chunk["rating"].to_numpy(dtype=np.float64), minlength=size)
+            
+            rated = np.flatnonzero(counts)
+            stats = pd.DataFrame({
+                by: rated.astype(np.int32),
+                'rating_count': counts[rated],
+                'rating_mean': (sums[rated] / counts[rated]).astype(np.float32),
+            })
+            self._record_load(f"{by} rating stats", start, stats)
+            return stats
+            
+        except Exception as e:
+            print(f"❌ Error aggregating ratings: {e}")
+            return pd.DataFrame()
+    
     def create_enhanced_sample_data(self) -> Dict[str, pd.DataFrame]:
         """Create an enhanced sample dataset with more variety"""
         print("🎬 Creating enhanced sample movie dataset...")
@@ -248,34 +574,13 @@ class MovieDataLoader:
             ]
         }
         
-        # Create ratings data
-        np.random.seed(42)
-        ratings_data = []
-        
-        for user_id in range(1, 1001):  # 1000 users
-            # Each user rates 10-50 movies
-            num_ratings = np.random.randint(10, 51)
-            movie_ids = np.random.choice(movies_data['movieId'], num_ratings, replace=False)
-            
-            for movie_id in movie_ids:
-                # Create realistic ratings based on movie quality
-                movie_idx = movie_id - 1
-                base_rating = movies_data['imdb_rating'][movie_idx] / 2  # Convert from 0-10 to 0-5 scale
-                
-                # Add some noise
-                rating = base_rating + np.random.normal(0, 0.5)
-                rating = np.clip(rating, 0.5, 5.0)  # Ensure rating is between 0.5 and 5.0
-                rating = round(rating * 2) / 2  # Round to nearest 0.5
-                
-                ratings_data.append({
-                    'userId': user_id,
-                    'movieId': movie_id,
-                    'rating': rating,
-                    'timestamp': int(datetime.now().timestamp())
-                })
-        
+        # Create ratings data: 1000 users rating 10-50 movies each, around the movie's IMDb rating
+        from src.synthetic import generate_ratings
         movies_df = pd.DataFrame(movies_data)
-        ratings_df = pd.DataFrame(ratings_data)
+        ratings_df = generate_ratings(movies_df['movieId'], movies_df['imdb_rating'] / 2, 1000,
+                                      min_ratings=10, max_ratings=50, counts='uniform',
+                                      user_bias=0, seed=42)
+        ratings_df['timestamp'] = np.int32(datetime.now().timestamp())
         
         self.movies_df = movies_df
         self.ratings_df = ratings_df
@@ -0,0 +1,49 @@
+"""
+Local recommendation explanations from shared tag features
+The element-wise product of two L2-normalized tag vectors splits their cosine
+similarity into per-feature contributions, so the largest entries are the
+stemmed words, names and keywords the two movies have in common
+"""
+
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class TagExplainer:
+    """Names the vectorizer features behind a pair's similarity score"""
+
+    def __init__(self, tag_matrix: sp.csr_matrix, feature_names: Sequence[str]):
+        self.tag_matrix = tag_matrix
+        self.feature_names = np.asarray(feature_names, dtype=object)
+
+    def shared_features(self, seed_row: int, rows: Sequence[int], top_n: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        For every recommended row, the top_n features shared with the seed and
+        their contribution to the cosine score (contributions sum to the score)
+        """
+        overlap = sp.csr_matrix(self.tag_matrix[list(rows)].multiply(self.tag_matrix[seed_row]))
+
+        explanations = []
+        for start, end in zip(overlap.indptr[:-1], overlap.indptr[1:]):
+            data, indices = overlap.data[start:end], overlap.indices[start:end]
+            best = np.lexsort((indices, -data))[:top_n]
+            explanations.append([(self.feature_names[i], round(float(w), 3)) for i, w in zip(indices[best], data[best])])
+        return explanations
+
+
+def summarize(seed_title: str, explanations: Iterable[Tuple[str, List[Tuple[str, float]]]],
+              max_features: int = 3) -> str:
+    """
+    One readable sentence per recommendation, used as the API's ai_analysis;
+    explanations are (title, shared features) pairs, so duplicate titles each get theirs
+    """
+    lines = []
+    for title, features in explanations:
+        if features:
+            shared = ", ".join(name for name, _ in features[:max_features])
+            lines.append(f"{title} shares {shared} with {seed_title}.")
+        else:
+            lines.append(f"{title} has no tag features in common with {seed_title}.")
+    return " ".join(lines)
@@ -0,0 +1,129 @@
+"""
+Attribute filters for recommendations
+Packed per-value bitmaps (genre, language, decade, rating bucket) plus year and rating columns,
+combined into a boolean mask that is applied before top-k selection
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.preprocessing import extract_names
+
+# Filter keys accepted by AttributeIndex.mask
+FILTER_KEYS = ('genres', 'exclude_genres', 'languages', 'decades', 'rating_buckets',
+               'min_year', 'max_year', 'min_rating', 'max_rating')
+
+
+def normalize_genre(name: str) -> str:
+    """'Science Fiction', 'ScienceFiction' and 'science fiction' share one key"""
+    return str(name).replace(" ", "").replace("-", "").casefold()
+
+
+def split_genres(value) -> List[str]:
+    """Genre names from TMDB lists/JSON strings or MovieLens 'Action|Adventure' strings"""
+    return [normalize_genre(part) for name in extract_names(value) for part in str(name).split('|') if part]
+
+
+def _bitmaps(values: Iterable[Iterable], num_movies: int) -> Dict:
+    """Packed bitmap per distinct value; values[i] lists the values of movie i"""
+    rows = {}
+    for row, movie_values in enumerate(values):
+        for value in movie_values:
+            rows.setdefault(value, []).append(row)
+
+    bitmaps = {}
+    for value, members in rows.items():
+        bits = np.zeros(num_movies, dtype=bool)
+        bits[members] = True
+        bitmaps[value] = np.packbits(bits)
+    return bitmaps
+
+
+class AttributeIndex:
+    """
+    Per-movie attributes precomputed at model load.
+
+    Categorical attributes are packed bitmaps (one bit per movie), so a filter
+    is a few byte-wise ORs/ANDs; year and vote average are kept as compact
+    columns for range filters. Masks are cached per filter combination.
+    """
+
+    def __init__(self, genres: Optional[Iterable], languages: Optional[Iterable], years: Optional[np.ndarray],
+                 ratings: Optional[np.ndarray], num_movies: int):
+        self.num_movies = num_movies
+        self.years = np.asarray(years, dtype=np.int16) if years is not None else None
+        self.ratings = np.asarray(ratings, dtype=np.float32) if ratings is not None else None
+
+        self.genre_bitmaps = _bitmaps((split_genres(g) for g in genres), num_movies) if genres is not None else {}
+        self.language_bitmaps = (_bitmaps(([language.casefold()] if isinstance(language, str) else []
+                                           for language in languages), num_movies)
+                                 if languages is not None else {})
+        self.decade_bitmaps = (_bitmaps(([int(y) // 10 * 10] if y > 0 else [] for y in self.years), num_movies)
+                               if self.years is not None else {})
+        self.rating_bitmaps = (_bitmaps(([int(r)] if np.isfinite(r) else [] for r in self.ratings), num_movies)
+                               if self.ratings is not None else {})
+        self._masks = {}
+
+    @property
+    def genres(self) -> List[str]:
+        return sorted(self.genre_bitmaps)
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted(self.language_bitmaps)
+
+    def _any_of(self, bitmaps: Dict, values) -> np.ndarray:
+        """Packed OR of the bitmaps of the given values (all zeros for unknown values)"""
+        packed = np.zeros((self.num_movies + 7) // 8, dtype=np.uint8)
+        for value in values:
+            if value in bitmaps:
+                packed |= bitmaps[value]
+        return packed
+
+    def mask(self, filters: Dict) -> np.ndarray:
+        """
+        Boolean mask of movies matching every filter:
+        genres (any of), exclude_genres (none of), languages (any of), decades (any of, e.g. 1990),
+        rating_buckets (any of whole vote averages, e.g. 7 for 7.0–7.9),
+        min_year / max_year, min_rating / max_rating (vote average).
+        Movies with an unknown year or rating fail range filters on it.
+        """
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filters {sorted(unknown)}, expected {list(FILTER_KEYS)}")
+
+        key = tuple(sorted((name, tuple(value) if isinstance(value, (list, tuple, set)) else value)
+                           for name, value in filters.items()))
+        if key in self._masks:
+            return self._masks[key]
+
+        packed = np.full((self.num_movies + 7) // 8, 0xFF, dtype=np.uint8)
+        if filters.get('genres'):
+            packed &= self._any_of(self.genre_bitmaps, [normalize_genre(g) for g in filters['genres']])
+        if filters.get('exclude_genres'):
+            packed &= ~self._any_of(self.genre_bitmaps, [normalize_genre(g) for g in filters['exclude_genres']])
+        if filters.get('languages'):
+            languages = [str(language).casefold() for language in filters['languages']]
+            packed &= self._any_of(self.language_bitmaps, languages)
+        if filters.get('decades'):
+            packed &= self._any_of(self.decade_bitmaps, [int(d) for d in filters['decades']])
+        if filters.get('rating_buckets'):
+            packed &= self._any_of(self.rating_bitmaps, [int(b) for b in filters['rating_buckets']])
+
+        mask = np.unpackbits(packed, count=self.num_movies).astype(bool)
+        if self.years is not None:
+            if filters.get('min_year') is not None:
+                mask &= self.years >= filters['min_year']
+            if filters.get('max_year') is not None:
+                mask &= (self.years <= filters['max_year']) & (self.years > 0)
+        for name, compare in (('min_rating', np.greater_equal), ('max_rating', np.less_equal)):
+            if filters.get(name) is not None:
+                # Without vote averages no movie is known to pass
+                mask &= compare(self.ratings, filters[name]) if self.ratings is not None else False
+
+        mask.flags.writeable = False
+        if len(self._masks) >= 256:
+            self._masks.clear()
+        self._masks[key] = mask
+        return mask
@@ -0,0 +1,186 @@
+"""
+Sparse top-K neighbor index for content-based recommendations
+Stores only the best K neighbors of every movie instead of the dense N×N matrix
+"""
+
+import argparse
+import os
+import pickle
+from typing import Tuple
+
+import numpy as np
+
+from src.tag_vectors import TAG_MATRIX_NAME, load_tag_matrix, similarity_rows
+from src.utils.topk import top_k_indices_batch
+
+
+class NeighborIndex:
+    """Top-K neighbor ids (int32) and scores (float32) for every movie"""
+
+    def __init__(self, ids: np.ndarray, scores: np.ndarray):
+        if ids.shape != scores.shape:
+            raise ValueError(f"ids {ids.shape} and scores {scores.shape} must have the same shape")
+        self.ids = ids
+        self.scores = scores
+
+    @property
+    def num_movies(self) -> int:
+        return self.ids.shape[0]
+
+    @property
+    def k(self) -> int:
+        return self.ids.shape[1]
+
+    @classmethod
+    def from_similarity(cls, similarity: np.ndarray, k: int = 50, block_size: int = 1024) -> "NeighborIndex":
+        """
+        Build the index from a dense similarity matrix, one block of rows at a time.
+
+        Row i keeps its K best movies in the same order as the dense row
+        (score descending, ties by ascending index), so position 0 is normally
+        the movie itself.
+        """
+        n = similarity.shape[0]
+        k = min(k, n)
+        ids = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float32)
+
+        for start in range(0, n, block_size):
+            block = np.asarray(similarity[start:start + block_size])
+            top = top_k_indices_batch(block, k)
+            ids[start:start + len(block)] = top
+            scores[start:start + len(block)] = np.take_along_axis(block, top, axis=1)
+
+        return cls(ids, scores)
+
+    @classmethod
+    def from_tag_matrix(cls, tag_matrix, k: int = 50, block_size: int = 1024) -> "NeighborIndex":
+        """
+        Build the index straight from the L2-normalized tag matrix.
+
+        Similarity rows are computed one block at a time, so the dense N×N
+        matrix is never materialized.
+        """
+        return cls.from_similarity(_TagSimilarityRows(tag_matrix), k=k, block_size=block_size)
+
+    def neighbors(self, index: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the first k neighbor ids and scores of a movie"""
+        return self.ids[index, :k], self.scores[index, :k]
+
+    def neighbors_batch(self, indices, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the first k neighbor ids and scores for several movies"""
+        return self.ids[indices, :k], self.scores[indices, :k]
+
+    def append(self, similarity_rows_new: np.ndarray, first_row: int) -> None:
+        """
+        Add neighbor lists for movies appended at rows first_row, first_row + 1, ...
+
+        similarity_rows_new holds their scores against the whole (grown) catalog.
+        Each new movie is pinned at position 0 of its own list, like the dense rows.
+        """
+        rows = np.array(similarity_rows_new, dtype=np.float64)
+        own = np.arange(len(rows)) + first_row
+        own_scores = rows[np.arange(len(rows)), own]
+        rows[np.arange(len(rows)), own] = np.inf
+
+        k = min(self.k, rows.shape[1])
+        top = top_k_indices_batch(rows, k)
+        top_scores = np.take_along_axis(rows, top, axis=1)
+        top_scores[:, 0] = own_scores
+
+        if k < self.k:
+            # Tiny catalogs: pad with the list's last entry
+            top = np.pad(top, ((0, 0), (0, self.k - k)), mode='edge')
+            top_scores = np.pad(top_scores, ((0, 0), (0, self.k - k)), mode='edge')
+
+        self.ids = np.vstack([self.ids, top.astype(np.int32)])
+        self.scores = np.vstack([self.scores, top_scores.astype(np.float32)])
+
+    def merge(self, candidate_ids: np.ndarray, candidate_scores: np.ndarray) -> np.ndarray:
+        """
+        Merge new candidate movies into existing lists.
+
+        candidate_scores[i, j] is the score of movie candidate_ids[j] for row i.
+        Only rows where some candidate beats the current K-th entry are touched;
+        position 0 (the movie itself) is kept. Returns the updated rows.
+        """
+        n = candidate_scores.shape[0]
+        affected = np.flatnonzero(candidate_scores.max(axis=1) > self.scores[:n, -1])
+        if len(affected) == 0:
+            return affected
+
+        # Memory-mapped arrays are read-only; copy before the first in-place update
+        if not self.ids.flags.writeable:
+            self.ids = np.array(self.ids)
+            self.scores = np.array(self.scores)
+
+        ids = np.concatenate([self.ids[affected, 1:],
+                              np.broadcast_to(candidate_ids, (len(affected), len(candidate_ids)))], axis=1)
+        scores = np.concatenate([self.scores[affected, 1:], candidate_scores[affected]], axis=1)
+
+        order = np.lexsort((ids, -scores), axis=1)[:, :self.k - 1]
+        self.ids[affected, 1:] = np.take_along_axis(ids, order, axis=1)
+        self.scores[affected, 1:] = np.take_along_axis(scores, order, axis=1)
+        return affected
+
+    def replace_rows(self, rows: np.ndarray, similarity_rows_new: np.ndarray) -> None:
+        """Recompute the lists of some rows from fresh similarity rows (self pinned at position 0)"""
+        if not self.ids.flags.writeable:
+            self.ids = np.array(self.ids)
+            self.scores = np.array(self.scores)
+
+        similarity_rows_new = np.array(similarity_rows_new, dtype=np.float64)
+        own_scores = similarity_rows_new[np.arange(len(rows)), rows]
+        similarity_rows_new[np.arange(len(rows)), rows] = np.inf
+
+        top = top_k_indices_batch(similarity_rows_new, self.k)
+        top_scores = np.take_along_axis(similarity_rows_new, top, axis=1)
+        top_scores[:, 0] = own_scores
+        self.ids[rows] = top
+        self.scores[rows] = top_scores
+
+    def save(self, path: str) -> None:
+        """Save the index as an uncompressed .npz file"""
+        np.savez(path, ids=self.ids, scores=self.scores)
+
+    @classmethod
+    def load(cls, path: str) -> "NeighborIndex":
+        """Load an index saved with ``save``"""
+        with np.load(path) as data:
+            return cls(data['ids'], data['scores'])
+
+
+class _TagSimilarityRows:
+    """Row-sliceable stand-in for the dense similarity matrix, computed from tag vectors"""
+
+    def __init__(self, tag_matrix):
+        self.tag_matrix = tag_matrix
+        self.shape = (tag_matrix.shape[0], tag_matrix.shape[0])
+
+    def __getitem__(self, rows: slice) -> np.ndarray:
+        return similarity_rows(self.tag_matrix, np.arange(self.shape[0])[rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the top-K neighbor index")
+    parser.add_argument('--artifacts-dir', default='artifacts')
+    parser.add_argument('--k', type=int, default=50, help="neighbors kept per movie")
+    parser.add_argument('--source', choices=['similarity', 'tags'], default='similarity',
+                        help="dense similarity.pkl or the sparse tag_matrix.npz")
+    args = parser.parse_args()
+
+    if args.source == 'tags':
+        tag_matrix = load_tag_matrix(os.path.join(args.artifacts_dir, TAG_MATRIX_NAME))
+        index = NeighborIndex.from_tag_matrix(tag_matrix, k=args.k)
+    else:
+        with open(os.path.join(args.artifacts_dir, 'similarity.pkl'), 'rb') as f:
+            similarity = pickle.load(f)
+        index = NeighborIndex.from_similarity(similarity, k=args.k)
+
+    output_path = os.path.join(args.artifacts_dir, 'neighbors.npz')
+    index.save(output_path)
+    print(f"✅ Saved {index.num_movies}×{index.k} neighbor index to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Reproducible artifact build pipeline
+Runs the notebook's preprocessing as cached, timed stages:
+
+    python -m src.pipeline --movies data/tmdb_5000_movies.csv --credits data/tmdb_5000_credits.csv
+
+Every stage output is cached under <output>/.cache by a hash of its inputs and
+parameters, so re-running with unchanged data skips straight to writing artifacts.
+Parsing and stemming run across worker processes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts import STORE_DIR_NAME, export_artifacts
+from src.neighbors import NeighborIndex
+from src.preprocessing import TAG_SOURCE_COLUMNS, join_tags, parse_movies
+from src.tag_vectors import TAG_MATRIX_NAME, build_tag_matrix, save_tag_matrix, similarity_rows
+
+# Bump when a stage's logic changes so old cache entries are not reused
+PIPELINE_VERSION = 1
+
+# Extra TMDB columns carried into the movies_full table for ranking and filtering
+FULL_EXTRA_COLUMNS = ['vote_average', 'vote_count', 'popularity', 'release_date', 'original_language']
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parallel_apply(df: pd.DataFrame, fn: Callable, workers: int):
+    """Apply fn to row chunks of df in worker processes and concatenate the results"""
+    if workers <= 1 or len(df) < 1000:
+        return fn(df)
+    chunks = [df.iloc[start:start + len(df) // (workers * 4) + 1]
+              for start in range(0, len(df), len(df) // (workers * 4) + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return pd.concat(list(executor.map(fn, chunks)))
+
+
+class StageRunner:
+    """Runs pipeline stages, caching each output by a content hash and timing it"""
+
+    def __init__(self, cache_dir: str, use_cache: bool = True):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.timings: List[Tuple[str, float, bool]] = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def run(self, name: str, fn: Callable, upstream_key: str, params: Dict, *args, **options) -> Tuple[Any, str]:
+        """
+        Return (output, key); key identifies the output for downstream stages.
+        params are part of the cache key, options (e.g. worker count) are not.
+        """
+        key = hashlib.sha256(
+            json.dumps([name, PIPELINE_VERSION, upstream_key, params], sort_keys=True).encode()
+        ).hexdigest()
+        cache_path = os.path.join(self.cache_dir, f"{name}-{key[:16]}.pkl")
+
+        start = time.perf_counter()
+        cached = self.use_cache and os.path.exists(cache_path)
+        if cached:
+            with open(cache_path, 'rb') as f:
+                output = pickle.load(f)
+        else:
+            output = fn(*args, **params, **options)
+            with open(cache_path, 'wb') as f:
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        elapsed = time.perf_counter() - start
+        self.timings.append((name, elapsed, cached))
+        print(f"⏱️ {name:<12} {elapsed:8.2f}s{'  (cached)' if cached else ''}")
+        return output, key
+
+
+# Stage functions ---------------------------------------------------------------
+
+def load_stage(movies_path: str, credits_path: Optional[str]) -> pd.DataFrame:
+    """Read TMDB CSVs and merge credits (cast/crew) onto movies by id"""
+    movies = pd.read_csv(movies_path)
+    if credits_path:
+        credits = pd.read_csv(credits_path)
+        credits = credits.drop(columns=[c for c in ['title'] if c in credits.columns])
+        movies = movies.merge(credits, left_on='id', right_on='movie_id')
+    if 'movie_id' not in movies.columns:
+        movies = movies.rename(columns={'id': 'movie_id'})
+
+    keep = ['movie_id', 'title'] + TAG_SOURCE_COLUMNS + [c for c in FULL_EXTRA_COLUMNS if c in movies.columns]
+    movies = movies[keep]
+    return movies.dropna(subset=['movie_id', 'title'] + TAG_SOURCE_COLUMNS).reset_index(drop=True)
+
+
+def parse_stage(raw: pd.DataFrame, workers: int) -> pd.DataFrame:
+    """convert_cast / fetch_director / remove_space on every row"""
+    return _parallel_apply(raw, parse_movies, workers).reset_index(drop=True)
+
+
+def tags_stage(parsed: pd.DataFrame, workers: int) -> pd.DataFrame:
+    """Concatenate, lower-case and Porter-stem the tags"""
+    tags = _parallel_apply(parsed, join_tags, workers)
+    return pd.DataFrame({
+        'movie_id': parsed['movie_id'].to_numpy(),
+        'title': parsed['title'].to_numpy(),
+        'tags': tags.to_numpy(),
+    })
+
+
+def vectorize_stage(new_df: pd.DataFrame, max_features: int):
+    """Fit the CountVectorizer and build the L2-normalized tag matrix"""
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(max_features=max_features, stop_words='english')
+    vectorizer.fit(new_df['tags'])
+    return build_tag_matrix(new_df['tags'], vectorizer)
+
+
+def neighbors_stage(tag_matrix, k: int) -> NeighborIndex:
+    """Top-K neighbor lists computed block by block from the tag matrix"""
+    return NeighborIndex.from_tag_matrix(tag_matrix, k=k)
+
+
+def similarity_stage(tag_matrix, block_size: int) -> np.ndarray:
+    """Dense N×N cosine matrix (only for the legacy similarity.pkl)"""
+    n = tag_matrix.shape[0]
+    similarity = np.empty((n, n), dtype=np.float32)
+    for start in range(0, n, block_size):
+        similarity[start:start + block_size] = similarity_rows(tag_matrix, np.arange(start, min(start + block_size, n)))
+    return similarity
+
+
+# Pipeline ----------------------------------------------------------------------
+
+def build(movies_path: str, credits_path: Optional[str] = None, output_dir: str = 'artifacts',
+          workers: Optional[int] = None, k: int = 50, max_features: int = 5000,
+          dense: bool = False, use_cache: bool = True, pickles: bool = False) -> Dict[str, float]:
+    """
+    Run every stage and write the artifacts; returns wall time per stage.
+    The movie tables go to the columnar store; pickles=True also writes the
+    legacy movie_list.pkl / movies_full.pkl for the notebook and older tools.
+    """
+    workers = workers or os.cpu_count() or 1
+    runner = StageRunner(os.path.join(output_dir, '.cache'), use_cache)
+
+    input_key = hashlib.sha256(
+        (file_hash(movies_path) + (file_hash(credits_path) if credits_path else '')).encode()
+    ).hexdigest()
+
+    raw, key = runner.run('load', load_stage, input_key, {}, movies_path, credits_path)
+    parsed, key = runner.run('parse', parse_stage, key, {}, raw, workers=workers)
+    new_df, tags_key = runner.run('tags', tags_stage, key, {}, parsed, workers=workers)
+    (tag_matrix, vectorizer), vector_key = runner.run('vectorize', vectorize_stage, tags_key,
+                                                      {'max_features': max_features}, new_df)
+    neighbor_index, _ = runner.run('neighbors', neighbors_stage, vector_key, {'k': k}, tag_matrix)
+
+    similarity = None
+    if dense:
+        similarity, _ = runner.run('similarity', similarity_stage, vector_key, {'block_size': 1024}, tag_matrix)
+
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    if pickles:
+        with open(os.path.join(output_dir, 'movie_list.pkl'), 'wb') as f:
+            pickle.dump(new_df, f)
+        with open(os.path.join(output_dir, 'movies_full.pkl'), 'wb') as f:
+            pickle.dump(parsed, f)
+    with open(os.path.join(output_dir, 'vectorizer.pkl'), 'wb') as f:
+        pickle.dump(vectorizer, f)
+    save_tag_matrix(os.path.join(output_dir, TAG_MATRIX_NAME), tag_matrix)
+    neighbor_index.save(os.path.join(output_dir, 'neighbors.npz'))
+    if similarity is not None:
+        with open(os.path.join(output_dir, 'similarity.pkl'), 'wb') as f:
+            pickle.dump(similarity, f)
+    export_artifacts(os.path.join(output_dir, STORE_DIR_NAME), new_df, similarity, neighbor_index, tag_matrix,
+                     movies_full=parsed)
+
+    # A rebuilt catalog already contains every change the old delta recorded
+    delta_path = os.path.join(output_dir, 'catalog_delta.pkl')
+    if os.path.exists(delta_path):
+        os.remove(delta_path)
+        print(f"🧹 Removed stale {delta_path}")
+
+    elapsed = time.perf_counter() - start
+    runner.timings.append(('write', elapsed, False))
+    print(f"⏱️ {'write':<12} {elapsed:8.2f}s")
+
+    total = sum(t for _, t, _ in runner.timings)
+    print(f"✅ Built artifacts for {len(new_df)} movies in {total:.2f}s → {output_dir}")
+    return {name: elapsed for name, elapsed, _ in runner.timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build recommender artifacts from TMDB CSV files")
+    parser.add_argument('--movies', required=True, help="tmdb_5000_movies.csv or a CSV with cast/crew columns")
+    parser.add_argument('--credits', default=None, help="tmdb_5000_credits.csv")
+    parser.add_argument('--output', default='artifacts')
+    parser.add_argument('--workers', type=int, default=None, help="processes for parsing/stemming (default: all CPUs)")
+    parser.add_argument('--k', type=int, default=50, help="neighbors kept per movie")
+    parser.add_argument('--max-features', type=int, default=5000)
+    parser.add_argument('--dense', action='store_true', help="also write the N×N similarity.pkl")
+    parser.add_argument('--no-cache', action='store_true', help="recompute every stage")
+    parser.add_argument('--pickles', action='store_true', help="also write movie_list.pkl and movies_full.pkl")
+    args = parser.parse_args()
+
+    build(args.movies, args.credits, args.output, args.workers, args.k,
+          args.max_features, args.dense, not args.no_cache, args.pickles)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Tag preprocessing from the "Movie Recommender System Data Analysis" notebook
+Turns TMDB-style rows (overview, genres, keywords, cast, crew) into the stemmed tag strings
+"""
+
+import ast
+from typing import List
+
+import pandas as pd
+
+try:
+    from nltk.stem import PorterStemmer
+    _stemmer = PorterStemmer()
+except ImportError:
+    _stemmer = None
+
+TAG_SOURCE_COLUMNS = ['overview', 'genres', 'keywords', 'cast', 'crew']
+
+
+def extract_names(data) -> List[str]:
+    """Names from API lists of dicts, plain lists, or legacy CSV strings"""
+    if isinstance(data, list):
+        if data and isinstance(data[0], dict):
+            return [item['name'] for item in data]
+        return data
+    if isinstance(data, str):
+        try:
+            return [item['name'] for item in ast.literal_eval(data)]
+        except (ValueError, SyntaxError, TypeError, KeyError):
+            return [data]
+    return []
+
+
+def convert_cast(data) -> List[str]:
+    """Keep the top 3 cast members"""
+    return extract_names(data)[:3]
+
+
+def fetch_director(data) -> List[str]:
+    """Keep the director from a crew list (already-reduced lists pass through)"""
+    if isinstance(data, str):
+        try:
+            data = ast.literal_eval(data)
+        except (ValueError, SyntaxError):
+            return [data]
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return [person['name'] for person in data if person.get('job') == 'Director'][:1]
+    return data if isinstance(data, list) else []
+
+
+def remove_space(data_list) -> List[str]:
+    """'Anna Kendrick' -> 'AnnaKendrick' so names stay single tokens"""
+    if isinstance(data_list, list):
+        return [str(item).replace(" ", "") for item in data_list]
+    return []
+
+
+def stems(text: str) -> str:
+    """Porter-stem every word, as in the notebook"""
+    if _stemmer is None:
+        raise ImportError("nltk is required for stemming: pip install nltk")
+    return " ".join(_stemmer.stem(word) for word in text.split())
+
+
+def parse_movies(movies: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn raw columns into the notebook's token lists: overview split into words,
+    genre/keyword names, top 3 cast and the director, with spaces removed from names
+    """
+    parsed = movies.copy()
+    parsed['overview'] = parsed['overview'].apply(lambda x: x.split() if isinstance(x, str) else [])
+    parsed['genres'] = parsed['genres'].apply(lambda x: remove_space(extract_names(x)))
+    parsed['keywords'] = parsed['keywords'].apply(lambda x: remove_space(extract_names(x)))
+    parsed['cast'] = parsed['cast'].apply(lambda x: remove_space(convert_cast(x)))
+    parsed['crew'] = parsed['crew'].apply(lambda x: remove_space(fetch_director(x)))
+    return parsed
+
+
+def join_tags(parsed: pd.DataFrame) -> pd.Series:
+    """Concatenate the token lists of parsed movies into lower-cased, stemmed tag strings"""
+    words = parsed['overview'] + parsed['genres'] + parsed['keywords'] + parsed['cast'] + parsed['crew']
+    return words.apply(lambda x: stems(" ".join(x).lower()))
+
+
+def build_tags(movies: pd.DataFrame) -> pd.Series:
+    """Tag strings for a DataFrame of raw movies"""
+    movies = movies.reindex(columns=list(movies.columns) + [c for c in TAG_SOURCE_COLUMNS if c not in movies.columns])
+    return join_tags(parse_movies(movies))
@@ -0,0 +1,134 @@
+"""
+Re-ranking of recommendation candidates
+Hybrid blending of content similarity with popularity, vote average and recency,
+and maximal-marginal-relevance (MMR) diversification
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils.topk import top_k_indices, top_k_indices_batch
+
+# Blend weights; similarity keeps most of the say by default
+DEFAULT_WEIGHTS = {'similarity': 0.7, 'popularity': 0.1, 'vote_average': 0.1, 'recency': 0.1}
+
+
+def _scale(values: Optional[np.ndarray], n: int) -> np.ndarray:
+    """Min-max scale to [0, 1]; unknown values get the column mean, missing columns are all 0"""
+    if values is None:
+        return np.zeros(n, dtype=np.float32)
+
+    values = np.asarray(values, dtype=np.float64)
+    known = np.isfinite(values)
+    if not known.any():
+        return np.zeros(n, dtype=np.float32)
+
+    low, high = values[known].min(), values[known].max()
+    scaled = (values - low) / (high - low) if high > low else np.zeros(n)
+    scaled[~known] = scaled[known].mean()
+    return scaled.astype(np.float32)
+
+
+class HybridRanker:
+    """
+    Per-movie feature columns scaled to [0, 1] once, so re-ranking is a
+    weighted sum: w_sim·similarity + F[candidates] @ w.
+
+    popularity is log-scaled before scaling; recency is the release year.
+    """
+
+    FEATURES = ('popularity', 'vote_average', 'recency')
+
+    def __init__(self, popularity: Optional[np.ndarray], vote_average: Optional[np.ndarray],
+                 years: Optional[np.ndarray], num_movies: int):
+        if popularity is not None:
+            popularity = np.log1p(np.clip(np.asarray(popularity, dtype=np.float64), 0, None))
+        if years is not None:
+            years = np.where(np.asarray(years) > 0, years, np.nan)
+
+        self.features = np.column_stack([
+            _scale(popularity, num_movies),
+            _scale(vote_average, num_movies),
+            _scale(years, num_movies),
+        ])
+        self._priors = {}
+
+    @staticmethod
+    def resolve_weights(weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Fill unspecified weights from DEFAULT_WEIGHTS and reject unknown names"""
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown ranking weights {sorted(unknown)}, expected {list(DEFAULT_WEIGHTS)}")
+        return {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def prior(self, weights: Dict[str, float]) -> np.ndarray:
+        """F @ w for every movie, cached per weight combination"""
+        key = tuple(weights[name] for name in self.FEATURES)
+        if key not in self._priors:
+            self._priors[key] = self.features @ np.array(key, dtype=np.float32)
+        return self._priors[key]
+
+    def blend(self, candidates: np.ndarray, similarity: np.ndarray,
+              weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Blended score of every candidate; excluded candidates (-inf similarity) stay -inf"""
+        weights = self.resolve_weights(weights)
+        similarity = np.asarray(similarity, dtype=np.float64)
+        return np.where(np.isfinite(similarity),
+                        weights['similarity'] * np.nan_to_num(similarity) + self.prior(weights)[candidates],
+                        -np.inf)
+
+    def rerank(self, candidates: np.ndarray, similarity: np.ndarray, k: int,
+               weights: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-order candidate rows (1-D, or 2-D for a batch of seeds) by the blended score.
+
+        Returns the best k candidates and their similarity scores; candidates
+        with -inf similarity (excluded movies) stay last.
+        """
+        candidates = np.asarray(candidates)
+        similarity = np.asarray(similarity, dtype=np.float64)
+
+        blended = self.blend(candidates, similarity, weights)
+        if blended.ndim == 1:
+            order = top_k_indices(blended, k)
+            return candidates[order], similarity[order]
+
+        order = top_k_indices_batch(blended, k)
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(similarity, order, axis=1)
+
+
+def mmr_order(relevance: np.ndarray, pairwise: np.ndarray, k: int, diversity: float = 0.3,
+              time_budget_ms: Optional[float] = 2.0) -> np.ndarray:
+    """
+    Pick k candidates by maximal marginal relevance.
+
+    Each step takes the candidate maximizing
+    (1 - diversity)·relevance - diversity·max similarity to the ones already picked,
+    updating the running max with one vectorized row operation. diversity=0
+    keeps the relevance order. When time_budget_ms runs out, the remaining
+    slots are filled in relevance order. Returns positions into the candidates.
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    m = len(relevance)
+    k = min(k, m)
+    deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms is not None else None
+
+    selected = []
+    available = np.ones(m, dtype=bool)
+    max_similarity = np.zeros(m)
+    for _ in range(k):
+        score = (1 - diversity) * relevance - diversity * max_similarity
+        score[~available] = -np.inf
+        pick = int(np.argmax(score))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, pairwise[pick], out=max_similarity)
+
+        if deadline is not None and time.perf_counter() > deadline:
+            remaining = np.flatnonzero(available)
+            selected.extend(remaining[top_k_indices(relevance[remaining], k - len(selected))].tolist())
+            break
+
+    return np.array(selected, dtype=np.int64)
@@ -3,13 +3,161 @@ import numpy as np
 import pandas as pd
 import pickle
 import os
+import threading
+import time
+
+import scipy.sparse as sp
+
+from src.ann import ANN_INDEX_NAME, IVFIndex
+from src.artifacts import MANIFEST_NAME, STORE_DIR_NAME, ArtifactStore
+from src.cache import ResultCache
+from src.cooccurrence import COOCCURRENCE_INDEX_NAME
+from src.explain import TagExplainer
+from src.filters import AttributeIndex
+from src.neighbors import NeighborIndex
+from src.preprocessing import build_tags
+from src.quantize import QUANTIZED_DTYPES, QuantizedSimilarity, quantized_array_names
+from src.ranking import HybridRanker, mmr_order
+from src.tag_vectors import TAG_MATRIX_NAME, build_tag_matrix, load_tag_matrix, similarity_rows
+from src.title_index import TitleIndex, TrigramSearchIndex, normalize_title, title_year
+from src.utils.topk import top_k_indices, top_k_indices_batch
+
+# Supported ways of serving similarity scores
+SIMILARITY_MODES = ('dense', 'neighbors', 'sparse')
+
+# Where recommend() takes its neighbors from: tag similarity or ratings co-occurrence
+RECOMMENDATION_BACKENDS = ('content', 'cooccurrence')
+
+# Candidates taken by similarity before hybrid or diversity re-ranking picks the final k
+RERANK_POOL_SIZE = 200
+
+# Catalog changes made after the artifacts were built (add_movies / remove_movies)
+CATALOG_DELTA_NAME = 'catalog_delta.pkl'
+
+# Columns read from the artifact store: serving needs ids and titles, not the tag strings
+SERVING_COLUMNS = ['movie_id', 'title']
+MOVIES_FULL_COLUMNS = ['movie_id', 'id', 'year', 'release_date', 'popularity', 'vote_count', 'vote_average',
+                       'genres', 'original_language']
+
+# Placeholder for optional artifacts that are read on first access
+_NOT_LOADED = object()
+
+# Manifest of the artifact store; rewritten whenever the store is
+STORE_MANIFEST = os.path.join(STORE_DIR_NAME, MANIFEST_NAME)
+
+# Files whose size and mtime identify the loaded model version: everything a
+# serving path reads, including the artifacts that are only loaded on first use
+BUILD_ARTIFACTS = ('movie_list.pkl', 'similarity.pkl', 'neighbors.npz', 'movies_full.pkl', 'vectorizer.pkl',
+                   TAG_MATRIX_NAME, ANN_INDEX_NAME, COOCCURRENCE_INDEX_NAME, STORE_MANIFEST)
+VERSIONED_ARTIFACTS = BUILD_ARTIFACTS + (CATALOG_DELTA_NAME,)
+
+
+def artifact_signatures(artifacts_dir, names=VERSIONED_ARTIFACTS):
+    """'size:mtime_ns' of each artifact file, None for files that do not exist"""
+    signatures = {}
+    for name in names:
+        try:
+            stat = os.stat(os.path.join(artifacts_dir, name))
+            signatures[name] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except FileNotFoundError:
+            signatures[name] = None
+    return signatures
+
+
+def artifact_files_version(artifacts_dir, names=VERSIONED_ARTIFACTS):
+    """Size and mtime of each existing artifact file; changes whenever one is rewritten"""
+    return [f"{name}:{signature}" for name, signature in artifact_signatures(artifacts_dir, names).items()
+            if signature is not None]
+
+
+def available_mode(artifacts_dir, similarity_dtype=None):
+    """
+    The serving mode the artifacts in artifacts_dir support, preferring the dense
+    (or, with similarity_dtype, quantized) matrix, then the neighbor index (the
+    pipeline's default output), then tag vectors
+    """
+    store_dir = os.path.join(artifacts_dir, STORE_DIR_NAME)
+    store = ArtifactStore(store_dir) if ArtifactStore.exists(store_dir) else None
+    
+    def has(array_name, filename):
+        if store is not None:
+            return store.has_array(array_name)
+        return os.path.exists(os.path.join(artifacts_dir, filename))
+    
+    if has('similarity', 'similarity.pkl'):
+        return 'dense'
+    if similarity_dtype is not None and store is not None and store.has_array(quantized_array_names(similarity_dtype)[0]):
+        return 'dense'
+    if has('neighbor_ids', 'neighbors.npz'):
+        return 'neighbors'
+    if has('tag_data', TAG_MATRIX_NAME):
+        return 'sparse'
+    return 'dense'
+
+
+def _artifact_nbytes(value):
+    """Approximate in-memory size of a loaded artifact and whether it is memory-mapped"""
+    if value is None:
+        return 0, False
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum()), False
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes), isinstance(value, np.memmap)
+    if sp.issparse(value):
+        return int(value.data.nbytes + value.indices.nbytes + value.indptr.nbytes), isinstance(value.data, np.memmap)
+    if isinstance(value, QuantizedSimilarity):
+        return int(value.nbytes), isinstance(value.values, np.memmap)
+    if isinstance(value, NeighborIndex):
+        return int(value.ids.nbytes + value.scores.nbytes), isinstance(value.ids, np.memmap)
+    if isinstance(value, IVFIndex):
+        return int(sum(attr.nbytes for attr in vars(value).values() if isinstance(attr, np.ndarray))), False
+    # Fitted vectorizers and other plain objects: their pickled size
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)), False
 
 class MovieRecommender:
-    def __init__(self, use_precomputed=True):
+    def __init__(self, use_precomputed=True, mode='dense', artifacts_dir='artifacts', cache=None,
+                 similarity_dtype=None):
+        """
+        mode='dense' serves from the full similarity matrix (similarity.pkl),
+        mode='neighbors' serves from the top-K neighbor index (neighbors.npz),
+        mode='sparse' computes each similarity row on demand from the tag matrix (tag_matrix.npz).
+        When artifacts_dir/store holds a memory-mapped store it is used instead of the pickles.
+        vectorizer.pkl, movies_full and the optional indexes are loaded on first access.
+        cache (a src.cache.ResultCache) memoizes recommend() results per model version.
+        similarity_dtype='int8' or 'float16' serves dense mode from the quantized
+        matrix written into the store by python -m src.quantize.
+        """
+        if mode not in SIMILARITY_MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {SIMILARITY_MODES}")
+        if similarity_dtype is not None and similarity_dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unknown similarity_dtype '{similarity_dtype}', expected one of {QUANTIZED_DTYPES}")
+        
+        self.mode = mode
+        self.similarity_dtype = similarity_dtype
+        self.artifacts_dir = artifacts_dir
+        self.artifact_format = None
+        self.store = None
         self.new_df = None
         self.similarity = None
-        self.vectorizer = None
-        self.movies_full = None
+        self.neighbor_index = None
+        self.tag_matrix = None
+        self.ann_index = None
+        self.cooccurrence_index = None
+        self._vectorizer = _NOT_LOADED
+        self._movies_full = _NOT_LOADED
+        self.artifact_loads = {}
+        self.loaded_artifacts = {}
+        self.title_index = None
+        self.search_index = None
+        self._search_index_build = None
+        self._replaying_delta = False
+        self.ranker = None
+        self.attributes = None
+        self.explainer = None
+        self.removed = None
+        self.catalog_events = []
+        self.cache = cache
+        self.model_version = None
         
         if use_precomputed:
             self._load_precomputed_models()
@@ -17,81 +165,966 @@ class MovieRecommender:
     def _load_precomputed_models(self):
         """Load pre-computed models from the notebook pipeline"""
         try:
-            # Load the processed dataframe (movie_id, title, tags)
-            with open('artifacts/movie_list.pkl', 'rb') as f:
-                self.new_df = pickle.load(f)
+            # Artifacts read later (on first use) must still be these files, see _unchanged_since_load
+            self.loaded_artifacts = artifact_signatures(self.artifacts_dir)
             
-            # Load the similarity matrix
-            with open('artifacts/similarity.pkl', 'rb') as f:
-                self.similarity = pickle.load(f)
-                
-            # Load the vectorizer (optional)
-            if os.path.exists('artifacts/vectorizer.pkl'):
-                with open('artifacts/vectorizer.pkl', 'rb') as f:
-                    self.vectorizer = pickle.load(f)
-            
-            # Load the full movies dataframe (optional, for additional features)
-            if os.path.exists('artifacts/movies_full.pkl'):
-                with open('artifacts/movies_full.pkl', 'rb') as f:
-                    self.movies_full = pickle.load(f)
+            store_dir = os.path.join(self.artifacts_dir, STORE_DIR_NAME)
+            if ArtifactStore.exists(store_dir):
+                self._load_artifact_store(store_dir)
+            else:
+                self._load_pickled_models()
+            
+            # The vectorizer and movies_full are read again on first access
+            self._vectorizer = _NOT_LOADED
+            self._movies_full = _NOT_LOADED
+            
+            self._build_indexes()
+            self._apply_catalog_delta()
+            
+            # Cache keys include the version, so results of other artifacts are never
+            # served; entries shared with other workers on the same artifacts are kept
+            self.model_version = self._artifact_version()
+            self._start_search_index()
             
             print(f"✅ Loaded pre-computed models with {len(self.new_df)} movies")
             
         except FileNotFoundError as e:
+            self._unload_models()
             print(f"❌ Pre-computed models not found: {e}")
             print("💡 Please run the notebook first to generate the models")
         except Exception as e:
+            self._unload_models()
             print(f"❌ Error loading models: {e}")
     
-    def recommend(self, movie_title, num_recommendations=10):
+    def _unload_models(self):
+        """Drop a partly loaded model (e.g. base artifacts without their catalog delta), so it is never served"""
+        self.new_df = None
+        self.similarity = None
+        self.neighbor_index = None
+        self.tag_matrix = None
+        self.store = None
+        self.removed = None
+        self.catalog_events = []
+        self.title_index = None
+        self._search_index_build = None
+        self.model_version = None
+    
+    def _load_artifact(self, name, loader, *args):
+        """Call loader(*args), recording its wall time and the size of what it loaded under name"""
+        start = time.perf_counter()
+        value = loader(*args)
+        nbytes, mapped = _artifact_nbytes(value)
+        self.artifact_loads[name] = {
+            'load_seconds': round(time.perf_counter() - start, 4),
+            'bytes': nbytes,
+            'memory_mapped': mapped,
+        }
+        return value
+    
+    def _read_pickle(self, filename):
+        with open(os.path.join(self.artifacts_dir, filename), 'rb') as f:
+            return pickle.load(f)
+    
+    def _load_pickled_models(self):
+        """Load the movie list and similarity data from the notebook pickles"""
+        # Load the processed dataframe (movie_id, title, tags)
+        self.new_df = self._load_artifact('movie_list', self._read_pickle, 'movie_list.pkl')
+        self.store = None
+        
+        if self.mode == 'neighbors':
+            # Load the top-K neighbor index (N×K instead of N×N)
+            self.neighbor_index = self._load_artifact('neighbor_index', NeighborIndex.load,
+                                                      os.path.join(self.artifacts_dir, 'neighbors.npz'))
+        elif self.mode == 'sparse':
+            # Load the L2-normalized tag vectors; rows are scored per request
+            self.tag_matrix = self._load_artifact('tag_matrix', load_tag_matrix,
+                                                  os.path.join(self.artifacts_dir, TAG_MATRIX_NAME))
+        else:
+            # Load the similarity matrix
+            if self.similarity_dtype is not None:
+                print(f"⚠️ {self.similarity_dtype} similarity needs the artifact store, loading similarity.pkl")
+            self.similarity = self._load_artifact('similarity', self._read_pickle, 'similarity.pkl')
+        
+        self.artifact_format = 'pickle'
+    
+    def _load_artifact_store(self, store_dir):
+        """Memory-map the movie list and similarity data from the artifact store"""
+        store = ArtifactStore(store_dir)
+        self.store = store
+        self.new_df = self._load_artifact('movie_list', store.dataframe, SERVING_COLUMNS)
+        
+        if self.mode == 'neighbors':
+            self.neighbor_index = self._load_artifact(
+                'neighbor_index', lambda: NeighborIndex(store.array('neighbor_ids'), store.array('neighbor_scores')))
+        elif self.mode == 'sparse':
+            self.tag_matrix = self._load_artifact('tag_matrix', store.tag_matrix)
+        else:
+            self.similarity = self._load_similarity(store)
+        
+        self.artifact_format = 'mmap'
+    
+    def _load_similarity(self, store):
+        """The stored dense matrix, or its quantized version when similarity_dtype is set and it exists"""
+        if self.similarity_dtype is not None:
+            values_name, scale_name = quantized_array_names(self.similarity_dtype)
+            if store.has_array(values_name):
+                scales = store.array(scale_name) if store.has_array(scale_name) else None
+                return self._load_artifact('similarity', QuantizedSimilarity, store.array(values_name), scales)
+            print(f"⚠️ No {self.similarity_dtype} similarity in the store (python -m src.quantize), "
+                  f"serving the full matrix")
+        if not store.has_array('similarity'):
+            raise FileNotFoundError(f"{store.directory} has no dense similarity matrix; rebuild with "
+                                    f"python -m src.pipeline --dense or serve with mode='neighbors'")
+        return self._load_artifact('similarity', store.array, 'similarity')
+    
+    def _unchanged_since_load(self, name):
+        """
+        Whether an artifact file is still the one that was on disk when the model
+        loaded; artifacts read on first use are refused once a rebuild replaced them
+        """
+        if artifact_signatures(self.artifacts_dir, [name])[name] == self.loaded_artifacts.get(name):
+            return True
+        print(f"⚠️ {name} was rebuilt after the model loaded, reload the model to use it")
+        return False
+    
+    @property
+    def vectorizer(self):
+        """vectorizer.pkl, read on first access (None when it does not exist or was rebuilt since loading)"""
+        if self._vectorizer is _NOT_LOADED:
+            path = os.path.join(self.artifacts_dir, 'vectorizer.pkl')
+            self._vectorizer = (self._load_artifact('vectorizer', self._read_pickle, 'vectorizer.pkl')
+                                if os.path.exists(path) and self._unchanged_since_load('vectorizer.pkl') else None)
+        return self._vectorizer
+    
+    @vectorizer.setter
+    def vectorizer(self, value):
+        self._vectorizer = value
+    
+    @property
+    def movies_full(self):
+        """
+        Full movie metadata for years, ranking, filters and search popularity,
+        read on first access: the store's movies_full table (only the columns
+        used here), else movies_full.pkl, else None (also when it was rebuilt since loading)
+        """
+        if self._movies_full is _NOT_LOADED:
+            path = os.path.join(self.artifacts_dir, 'movies_full.pkl')
+            if self.store is not None and self.store.has_table('movies_full'):
+                self._movies_full = (self._load_artifact('movies_full', self.store.dataframe, MOVIES_FULL_COLUMNS,
+                                                         'movies_full')
+                                     if self._unchanged_since_load(STORE_MANIFEST) else None)
+            elif os.path.exists(path) and self._unchanged_since_load('movies_full.pkl'):
+                self._movies_full = self._load_artifact('movies_full', self._read_pickle, 'movies_full.pkl')
+            else:
+                self._movies_full = None
+        return self._movies_full
+    
+    @movies_full.setter
+    def movies_full(self, value):
+        self._movies_full = value
+    
+    def _artifact_version(self):
+        """Identify the artifacts by file size and mtime when the model loaded, plus catalog changes made since"""
+        files = [f"{name}:{signature}" for name, signature in self.loaded_artifacts.items() if signature is not None]
+        parts = [self.mode, self.similarity_dtype, *files, str(len(self.catalog_events))]
+        return ResultCache.make_key(*parts)
+    
+    def _build_indexes(self):
+        """Build the lookup indexes once the movie list is loaded"""
+        titles = self.new_df['title'].tolist()
+        movie_ids = self.new_df['movie_id'].to_numpy() if 'movie_id' in self.new_df.columns else None
+        active = ~self.removed if self.removed is not None else None
+        # Years (from movies_full) are only needed to tell duplicate titles apart
+        self.title_index = TitleIndex(titles, movie_ids, self._movie_years, active)
+        
+        # The search index is built in the background (_start_search_index) and the
+        # others on first use; a build still running for the old catalog is dropped
+        self.search_index = None
+        self._search_index_build = None
+        self.attributes = None
+        self.ranker = None
+        self.explainer = None
+    
+    def _movies_full_column(self, values, numeric=True):
+        """
+        Align a movies_full column with the rows of new_df by movie id
+        Returns a float array with NaN where the value is unknown (an object array
+        when numeric=False), or None if it cannot be aligned
+        """
+        full = self.movies_full
+        if full is None or 'movie_id' not in self.new_df.columns:
+            return None
+        
+        id_column = 'movie_id' if 'movie_id' in full.columns else 'id' if 'id' in full.columns else None
+        if id_column is None:
+            return None
+        
+        if numeric:
+            values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+        by_id = pd.Series(np.asarray(values), index=full[id_column].to_numpy())
+        by_id = by_id[~by_id.index.duplicated()]
+        return by_id.reindex(self.new_df['movie_id'].to_numpy()).to_numpy()
+    
+    def _movie_years(self):
+        """Release year per row (-1 when unknown), used to tell duplicate titles apart"""
+        years = np.array([title_year(t) or -1 for t in self.new_df['title']], dtype=np.int32)
+        
+        full = self.movies_full
+        if full is None:
+            return years
+        if 'year' in full.columns:
+            known = self._movies_full_column(full['year'])
+        elif 'release_date' in full.columns:
+            known = self._movies_full_column(pd.to_datetime(full['release_date'], errors='coerce').dt.year)
+        else:
+            return years
+        
+        if known is None:
+            return years
+        return np.where(np.isnan(known), years, np.nan_to_num(known)).astype(np.int32)
+    
+    def _movie_popularity(self):
+        """Popularity per row from movies_full (popularity, else vote_count), or None"""
+        full = self.movies_full
+        if full is None:
+            return None
+        for column in ('popularity', 'vote_count'):
+            if column in full.columns:
+                return self._movies_full_column(full[column])
+        return None
+    
+    def _movie_vote_average(self):
+        """vote_average per row from movies_full, or None"""
+        full = self.movies_full
+        if full is None or 'vote_average' not in full.columns:
+            return None
+        return self._movies_full_column(full['vote_average'])
+    
+    def _movie_genres(self):
+        """Genre lists (or MovieLens 'A|B' strings) per row from movies_full, or None"""
+        full = self.movies_full
+        if full is None or 'genres' not in full.columns:
+            return None
+        return self._movies_full_column(full['genres'], numeric=False)
+    
+    def _movie_languages(self):
+        """original_language per row from movies_full, or None"""
+        full = self.movies_full
+        if full is None or 'original_language' not in full.columns:
+            return None
+        return self._movies_full_column(full['original_language'], numeric=False)
+    
+    def _movie_tags(self):
+        """Tag strings per row: new_df['tags'], else read on demand from the artifact store, or None"""
+        if 'tags' in self.new_df.columns:
+            return self.new_df['tags']
+        if (self.store is not None and 'tags' in self.store.column_names()
+                and self.store.num_movies == len(self.new_df) and self._unchanged_since_load(STORE_MANIFEST)):
+            return pd.Series(self.store.column('tags'))
+        return None
+    
+    def _search_titles(self):
+        """Titles to search; removed movies get an empty key, which no query matches"""
+        titles = self.new_df['title'].tolist()
+        if self.removed is not None:
+            titles = [title if not removed else '' for title, removed in zip(titles, self.removed)]
+        return titles
+    
+    def _start_search_index(self):
+        """
+        Build the title search index (ranked by popularity) in a background thread
+        once the catalog is loaded or changed, so the first search does not wait
+        seconds for it on a large catalog
+        """
+        build = {'done': threading.Event()}
+        titles = self._search_titles()
+        
+        def run():
+            try:
+                build['index'] = TrigramSearchIndex(titles, self._movie_popularity())
+            except Exception as e:
+                print(f"⚠️ Background title search index failed, building it on first search: {e}")
+            finally:
+                build['done'].set()
+        
+        self._search_index_build = build
+        threading.Thread(target=run, name='title-search-index', daemon=True).start()
+    
+    def _ensure_search_index(self):
+        """The title search index: the background build's (waiting for it if needed), else built now"""
+        if self.search_index is None:
+            build = self._search_index_build
+            if build is not None:
+                build['done'].wait()
+                self.search_index = build.get('index')
+                self._search_index_build = None
+            if self.search_index is None:
+                self.search_index = TrigramSearchIndex(self._search_titles(), self._movie_popularity())
+        return self.search_index
+    
+    def _ensure_attributes(self):
+        """Build the attribute bitmaps for filters on first use"""
+        if self.attributes is None:
+            self.attributes = AttributeIndex(self._movie_genres(), self._movie_languages(), self._movie_years(),
+                                             self._movie_vote_average(), len(self.new_df))
+        return self.attributes
+    
+    def _ensure_ranker(self):
+        """Build the hybrid ranker's feature columns on first use (rebuilt after catalog changes)"""
+        if self.ranker is None:
+            self.ranker = HybridRanker(self._movie_popularity(), self._movie_vote_average(),
+                                       self._movie_years(), len(self.new_df))
+        return self.ranker
+    
+    def _find_movie(self, movie_title, movie_id=None, year=None):
+        """Return the row of a movie, or None when it is not in the database"""
+        if self.title_index is None:
+            self._build_indexes()
+        return self.title_index.lookup(movie_title, movie_id=movie_id, year=year)
+    
+    def _load_ann_index(self):
+        """Load the approximate index (and the tag vectors it re-ranks with) on first use"""
+        if self.ann_index is not None:
+            return True
+        
+        ann_path = os.path.join(self.artifacts_dir, ANN_INDEX_NAME)
+        if not os.path.exists(ann_path):
+            print(f"⚠️ {ann_path} not found, run python -m src.ann to build it")
+            return False
+        
+        if not self._unchanged_since_load(ANN_INDEX_NAME) or not self._ensure_tag_matrix():
+            return False
+        
+        self.ann_index = self._load_artifact('ann_index', IVFIndex.load, ann_path)
+        
+        # Movies added since the index was built (add_movies or a replayed catalog delta)
+        indexed = len(self.ann_index.list_rows)
+        if indexed < self.tag_matrix.shape[0]:
+            self.ann_index.add(self.tag_matrix[indexed:], indexed)
+        return True
+    
+    def _load_cooccurrence_index(self):
+        """Load the ratings co-occurrence index on first use"""
+        if self.cooccurrence_index is not None:
+            return True
+        
+        path = os.path.join(self.artifacts_dir, COOCCURRENCE_INDEX_NAME)
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found, run python -m src.cooccurrence to build it")
+            return False
+        if not self._unchanged_since_load(COOCCURRENCE_INDEX_NAME):
+            return False
+        
+        index = self._load_artifact('cooccurrence_index', NeighborIndex.load, path)
+        if index.num_movies > len(self.new_df):
+            print(f"❌ Co-occurrence index has {index.num_movies} rows but the catalog has {len(self.new_df)} movies")
+            return False
+        
+        self.cooccurrence_index = index
+        return True
+    
+    def _ensure_tag_matrix(self):
+        """
+        Make the tag vectors of the loaded build available: the loaded artifact store,
+        tag_matrix.npz, or vectorize new_df['tags']
+        """
+        if self.tag_matrix is not None:
+            return True
+        
+        tag_matrix_path = os.path.join(self.artifacts_dir, TAG_MATRIX_NAME)
+        if self.store is not None and self.store.has_array('tag_data'):
+            if not self._unchanged_since_load(STORE_MANIFEST):
+                return False
+            self.tag_matrix = self._load_artifact('tag_matrix', self.store.tag_matrix)
+        elif os.path.exists(tag_matrix_path):
+            if not self._unchanged_since_load(TAG_MATRIX_NAME):
+                return False
+            self.tag_matrix = self._load_artifact('tag_matrix', load_tag_matrix, tag_matrix_path)
+        elif self.vectorizer is not None and self._movie_tags() is not None:
+            self.tag_matrix, _ = build_tag_matrix(self._movie_tags(), self.vectorizer)
+        else:
+            print("❌ Tag vectors not available: need tag_matrix.npz or vectorizer.pkl plus tags")
+            return False
+        
+        if self.tag_matrix.shape[0] != len(self.new_df):
+            print(f"❌ Tag matrix has {self.tag_matrix.shape[0]} rows but the catalog has {len(self.new_df)} movies")
+            self.tag_matrix = None
+            return False
+        return True
+    
+    def add_movies(self, movies, persist=True):
+        """
+        Add new movies without rebuilding the artifacts
+        
+        movies needs movie_id and title, plus either preprocessed tags or the raw
+        overview/genres/keywords/cast/crew columns. Only the new rows are vectorized
+        (with the existing vocabulary) and only neighbor lists they enter are updated.
+        Movies whose movie_id is already in the catalog are replaced.
+        Returns the number of movies added.
+        """
+        if not self._models_loaded():
+            print("❌ Models not loaded. Please run the notebook first.")
+            return 0
+        if self.vectorizer is None:
+            print("❌ vectorizer.pkl is required to vectorize new movies")
+            return 0
+        
+        try:
+            movies = movies.reset_index(drop=True).copy()
+            if 'tags' not in movies.columns:
+                movies['tags'] = build_tags(movies)
+            
+            replaced = [movie_id for movie_id in movies['movie_id']
+                        if self.title_index.row_for_movie_id(movie_id) is not None]
+            if replaced:
+                self.remove_movies(replaced, persist=False)
+            
+            if not self._ensure_tag_matrix():
+                return 0
+            
+            vectors, _ = build_tag_matrix(movies['tags'], self.vectorizer)
+            first_row = len(self.new_df)
+            new_rows = np.arange(first_row, first_row + len(movies))
+            
+            self.tag_matrix = sp.vstack([self.tag_matrix, vectors], format='csr')
+            self.new_df = pd.concat([self.new_df, movies.reindex(columns=self.new_df.columns)], ignore_index=True)
+            self.removed = np.concatenate([self._removed_mask()[:first_row], np.zeros(len(movies), dtype=bool)])
+            
+            # Scores of the new movies against the whole grown catalog
+            scores = similarity_rows(self.tag_matrix, new_rows)
+            
+            if self.mode == 'dense':
+                self._grow_similarity(scores)
+            elif self.mode == 'neighbors':
+                scores[:, self.removed] = -np.inf
+                self.neighbor_index.merge(new_rows, scores[:, :first_row].T)
+                self.neighbor_index.append(scores, first_row)
+            
+            if self.ann_index is not None:
+                self.ann_index.add(vectors, first_row)
+            
+            self._build_indexes()
+            if not self._replaying_delta:
+                self._start_search_index()
+            self.catalog_events.append(('add', movies[['movie_id', 'title', 'tags']]))
+            self.model_version = self._artifact_version()
+            if persist:
+                self.save_catalog_delta()
+            
+            print(f"✅ Added {len(movies)} movies ({len(self.new_df)} in catalog)")
+            return len(movies)
+            
+        except Exception as e:
+            print(f"❌ Error adding movies: {e}")
+            return 0
+    
+    def remove_movies(self, movie_ids, persist=True):
+        """
+        Remove movies by TMDB movie_id without rebuilding the artifacts
+        Rows are kept as tombstones and excluded from lookups and recommendations.
+        Returns the number of movies removed.
+        """
+        if not self._models_loaded():
+            print("❌ Models not loaded. Please run the notebook first.")
+            return 0
+        
+        rows = [self.title_index.row_for_movie_id(movie_id) for movie_id in movie_ids]
+        rows = np.array([row for row in rows if row is not None], dtype=np.int64)
+        if len(rows) == 0:
+            return 0
+        
+        self.removed = self._removed_mask()
+        self.removed[rows] = True
+        
+        # Refill neighbor lists that pointed at removed movies, when tag vectors allow it
+        if self.mode == 'neighbors' and self._ensure_tag_matrix():
+            affected = np.flatnonzero(self.removed[self.neighbor_index.ids[:, 1:]].any(axis=1) & ~self.removed)
+            if len(affected):
+                scores = similarity_rows(self.tag_matrix, affected)
+                scores[:, self.removed] = -np.inf
+                self.neighbor_index.replace_rows(affected, scores)
+        
+        self._build_indexes()
+        if not self._replaying_delta:
+            self._start_search_index()
+        self.catalog_events.append(('remove', [int(movie_id) for movie_id in movie_ids]))
+        self.model_version = self._artifact_version()
+        if persist:
+            self.save_catalog_delta()
+        
+        print(f"🗑️ Removed {len(rows)} movies")
+        return len(rows)
+    
+    def save_catalog_delta(self):
+        """
+        Persist the add/remove events applied since the artifacts were built,
+        through a temporary file, so a crash never leaves a truncated delta
+        """
+        delta_path = os.path.join(self.artifacts_dir, CATALOG_DELTA_NAME)
+        with open(delta_path + '.tmp', 'wb') as f:
+            pickle.dump(self.catalog_events, f)
+        os.replace(delta_path + '.tmp', delta_path)
+    
+    def _apply_catalog_delta(self):
+        """
+        Replay a persisted catalog delta on top of freshly loaded artifacts;
+        an unreadable delta fails the load instead of serving the base catalog
+        """
+        delta_path = os.path.join(self.artifacts_dir, CATALOG_DELTA_NAME)
+        if not os.path.exists(delta_path):
+            return
+        
+        with open(delta_path, 'rb') as f:
+            events = pickle.load(f)
+        
+        # The search index is built once, after the whole delta is applied
+        self._replaying_delta = True
+        try:
+            for action, payload in events:
+                if action == 'add':
+                    self.add_movies(payload, persist=False)
+                else:
+                    self.remove_movies(payload, persist=False)
+        finally:
+            self._replaying_delta = False
+        print(f"🔁 Applied {len(events)} catalog changes from {delta_path}")
+    
+    def _removed_mask(self):
+        """Boolean mask of removed rows (a fresh all-False mask when nothing was removed)"""
+        if self.removed is None:
+            return np.zeros(len(self.new_df), dtype=bool)
+        return self.removed.copy()
+    
+    def _grow_similarity(self, new_rows):
+        """Extend the dense matrix with the rows/columns of appended movies"""
+        if isinstance(self.similarity, QuantizedSimilarity):
+            self.similarity = self.similarity.grow(new_rows)
+            return
+        
+        n_old = self.similarity.shape[0]
+        n_new = new_rows.shape[1]
+        grown = np.empty((n_new, n_new), dtype=self.similarity.dtype)
+        grown[:n_old, :n_old] = self.similarity
+        grown[n_old:, :] = new_rows
+        grown[:n_old, n_old:] = new_rows[:, :n_old].T
+        self.similarity = grown
+    
+    def recommend(self, movie_title, num_recommendations=10, movie_id=None, year=None, approximate=False,
+                  backend='content', hybrid=False, rank_weights=None, filters=None, diversity=None,
+                  diversity_budget_ms=2.0):
         """
         Get movie recommendations using the pre-computed similarity matrix
-        This is the same logic from the notebook
+        This is the same logic from the notebook.
+        movie_id (TMDB id) or year pick the right movie when several share a title.
+        approximate=True searches the IVF index instead of scoring the whole catalog.
+        backend='cooccurrence' ranks by ratings co-occurrence ("people who liked this also liked").
+        hybrid=True re-ranks the best similarity candidates by a blend with popularity,
+        vote average and recency (rank_weights overrides src.ranking.DEFAULT_WEIGHTS).
+        filters (see src.filters.FILTER_KEYS), e.g. {'min_year': 2010, 'min_rating': 7,
+        'exclude_genres': ['Horror']}, are applied before top-k selection.
+        diversity (0-1) re-ranks the candidates with maximal marginal relevance so near-duplicates
+        (e.g. a whole franchise) do not fill the list; diversity_budget_ms caps the time it may take.
         """
-        if self.new_df is None or self.similarity is None:
+        if self.cache is None:
+            return self._recommend(movie_title, num_recommendations, movie_id, year, approximate, backend,
+                                   hybrid, rank_weights, filters, diversity, diversity_budget_ms)
+        
+        key = ResultCache.make_key('recommend', self.model_version, normalize_title(movie_title), movie_id, year,
+                                   num_recommendations, approximate, backend, hybrid, rank_weights, filters,
+                                   diversity, diversity_budget_ms)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._recommend(movie_title, num_recommendations, movie_id, year, approximate, backend,
+                                     hybrid, rank_weights, filters, diversity, diversity_budget_ms)
+            if not result.empty:
+                self.cache.put(key, result)
+        return result.copy()
+    
+    def _recommend(self, movie_title, num_recommendations, movie_id, year, approximate, backend,
+                   hybrid, rank_weights, filters, diversity, diversity_budget_ms):
+        """Uncached recommend()"""
+        if backend not in RECOMMENDATION_BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {RECOMMENDATION_BACKENDS}")
+        if hybrid:
+            rank_weights = HybridRanker.resolve_weights(rank_weights)
+        
+        if not self._models_loaded():
             print("❌ Models not loaded. Please run the notebook first.")
             return pd.DataFrame()
         
         try:
-            # Find the movie index (case-insensitive search)
-            movie_matches = self.new_df[self.new_df['title'].str.lower() == movie_title.lower()]
+            index = self._find_movie(movie_title, movie_id, year)
             
-            if movie_matches.empty:
+            if index is None:
                 print(f"❌ Movie '{movie_title}' not found in database")
                 available_movies = self.new_df['title'].head(10).tolist()
                 print(f"💡 Try one of these: {', '.join(available_movies)}")
                 return pd.DataFrame()
             
-            index = movie_matches.index[0]
-            
-            # Calculate similarity scores using the pre-computed matrix
-            distances = sorted(list(enumerate(self.similarity[index])), reverse=True, key=lambda x: x[1])
+            reranked = hybrid or bool(diversity)
+            k = self._candidate_pool_size(num_recommendations, backend) if reranked else num_recommendations
+            allowed = self._allowed_mask(filters) if filters else None
             
-            # Get recommendations (excluding the input movie itself)
-            recommendations = []
-            for i in distances[1:num_recommendations+1]:
-                movie_info = {
-                    'title': self.new_df.iloc[i[0]].title,
-                    'similarity_score': round(i[1], 3)
-                }
-                recommendations.append(movie_info)
+            if backend == 'cooccurrence':
+                if not self._load_cooccurrence_index():
+                    return pd.DataFrame()
+                neighbors, scores = self._cooccurrence_neighbors(index, k, allowed)
+            elif approximate and self._load_ann_index():
+                excluded = ~allowed if allowed is not None else self.removed
+                neighbors, scores = self.ann_index.search(self.tag_matrix, index, k, excluded=excluded)
+            elif allowed is not None:
+                neighbors, scores = self._filtered_neighbors(index, k, allowed)
+            else:
+                neighbors, scores = self._top_neighbors(index, k)
             
-            # Convert to DataFrame
-            result_df = pd.DataFrame(recommendations)
-            return result_df
+            if diversity:
+                neighbors, scores = self._diversify(neighbors, scores, num_recommendations, diversity,
+                                                    diversity_budget_ms, rank_weights if hybrid else None)
+            elif hybrid:
+                neighbors, scores = self._ensure_ranker().rerank(neighbors, scores, num_recommendations, rank_weights)
+            return self._format_recommendations(neighbors, scores)
             
         except Exception as e:
             print(f"❌ Error in recommendation: {e}")
             return pd.DataFrame()
     
-    def get_movie_info(self, movie_title):
+    def _diversify(self, neighbors, scores, k, diversity, budget_ms, rank_weights=None):
+        """
+        MMR re-ranking of a candidate pool; relevance is the similarity score,
+        or the hybrid blend when rank_weights are given
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        valid = np.isfinite(scores)
+        neighbors, scores = np.asarray(neighbors)[valid], scores[valid]
+        
+        pairwise = self._pairwise_similarity(neighbors)
+        relevance = scores if rank_weights is None else self._ensure_ranker().blend(neighbors, scores, rank_weights)
+        if pairwise is None:
+            print("⚠️ Pairwise similarity needs similarity.pkl or tag vectors, skipping diversity re-ranking")
+            order = top_k_indices(relevance, k)
+        else:
+            order = mmr_order(relevance, pairwise, k, diversity, budget_ms)
+        return neighbors[order], scores[order]
+    
+    def _pairwise_similarity(self, rows):
+        """Similarity among a few hundred candidate rows, or None without a source for it"""
+        if self.mode == 'dense':
+            return np.asarray(self.similarity[np.ix_(rows, rows)], dtype=np.float64)
+        if self._ensure_tag_matrix():
+            vectors = self.tag_matrix[rows]
+            return (vectors @ vectors.T).toarray().astype(np.float64)
+        return None
+    
+    def _candidate_pool_size(self, k, backend):
+        """Number of similarity candidates to re-rank, capped by what stored neighbor lists hold"""
+        pool = max(RERANK_POOL_SIZE, k)
+        if backend == 'cooccurrence' and self._load_cooccurrence_index():
+            return min(pool, self.cooccurrence_index.k - 1)
+        if self.mode == 'neighbors':
+            return min(pool, max(self.neighbor_index.k - 1, k))
+        return pool
+    
+    def recommend_many(self, movie_titles, num_recommendations=10):
+        """
+        Get recommendations for several movies at once
+        All similarity rows are gathered and ranked in a single matrix operation
+        """
+        if not self._models_loaded():
+            print("❌ Models not loaded. Please run the notebook first.")
+            return {}
+        
+        results = {title: pd.DataFrame() for title in movie_titles}
+        
+        try:
+            found_titles = []
+            indices = []
+            for title in movie_titles:
+                index = self._find_movie(title)
+                if index is None:
+                    print(f"❌ Movie '{title}' not found in database")
+                    continue
+                found_titles.append(title)
+                indices.append(index)
+            
+            if not indices:
+                return results
+            
+            neighbors, scores = self._top_neighbors_batch(indices, num_recommendations)
+            
+            for title, row_neighbors, row_scores in zip(found_titles, neighbors, scores):
+                results[title] = self._format_recommendations(row_neighbors, row_scores)
+            
+            return results
+            
+        except Exception as e:
+            print(f"❌ Error in batch recommendation: {e}")
+            return results
+    
+    def recommend_for_profile(self, seeds, num_recommendations=10, exclude=None):
+        """
+        Get recommendations for a set of seed movies ("because you watched X, Y and Z")
+        seeds is a list of titles or a dict of title -> weight (e.g. a rating or recency weight).
+        The weighted similarity rows are combined in one reduction; seeds and any titles
+        in exclude (e.g. the rest of the watch history) are never recommended.
+        """
+        if not self._models_loaded():
+            print("❌ Models not loaded. Please run the notebook first.")
+            return pd.DataFrame()
+        
+        try:
+            if not isinstance(seeds, dict):
+                seeds = {title: 1.0 for title in seeds}
+        
+            rows, weights = [], []
+            for title, weight in seeds.items():
+                index = self._find_movie(title)
+                if index is None:
+                    print(f"❌ Movie '{title}' not found in database")
+                    continue
+                rows.append(index)
+                weights.append(float(weight))
+        
+            if not rows or not np.any(weights):
+                return pd.DataFrame()
+        
+            seen = rows + [index for index in (self._find_movie(title) for title in exclude or [])
+                           if index is not None]
+        
+            scores = self._profile_scores(np.array(rows), np.array(weights))
+            scores[seen] = -np.inf
+            if self.removed is not None:
+                scores[self.removed] = -np.inf
+        
+            neighbors = top_k_indices(scores, num_recommendations)
+            return self._format_recommendations(neighbors, scores[neighbors])
+        
+        except Exception as e:
+            print(f"❌ Error in profile recommendation: {e}")
+            return pd.DataFrame()
+    
+    def _profile_scores(self, rows, weights):
+        """Weighted mean of the similarity rows of several movies, as one score per catalog row"""
+        weights = weights / np.abs(weights).sum()
+        
+        if self.mode == 'neighbors':
+            # Scatter-add the stored neighbor lists; movies outside every list stay unranked
+            ids, scores = self.neighbor_index.neighbors_batch(rows, self.neighbor_index.k)
+            n = len(self.new_df)
+            total = np.bincount(ids.ravel(), weights=(weights[:, None] * scores).ravel(), minlength=n)
+            total[np.bincount(ids.ravel(), minlength=n) == 0] = -np.inf
+            return total
+        
+        if self.mode == 'sparse':
+            # Fold the weights into one query vector, then a single sparse mat-vec
+            query = np.asarray(self.tag_matrix[rows].T @ weights).ravel()
+            return np.asarray(self.tag_matrix @ query, dtype=np.float64).ravel()
+        
+        return weights @ np.asarray(self.similarity[rows], dtype=np.float64)
+    
+    def check_models(self):
+        """
+        Problems that make the loaded artifacts unfit to serve, e.g. before a
+        reloaded model replaces the running one (an empty list when they are fine)
+        """
+        if self.new_df is None:
+            return ['movie list not loaded']
+        
+        n = len(self.new_df)
+        problems = []
+        if self.mode == 'dense' and (self.similarity is None or self.similarity.shape != (n, n)):
+            shape = self.similarity.shape if self.similarity is not None else None
+            problems.append(f"similarity matrix has shape {shape}, expected {(n, n)}")
+        elif self.mode == 'neighbors' and (self.neighbor_index is None or self.neighbor_index.num_movies != n):
+            rows = self.neighbor_index.num_movies if self.neighbor_index is not None else None
+            problems.append(f"neighbor index has {rows} rows, expected {n}")
+        elif self.mode == 'sparse' and (self.tag_matrix is None or self.tag_matrix.shape[0] != n):
+            rows = self.tag_matrix.shape[0] if self.tag_matrix is not None else None
+            problems.append(f"tag matrix has {rows} rows, expected {n}")
+        if problems:
+            return problems
+        
+        # Smoke test: the first servable movie must get recommendations
+        active = np.flatnonzero(~self._removed_mask())
+        if len(active) > 1:
+            title = self.new_df['title'].iloc[active[0]]
+            result = self._recommend(title, 1, movie_id=None, year=None, approximate=False, backend='content',
+                                     hybrid=False, rank_weights=None, filters=None, diversity=None,
+                                     diversity_budget_ms=2.0)
+            if result.empty:
+                problems.append(f"no recommendations for '{title}'")
+        return problems
+    
+    def _models_loaded(self):
+        """Check that the movie list and a similarity source are available"""
+        if self.new_df is None:
+            return False
+        if self.mode == 'neighbors':
+            return self.neighbor_index is not None
+        if self.mode == 'sparse':
+            return self.tag_matrix is not None
+        return self.similarity is not None
+    
+    def _top_neighbors(self, index, k):
+        """Return the k best neighbor rows and scores of a movie, excluding the movie itself"""
+        if self.mode == 'neighbors':
+            neighbors, scores = self._top_neighbors_batch([index], k)
+            return neighbors[0], scores[0]
+        
+        if self.mode == 'sparse':
+            # One sparse mat-vec; the movie itself is excluded explicitly since
+            # float32 rounding can let an identical movie outscore it
+            row = similarity_rows(self.tag_matrix, [index])[0]
+            row[index] = -np.inf
+            if self.removed is not None:
+                row[self.removed] = -np.inf
+            neighbors = top_k_indices(row, k)
+            return neighbors, row[neighbors]
+        
+        # Top-k selection on the dense similarity row; the movie itself is excluded
+        # explicitly, since rows grown by add_movies may score a clone above it
+        row = np.array(self.similarity[index])
+        row[index] = -np.inf
+        if self.removed is not None:
+            row[self.removed] = -np.inf
+        neighbors = top_k_indices(row, k)
+        return neighbors, row[neighbors]
+    
+    def _top_neighbors_batch(self, indices, k):
+        """Row-wise version of _top_neighbors for several movies"""
+        if self.mode == 'neighbors':
+            self._check_neighbor_depth(k)
+            depth = k + 1 if self.removed is None else self.neighbor_index.k
+            neighbors, scores = self.neighbor_index.neighbors_batch(indices, depth)
+            
+            # Move the movie itself (normally, but not always, at position 0) and removed
+            # movies to the end of each list, keeping the order of the rest
+            excluded = neighbors == np.asarray(indices)[:, None]
+            if self.removed is not None:
+                excluded |= self.removed[neighbors]
+            order = np.argsort(excluded, axis=1, kind='stable')[:, :k]
+            neighbors = np.take_along_axis(neighbors, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+            return neighbors, np.where(np.take_along_axis(excluded, order, axis=1), -np.inf, scores)
+        
+        if self.mode == 'sparse':
+            rows = similarity_rows(self.tag_matrix, indices)
+            rows[np.arange(len(indices)), indices] = -np.inf
+            if self.removed is not None:
+                rows[:, self.removed] = -np.inf
+            neighbors = top_k_indices_batch(rows, k)
+            return neighbors, np.take_along_axis(rows, neighbors, axis=1)
+        
+        rows = np.array(self.similarity[indices])
+        rows[np.arange(len(indices)), indices] = -np.inf
+        if self.removed is not None:
+            rows[:, self.removed] = -np.inf
+        neighbors = top_k_indices_batch(rows, k)
+        return neighbors, np.take_along_axis(rows, neighbors, axis=1)
+    
+    def _cooccurrence_neighbors(self, index, k, allowed=None):
+        """
+        Co-rated neighbors of a movie, skipping itself, removed movies and movies
+        outside the allowed mask (none for movies added later)
+        """
+        if index >= self.cooccurrence_index.num_movies:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        
+        neighbors, scores = self.cooccurrence_index.neighbors(index, self.cooccurrence_index.k)
+        neighbors, scores = neighbors[1:], scores[1:]
+        if allowed is None and self.removed is not None:
+            allowed = ~self.removed
+        if allowed is not None:
+            keep = allowed[neighbors]
+            neighbors, scores = neighbors[keep], scores[keep]
+        return neighbors[:k], scores[:k]
+    
+    def _allowed_mask(self, filters):
+        """Movies passing the attribute filters and not removed"""
+        allowed = self._ensure_attributes().mask(filters)
+        if self.removed is not None:
+            allowed = allowed & ~self.removed
+        return allowed
+    
+    def _filtered_neighbors(self, index, k, allowed):
+        """
+        Top-k neighbors among allowed movies only
+        The mask is applied to the full similarity row before selection, so k results come back
+        whenever k movies pass; neighbors mode scores the row from the tag vectors when available
+        and otherwise filters its stored list.
+        """
+        if self.mode == 'dense':
+            row = np.array(self.similarity[index], dtype=np.float64)
+        elif self.mode == 'sparse' or self._ensure_tag_matrix():
+            row = similarity_rows(self.tag_matrix, [index])[0].astype(np.float64)
+        else:
+            neighbors, scores = self.neighbor_index.neighbors(index, self.neighbor_index.k)
+            keep = allowed[neighbors] & (neighbors != index)
+            return neighbors[keep][:k], scores[keep][:k]
+        
+        row[~allowed] = -np.inf
+        row[index] = -np.inf
+        neighbors = top_k_indices(row, k)
+        return neighbors, row[neighbors]
+    
+    def _check_neighbor_depth(self, k):
+        """Warn when a request asks for more neighbors than the index stores"""
+        if k + 1 > self.neighbor_index.k:
+            print(f"⚠️ Neighbor index stores {self.neighbor_index.k - 1} recommendations per movie, "
+                  f"returning at most that many instead of {k}")
+    
+    def _format_recommendations(self, neighbors, scores):
+        """Build the recommendation DataFrame from neighbor rows and their scores"""
+        scores = np.asarray(scores, dtype=np.float64)
+        
+        # Excluded movies carry -inf scores; they only show up when fewer candidates remain
+        valid = np.isfinite(scores)
+        neighbors, scores = np.asarray(neighbors)[valid], scores[valid]
+        
+        titles = self.new_df['title'].to_numpy()[neighbors]
+        result = pd.DataFrame({
+            'title': titles,
+            'similarity_score': np.round(scores, 3)
+        })
+        
+        # Ids tell apart movies sharing a title (remakes) when results are looked up again
+        if 'movie_id' in self.new_df.columns:
+            result['movie_id'] = self.new_df['movie_id'].to_numpy()[neighbors]
+        return result
+    
+    def explain_recommendations(self, movie_title, recommended_ids, top_n=5, movie_id=None, year=None):
+        """
+        Tag features each recommended movie shares with the seed movie
+        recommended_ids are the movie_id values of a recommend() result, so movies
+        sharing a title are not mixed up; movie_id / year pick the seed as in recommend().
+        Returns {movie_id: [(feature, contribution to the similarity score), ...]},
+        or {} when the tag vectors or vectorizer.pkl are not available
+        """
+        if self.new_df is None:
+            return {}
+        
+        index = self._find_movie(movie_title, movie_id, year)
+        if index is None or self.vectorizer is None or not self._ensure_tag_matrix():
+            return {}
+        
+        if self.explainer is None:
+            self.explainer = TagExplainer(self.tag_matrix, self.vectorizer.get_feature_names_out())
+        
+        found = [(recommended, self.title_index.row_for_movie_id(recommended)) for recommended in recommended_ids]
+        found = [(recommended, row) for recommended, row in found if row is not None]
+        if not found:
+            return {}
+        
+        features = self.explainer.shared_features(index, [row for _, row in found], top_n)
+        return {recommended: shared for (recommended, _), shared in zip(found, features)}
+    
+    def get_movie_info(self, movie_title, movie_id=None, year=None):
         """Get detailed information about a specific movie"""
         if self.new_df is None:
             return None
         
-        movie_matches = self.new_df[self.new_df['title'].str.lower() == movie_title.lower()]
-        if not movie_matches.empty:
-            return movie_matches.iloc[0].to_dict()
+        index = self._find_movie(movie_title, movie_id, year)
+        if index is not None:
+            return self.new_df.iloc[index].to_dict()
         return None
     
     def get_all_movies(self):
@@ -100,14 +1133,19 @@ class MovieRecommender:
             return self.new_df['title'].tolist()
         return []
     
-    def search_movies(self, query):
-        """Search movies by title (partial matching)"""
+    def search_movies(self, query, limit=10):
+        """
+        Search movies by title (partial matching)
+        Ranked exact > prefix > substring, then by popularity
+        """
         if self.new_df is None:
             return pd.DataFrame()
         
-        # Case-insensitive partial matching
-        matches = self.new_df[self.new_df['title'].str.lower().str.contains(query.lower(), na=False)]
-        return matches[['title']].head(10)
+        if self.title_index is None:
+            self._build_indexes()
+        
+        rows = self._ensure_search_index().search(query, limit)
+        return self.new_df.iloc[rows][['title']]
     
     def get_stats(self):
         """Get statistics about the movie database"""
@@ -116,6 +1154,15 @@ class MovieRecommender:
         
         return {
             'total_movies': len(self.new_df),
+            'mode': self.mode,
+            'artifact_format': self.artifact_format,
             'similarity_matrix_shape': self.similarity.shape if self.similarity is not None else None,
+            'neighbor_index_shape': self.neighbor_index.ids.shape if self.neighbor_index is not None else None,
+            'tag_matrix_shape': self.tag_matrix.shape if self.tag_matrix is not None else None,
+            'ann_lists': self.ann_index.nlist if self.ann_index is not None else None,
+            'cooccurrence_index_shape': self.cooccurrence_index.ids.shape if self.cooccurrence_index is not None else None,
+            'model_version': self.model_version,
+            'artifacts': self.artifact_loads,
+            'cache': self.cache.stats() if self.cache is not None else None,
             'sample_movies': self.new_df['title'].head(5).tolist()
         }
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Hot reload of model artifacts
+Loads a new model in a background thread, checks it, and only then hands it
+to a swap callback, so requests keep being served by the old model meanwhile
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ModelReloader:
+    """
+    Background loader for a served model.
+
+    load() builds a complete new model, check(model) returns the problems that
+    make it unfit to serve (an empty list when it is fine), and swap(model)
+    publishes it, typically by rebinding a global. Requests that already hold
+    the old model finish with it; it is freed once the last one lets go.
+    """
+
+    def __init__(self, load: Callable[[], Any], swap: Callable[[Any], None],
+                 check: Optional[Callable[[Any], List[str]]] = None):
+        self.load = load
+        self.swap = swap
+        self.check = check
+        self.reloads = 0
+        self._status = {'state': 'idle'}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def status(self) -> Dict:
+        with self._lock:
+            return {**self._status, 'reloads': self.reloads}
+
+    def reload(self, wait: bool = False) -> bool:
+        """
+        Start loading a new model in the background.
+        Returns False when a reload is already running; wait=True blocks until it is done.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._status = {'state': 'loading', 'started': datetime.now().isoformat(timespec='seconds')}
+            self._thread = threading.Thread(target=self._run, name='model-reload', daemon=True)
+            self._thread.start()
+            thread = self._thread
+
+        if wait:
+            thread.join()
+        return True
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        status = {}
+        try:
+            model = self.load()
+            problems = self.check(model) if self.check is not None else []
+            if problems:
+                status = {'state': 'failed', 'problems': problems}
+                print(f"❌ Reloaded model rejected, still serving the old one: {'; '.join(problems)}")
+            else:
+                self.swap(model)
+                status = {'state': 'ok'}
+                print(f"🔄 Swapped in reloaded model after {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            status = {'state': 'failed', 'problems': [str(e)]}
+            print(f"❌ Error reloading model: {e}")
+
+        with self._lock:
+            if status['state'] == 'ok':
+                self.reloads += 1
+            self._status = {**self._status, **status,
+                            'finished': datetime.now().isoformat(timespec='seconds'),
+                            'seconds': round(time.perf_counter() - start, 3)}
+
+    def watch(self, version: Callable[[], Any], interval: float = 30.0) -> None:
+        """
+        Poll version() (e.g. artifact sizes and mtimes) every interval seconds
+        and reload when it changed and then held still for one more poll, so
+        artifacts that are still being written are not picked up half-way
+        """
+        if self._watcher is not None:
+            return
+
+        def poll():
+            loaded = version()
+            previous = loaded
+            while not self._stop.wait(interval):
+                try:
+                    current = version()
+                except OSError:
+                    continue
+                if current != loaded and current == previous and self.reload(wait=True):
+                    loaded = current
+                previous = current
+
+        self._watcher = threading.Thread(target=poll, name='model-watch', daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the file watcher"""
+        self._stop.set()
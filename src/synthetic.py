@@ -0,0 +1,223 @@
+"""
+Synthetic MovieLens-style data for load and scale testing
+Vectorized generation of a catalog and of millions of users' ratings with a
+Zipf popularity skew, written chunk by chunk in the MovieLens layout:
+
+    python -m src.synthetic --users 1000000 --movies 60000 --output data/synthetic
+"""
+
+import argparse
+import os
+import time
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import RATINGS_DTYPES
+
+GENRES = ('Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama',
+          'Fantasy', 'Horror', 'Romance', 'Sci-Fi', 'Thriller')
+
+# Ratings are spread over these years
+TIMESTAMP_RANGE = (int(pd.Timestamp('2000-01-01').timestamp()), int(pd.Timestamp('2020-01-01').timestamp()))
+
+# Distributions of the number of ratings per user
+RATING_COUNTS = ('lognormal', 'uniform')
+
+# Chunks up to this many users × movies are sampled exactly without replacement
+EXACT_SAMPLING_CELLS = 10_000_000
+
+# Draws per chunk when topping up users whose picks repeated a movie (larger catalogs)
+REDRAW_ROUNDS = 4
+
+
+def zipf_popularity(num_movies: int, exponent: float = 1.0, seed: int = 0) -> np.ndarray:
+    """
+    Probability of each movie being picked: 1 / rank^exponent over a random
+    ranking, so a few blockbusters collect most ratings (exponent=0 is uniform)
+    """
+    ranks = np.random.default_rng(seed).permutation(num_movies) + 1
+    weights = ranks.astype(np.float64) ** -exponent
+    return weights / weights.sum()
+
+
+def generate_movies(num_movies: int, exponent: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    """
+    Catalog of num_movies with MovieLens columns (movieId, title, genres) plus
+    year, quality (mean rating on the 0.5–5 scale) and popularity
+    """
+    rng = np.random.default_rng(seed)
+    movie_ids = np.arange(1, num_movies + 1, dtype=np.int32)
+    years = rng.integers(1950, 2020, num_movies).astype(np.int16)
+
+    # One to three distinct genres per movie
+    genre_keys = rng.random((num_movies, len(GENRES)))
+    genre_order = np.argsort(genre_keys, axis=1)
+    genre_counts = rng.integers(1, 4, num_movies)
+    genres = ['|'.join(GENRES[g] for g in order[:count]) for order, count in zip(genre_order, genre_counts)]
+
+    return pd.DataFrame({
+        'movieId': movie_ids,
+        'title': [f"Movie {movie_id} ({year})" for movie_id, year in zip(movie_ids, years)],
+        'genres': genres,
+        'year': years,
+        'quality': np.clip(rng.normal(3.4, 0.6, num_movies), 1.0, 4.8).astype(np.float32),
+        'popularity': zipf_popularity(num_movies, exponent, seed).astype(np.float32),
+    })
+
+
+def _sample_exact(rng: np.random.Generator, counts: np.ndarray, num_movies: int,
+                  popularity: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Exactly counts[u] distinct movies per user, as sorted user * num_movies + movie
+    keys: each user ranks every movie by a random key (log popularity plus Gumbel
+    noise, i.e. weighted sampling without replacement) and keeps the best counts[u]
+    """
+    keys = rng.random((len(counts), num_movies), dtype=np.float32)
+    if popularity is not None:
+        keys = np.log(popularity, dtype=np.float32) - np.log(-np.log(np.maximum(keys, 1e-12)))
+    order = np.argsort(-keys, axis=1)
+    picks = order[np.arange(num_movies) < counts[:, None]]
+    return np.sort(np.repeat(np.arange(len(counts), dtype=np.int64), counts) * num_movies + picks)
+
+
+def _sample_redraw(rng: np.random.Generator, counts: np.ndarray, num_movies: int,
+                   cumulative: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Draw with replacement, drop repeated (user, movie) picks and redraw the
+    shortfall a few times (heavy users under a strong skew may stay a few
+    short); returns sorted user * num_movies + movie keys
+    """
+    users = len(counts)
+    keys = np.empty(0, dtype=np.int64)
+    missing = counts
+    for _ in range(REDRAW_ROUNDS):
+        if not missing.any():
+            break
+        owners = np.repeat(np.arange(users, dtype=np.int64), missing)
+        if cumulative is None:
+            picks = rng.integers(0, num_movies, len(owners))
+        else:
+            picks = np.searchsorted(cumulative, rng.random(len(owners)) * cumulative[-1], side='right')
+            picks = np.minimum(picks, num_movies - 1)
+        keys = np.sort(np.concatenate([keys, owners * num_movies + picks]))
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        missing = counts - np.bincount(keys // num_movies, minlength=users)
+    return keys
+
+
+def iter_ratings(movie_ids: Sequence[int], quality: Sequence[float], num_users: int,
+                 popularity: Optional[Sequence[float]] = None, ratings_per_user: float = 20,
+                 min_ratings: int = 1, max_ratings: Optional[int] = None, counts: str = 'lognormal',
+                 rating_noise: float = 0.5, user_bias: float = 0.4, chunk_users: int = 100_000,
+                 seed: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Ratings for num_users users, one DataFrame (MovieLens columns, compact
+    dtypes) per chunk_users users, so memory stays bounded by a chunk.
+
+    Ratings per user follow a log-normal long tail around ratings_per_user
+    (counts='uniform': any number in [min_ratings, max_ratings] equally likely),
+    clipped to [min_ratings, max_ratings]; movies are drawn by popularity
+    (uniform when None) without repeats. A rating is the movie's quality plus
+    a per-user bias and noise, rounded to half stars.
+    """
+    if counts not in RATING_COUNTS:
+        raise ValueError(f"Unknown counts '{counts}', expected one of {RATING_COUNTS}")
+
+    rng = np.random.default_rng(seed)
+    movie_ids = np.asarray(movie_ids, dtype=np.int32)
+    quality = np.asarray(quality, dtype=np.float32)
+    num_movies = len(movie_ids)
+    max_ratings = min(max_ratings or num_movies, num_movies)
+    popularity = np.asarray(popularity, dtype=np.float64) if popularity is not None else None
+    cumulative = np.cumsum(popularity) if popularity is not None else None
+
+    sigma = 1.0
+    for first_user in range(1, num_users + 1, chunk_users):
+        users = min(chunk_users, num_users + 1 - first_user)
+        if counts == 'uniform':
+            user_counts = rng.integers(min_ratings, max_ratings + 1, users)
+        else:
+            user_counts = rng.lognormal(np.log(ratings_per_user) - sigma ** 2 / 2, sigma, users)
+            user_counts = np.clip(np.rint(user_counts), min_ratings, max_ratings).astype(np.int64)
+
+        # Small catalogs are sampled exactly; large ones by redrawing repeats.
+        # Sorted keys also order the ratings by user, then movie
+        if users * num_movies <= EXACT_SAMPLING_CELLS:
+            keys = _sample_exact(rng, user_counts, num_movies, popularity)
+        else:
+            keys = _sample_redraw(rng, user_counts, num_movies, cumulative)
+        owners, picks = keys // num_movies, keys % num_movies
+
+        biases = rng.normal(0, user_bias, users).astype(np.float32) if user_bias else np.zeros(users, np.float32)
+        ratings = quality[picks] + biases[owners] + rng.normal(0, rating_noise, len(keys)).astype(np.float32)
+        ratings = np.clip(np.rint(ratings * 2) / 2, 0.5, 5.0)
+
+        yield pd.DataFrame({
+            'userId': (owners + first_user).astype(RATINGS_DTYPES['userId']),
+            'movieId': movie_ids[picks],
+            'rating': ratings.astype(RATINGS_DTYPES['rating']),
+            'timestamp': rng.integers(*TIMESTAMP_RANGE, len(keys)).astype(RATINGS_DTYPES['timestamp']),
+        })
+
+
+def generate_ratings(movie_ids: Sequence[int], quality: Sequence[float], num_users: int, **options) -> pd.DataFrame:
+    """All chunks of iter_ratings in one DataFrame"""
+    return pd.concat(list(iter_ratings(movie_ids, quality, num_users, **options)), ignore_index=True)
+
+
+def write_dataset(output_dir: str, num_users: int, num_movies: int, ratings_per_user: float = 20,
+                  exponent: float = 1.0, file_format: str = 'csv', chunk_users: int = 100_000,
+                  seed: int = 0) -> int:
+    """
+    Write movies.csv and the ratings (ratings.csv, or ratings.npz holding one
+    compact array per column) to output_dir; returns the number of ratings
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    movies = generate_movies(num_movies, exponent, seed)
+    movies[['movieId', 'title', 'genres']].to_csv(os.path.join(output_dir, 'movies.csv'), index=False)
+
+    chunks = iter_ratings(movies['movieId'], movies['quality'], num_users, popularity=movies['popularity'],
+                          ratings_per_user=ratings_per_user, chunk_users=chunk_users, seed=seed + 1)
+    total = 0
+    if file_format == 'npz':
+        columns = {name: [] for name in RATINGS_DTYPES}
+        for chunk in chunks:
+            for name in columns:
+                columns[name].append(chunk[name].to_numpy())
+            total += len(chunk)
+        np.savez(os.path.join(output_dir, 'ratings.npz'), **{name: np.concatenate(parts)
+                                                              for name, parts in columns.items()})
+    else:
+        ratings_path = os.path.join(output_dir, 'ratings.csv')
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(ratings_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            total += len(chunk)
+            print(f"📝 {total:,} ratings from {min((i + 1) * chunk_users, num_users):,} users")
+
+    print(f"✅ Wrote {num_movies:,} movies and {total:,} ratings to {output_dir} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic MovieLens-style dataset")
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--movies', type=int, default=10_000)
+    parser.add_argument('--ratings-per-user', type=float, default=20, help="typical ratings per user (long-tailed)")
+    parser.add_argument('--zipf', type=float, default=1.0, help="popularity skew exponent (0 = uniform)")
+    parser.add_argument('--format', choices=['csv', 'npz'], default='csv')
+    parser.add_argument('--chunk-users', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join('data', 'synthetic'))
+    args = parser.parse_args()
+
+    write_dataset(args.output, args.users, args.movies, args.ratings_per_user, args.zipf,
+                  args.format, args.chunk_users, args.seed)
+
+
+if __name__ == '__main__':
+    main()
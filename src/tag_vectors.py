@@ -0,0 +1,76 @@
+"""
+Sparse tag vectors for on-demand similarity
+Ships the fitted CountVectorizer plus an L2-normalized CSR tag matrix instead of the N×N cosine matrix
+"""
+
+import argparse
+import os
+import pickle
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+TAG_MATRIX_NAME = 'tag_matrix.npz'
+
+
+def build_tag_matrix(tags, vectorizer: Optional[CountVectorizer] = None) -> Tuple[sp.csr_matrix, CountVectorizer]:
+    """
+    Vectorize tag strings into an L2-normalized float32 CSR matrix.
+
+    Uses the given fitted vectorizer, or fits the notebook's
+    CountVectorizer(max_features=5000, stop_words='english'). A row dot
+    product of the result equals cosine_similarity on the raw counts.
+    """
+    if vectorizer is None:
+        vectorizer = CountVectorizer(max_features=5000, stop_words='english')
+        counts = vectorizer.fit_transform(tags)
+    else:
+        counts = vectorizer.transform(tags)
+
+    matrix = normalize(counts.astype(np.float32), norm='l2', copy=False)
+    return sp.csr_matrix(matrix), vectorizer
+
+
+def similarity_rows(tag_matrix: sp.csr_matrix, indices) -> np.ndarray:
+    """Dense cosine similarity rows of the given movies against the whole catalog"""
+    queries = tag_matrix[indices].toarray()
+    return np.asarray(tag_matrix @ queries.T).T
+
+
+def save_tag_matrix(path: str, tag_matrix: sp.csr_matrix) -> None:
+    sp.save_npz(path, tag_matrix, compressed=False)
+
+
+def load_tag_matrix(path: str) -> sp.csr_matrix:
+    return sp.csr_matrix(sp.load_npz(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the sparse tag matrix from movie_list.pkl")
+    parser.add_argument('--artifacts-dir', default='artifacts')
+    parser.add_argument('--refit', action='store_true', help="fit a new vectorizer instead of reusing vectorizer.pkl")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.artifacts_dir, 'movie_list.pkl'), 'rb') as f:
+        new_df = pickle.load(f)
+
+    vectorizer = None
+    vectorizer_path = os.path.join(args.artifacts_dir, 'vectorizer.pkl')
+    if os.path.exists(vectorizer_path) and not args.refit:
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+
+    tag_matrix, vectorizer = build_tag_matrix(new_df['tags'], vectorizer)
+    save_tag_matrix(os.path.join(args.artifacts_dir, TAG_MATRIX_NAME), tag_matrix)
+    with open(vectorizer_path, 'wb') as f:
+        pickle.dump(vectorizer, f)
+
+    print(f"✅ Saved {tag_matrix.shape[0]}×{tag_matrix.shape[1]} tag matrix "
+          f"({tag_matrix.nnz} non-zeros) to {args.artifacts_dir}")
+
+
+if __name__ == '__main__':
+    main()
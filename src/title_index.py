@@ -0,0 +1,262 @@
+"""
+Normalized title index for constant-time movie lookups
+Built once when the models are loaded instead of lowercasing the title column per request
+"""
+
+import bisect
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r'[\W_]+', re.UNICODE)
+_YEAR_SUFFIX = re.compile(r'\s*\((\d{4})\)\s*$')
+
+
+def normalize_title(title: str) -> str:
+    """
+    Fold a title to its lookup key.
+
+    Unicode casefold, accents removed, punctuation and runs of whitespace
+    collapsed to single spaces: "Amélie", "amelie" and " AMÉLIE! " all map to "amelie".
+    """
+    text = str(title)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_ALNUM.sub(' ', text.casefold())
+    return ' '.join(text.split())
+
+
+def title_year(title: str) -> Optional[int]:
+    """Extract a trailing "(YYYY)" year, as used in MovieLens titles"""
+    match = _YEAR_SUFFIX.search(str(title))
+    return int(match.group(1)) if match else None
+
+
+class TitleIndex:
+    """Maps normalized titles and TMDB movie ids to row positions"""
+
+    def __init__(self, titles: Sequence[str], movie_ids: Optional[Sequence] = None,
+                 years: Optional[Sequence] = None, active: Optional[np.ndarray] = None):
+        """Rows where the boolean ``active`` mask is False (removed movies) are left out"""
+        self.title_rows: Dict[str, List[int]] = {}
+        self.movie_id_rows: Dict[int, int] = {}
+        # years may also be a callable, resolved on the first lookup that needs them
+        self._years = years if callable(years) or years is None else np.asarray(years)
+
+        for row, title in enumerate(titles):
+            if active is not None and not active[row]:
+                continue
+            keys = {normalize_title(title)}
+            # "Toy Story (1995)" is also reachable as "Toy Story"
+            stripped = _YEAR_SUFFIX.sub('', str(title))
+            if stripped != str(title):
+                keys.add(normalize_title(stripped))
+            for key in keys:
+                self.title_rows.setdefault(key, []).append(row)
+
+        if movie_ids is not None:
+            for row, movie_id in enumerate(movie_ids):
+                if active is not None and not active[row]:
+                    continue
+                self.movie_id_rows.setdefault(int(movie_id), row)
+
+    def __len__(self) -> int:
+        return len(self.title_rows)
+
+    @property
+    def years(self) -> Optional[np.ndarray]:
+        if callable(self._years):
+            years = self._years()
+            self._years = np.asarray(years) if years is not None else None
+        return self._years
+
+    def rows(self, title: str) -> List[int]:
+        """All rows whose title normalizes to the same key"""
+        return self.title_rows.get(normalize_title(title), [])
+
+    def row_for_movie_id(self, movie_id) -> Optional[int]:
+        return self.movie_id_rows.get(int(movie_id))
+
+    def lookup(self, title: Optional[str] = None, movie_id=None, year: Optional[int] = None) -> Optional[int]:
+        """
+        Resolve a movie to its row.
+
+        A movie id wins over the title. Duplicate titles are narrowed down by
+        year, given as an argument or a "(YYYY)" title suffix; otherwise the
+        first row is returned.
+        """
+        if movie_id is not None:
+            return self.row_for_movie_id(movie_id)
+
+        if title is None:
+            return None
+
+        rows = self.rows(title)
+        suffix_year = title_year(title)
+        if not rows and suffix_year is not None:
+            # "Dune (2021)" against a catalog storing "Dune" with a separate year
+            rows = self.rows(_YEAR_SUFFIX.sub('', str(title)))
+        if not rows:
+            return None
+
+        if year is None:
+            year = suffix_year
+
+        if year is not None and len(rows) > 1 and self.years is not None:
+            matching = [row for row in rows if self.years[row] == year]
+            if matching:
+                return matching[0]
+
+        return rows[0]
+
+
+class TrigramSearchIndex:
+    """
+    Partial-title search over normalized titles.
+
+    Results are ranked exact > prefix > substring, then by popularity. Exact
+    and prefix matches come from binary searches on the sorted keys; substring
+    matches walk trigram posting lists, which hold rows in popularity order,
+    best first and only until ``limit`` rows are found.
+    """
+
+    # Candidates checked per step of the substring walk (doubled every step)
+    FIRST_CHUNK = 64
+
+    def __init__(self, titles: Sequence[str], popularity: Optional[Sequence[float]] = None):
+        self.keys = [normalize_title(t) for t in titles]
+        n = len(self.keys)
+
+        if popularity is None:
+            self.popularity = np.zeros(n, dtype=np.float32)
+        else:
+            self.popularity = np.nan_to_num(np.asarray(popularity, dtype=np.float32), nan=0.0)
+
+        # Rank 0 is the most popular row (ties by row); ascending ranks are result order
+        self._rank_rows = np.lexsort((np.arange(n), -self.popularity)).astype(np.int32)
+        self._row_ranks = np.empty(n, dtype=np.int32)
+        self._row_ranks[self._rank_rows] = np.arange(n, dtype=np.int32)
+
+        self._build_postings()
+
+        # Sorted keys answer exact and prefix matches with two binary searches
+        self._key_order = np.array(sorted(range(n), key=self.keys.__getitem__), dtype=np.int32)
+        self._sorted_keys = [self.keys[row] for row in self._key_order]
+
+    @staticmethod
+    def _encode_trigrams(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack every window of three code points into one uint64; also return the window mask"""
+        codes = codes.astype(np.uint64)
+        first, second, third = codes[:-2], codes[1:-1], codes[2:]
+        valid = (first != 0) & (second != 0) & (third != 0)
+        grams = (first << np.uint64(42)) | (second << np.uint64(21)) | third
+        return grams, valid
+
+    def _build_postings(self) -> None:
+        """
+        Build CSR posting lists (sorted trigram ids -> ascending row ranks) in vectorized form.
+
+        All keys are joined with NUL separators and read as UTF-32 code
+        points; windows touching a separator are dropped.
+        """
+        n = len(self.keys)
+        joined = '\x00'.join(self.keys) + '\x00'
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+        lengths = np.fromiter((len(key) + 1 for key in self.keys), dtype=np.int64, count=n)
+        rank_of_code = np.repeat(self._row_ranks, lengths)
+
+        grams, valid = self._encode_trigrams(codes)
+        grams = grams[valid]
+        ranks = rank_of_code[:-2][valid]
+
+        # Sort by (gram, rank) and drop repeated trigrams within a title
+        order = np.lexsort((ranks, grams))
+        grams, ranks = grams[order], ranks[order]
+        keep = np.ones(len(grams), dtype=bool)
+        keep[1:] = (grams[1:] != grams[:-1]) | (ranks[1:] != ranks[:-1])
+        grams, ranks = grams[keep], ranks[keep]
+
+        self._gram_ids, starts = np.unique(grams, return_index=True)
+        self._gram_offsets = np.append(starts, len(grams)).astype(np.int64)
+        self._gram_ranks = ranks
+
+    def _postings(self, gram: np.uint64) -> Optional[np.ndarray]:
+        position = np.searchsorted(self._gram_ids, gram)
+        if position == len(self._gram_ids) or self._gram_ids[position] != gram:
+            return None
+        return self._gram_ranks[self._gram_offsets[position]:self._gram_offsets[position + 1]]
+
+    def _prefix_rows(self, prefix: str) -> np.ndarray:
+        """Rows whose key starts with prefix, those equal to it first"""
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        end = bisect.bisect_left(self._sorted_keys, prefix + '\U0010ffff')
+        return self._key_order[start:end]
+
+    def _exact_rows(self, key: str) -> np.ndarray:
+        start = bisect.bisect_left(self._sorted_keys, key)
+        end = bisect.bisect_right(self._sorted_keys, key)
+        return self._key_order[start:end]
+
+    def _best(self, rows: np.ndarray, limit: int) -> np.ndarray:
+        """The limit most popular of rows, best first"""
+        ranks = self._row_ranks[rows]
+        if len(ranks) > limit:
+            ranks = np.partition(ranks, limit - 1)[:limit]
+        return self._rank_rows[np.sort(ranks)]
+
+    def _substring_rows(self, query: str, limit: int) -> np.ndarray:
+        """
+        Up to limit rows containing query but not starting with it, best first.
+        The shortest posting list is walked in rank order in growing chunks; a chunk's
+        ranks are kept when every other list holds them, then checked against the key.
+        """
+        codes = np.frombuffer(query.encode('utf-32-le'), dtype=np.uint32)
+        grams, _ = self._encode_trigrams(codes)
+        lists = [self._postings(gram) for gram in np.unique(grams)]
+        if any(ranks is None for ranks in lists):
+            return np.empty(0, dtype=np.int32)
+
+        lists.sort(key=len)
+        shortest, others = lists[0], lists[1:]
+        # A single trigram needs no check; longer queries may match grams out of order
+        check_substring = len(query) > 3
+        keys = self.keys
+        found = []
+
+        start, chunk = 0, self.FIRST_CHUNK
+        while start < len(shortest) and len(found) < limit:
+            ranks = shortest[start:start + chunk]
+            start, chunk = start + chunk, chunk * 2
+            for other in others:
+                positions = np.minimum(np.searchsorted(other, ranks), len(other) - 1)
+                ranks = ranks[other[positions] == ranks]
+
+            for row in self._rank_rows[ranks].tolist():
+                key = keys[row]
+                if key.startswith(query) or (check_substring and query not in key):
+                    continue
+                found.append(row)
+                if len(found) == limit:
+                    break
+        return np.array(found, dtype=np.int32)
+
+    def search(self, query: str, limit: int = 10) -> np.ndarray:
+        """Return up to ``limit`` matching rows, best first"""
+        query = normalize_title(query)
+        if not query or limit <= 0:
+            return np.empty(0, dtype=np.int32)
+
+        # Each tier is only searched while the better ones leave room
+        prefix = self._prefix_rows(query)
+        exact = len(self._exact_rows(query))
+        results = [self._best(prefix[:exact], limit)]
+        remaining = limit - len(results[0])
+        if remaining > 0:
+            results.append(self._best(prefix[exact:], remaining))
+            remaining -= len(results[-1])
+        if remaining > 0 and len(query) >= 3:
+            results.append(self._substring_rows(query, remaining))
+        return np.concatenate(results).astype(np.int32)
@@ -0,0 +1,68 @@
+"""
+Top-k selection helpers for similarity rows
+Partial selection with NumPy instead of sorting every movie in Python
+"""
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+
+    Ties are broken by ascending index, which is exactly the order produced by
+    ``sorted(enumerate(scores), reverse=True, key=lambda x: x[1])``.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k == n:
+        return np.argsort(-scores, kind='stable')
+
+    # Partial selection finds the k-th best value in O(N)
+    kth_value = scores[np.argpartition(-scores, k - 1)[k - 1]]
+
+    # Everything strictly better is in; the remaining slots go to the
+    # lowest-index movies sharing the k-th value
+    above = np.flatnonzero(scores > kth_value)
+    ties = np.flatnonzero(scores == kth_value)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+
+    # Sort only the k winners
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def top_k_indices_batch(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise version of ``top_k_indices`` for a 2-D block of scores.
+
+    All rows are partitioned in one NumPy call; only rows with ties straddling
+    the k-th position fall back to the exact single-row path.
+    """
+    scores = np.asarray(scores)
+    m, n = scores.shape
+    k = min(int(k), n)
+    if k <= 0 or m == 0:
+        return np.empty((m, max(k, 0)), dtype=np.int64)
+
+    if k == n:
+        return np.argsort(-scores, axis=1, kind='stable')
+
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    # Sort the k winners of every row by (score desc, index asc)
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    result = np.take_along_axis(candidates, order, axis=1)
+
+    # Rows where more than k movies reach the k-th value need the exact path
+    kth_values = candidate_scores.min(axis=1)
+    ambiguous = np.flatnonzero((scores >= kth_values[:, None]).sum(axis=1) > k)
+    for row in ambiguous:
+        result[row] = top_k_indices(scores[row], k)
+
+    return result
@@ -22,7 +22,7 @@ echo "📦 Installing Python dependencies..."
 pip install -r requirements.txt
 
 # Check if artifacts exist
-if [ ! -f "artifacts/movie_list.pkl" ]; then
+if [ ! -f "artifacts/movie_list.pkl" ] && [ ! -f "artifacts/store/manifest.json" ]; then
     echo "⚠️  Movie artifacts not found. Generating movie data..."
     python data_loader.py
 fi
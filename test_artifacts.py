@@ -0,0 +1,171 @@
+"""
+Round trips through the memory-mapped artifact store
+"""
+
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+
+from src.artifacts import ArtifactStore, export_artifacts
+from src.tag_vectors import build_tag_matrix
+
+
+def movies_table():
+    return pd.DataFrame({
+        'movie_id': np.array([19995, 285, 206647], dtype=np.int64),
+        'title': ['Avatar', "Pirates of the Caribbean: At World's End", 'Amélie'],
+        'tags': ['space marine', 'pirate ship', None],
+    })
+
+
+def movies_full_table():
+    return pd.DataFrame({
+        'movie_id': np.array([19995, 285, 206647], dtype=np.int32),
+        'vote_average': np.array([7.2, 6.9, np.nan], dtype=np.float32),
+        'adult': [False, True, False],
+        'release_date': pd.to_datetime(['2009-12-10', '2007-05-19', '2001-04-25']),
+        'genres': [['Action', 'Adventure'], ('Adventure',), []],
+        'cast': [np.array(['Sam Worthington', 'Zoe Saldana']), np.array(['Johnny Depp']), None],
+        'crew': [{'director': 'James Cameron'}, {'director': 'Gore Verbinski'}, {}],
+        'original_language': ['en', 'en', 'fr'],
+    })
+
+
+def test_tables_round_trip_with_their_dtypes(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    export_artifacts(store_dir, movies_table(), movies_full=movies_full_table())
+    store = ArtifactStore(store_dir)
+
+    movies = store.dataframe()
+    pd.testing.assert_frame_equal(movies[['movie_id', 'title']], movies_table()[['movie_id', 'title']],
+                                  check_dtype=False)
+    assert movies['movie_id'].dtype == np.int64
+    # Missing strings stay missing instead of becoming 'None' / 'nan'
+    assert movies['tags'].tolist()[:2] == ['space marine', 'pirate ship'] and pd.isna(movies['tags'][2])
+    assert store.column('tags')[2] is None
+
+    full = store.dataframe(table='movies_full')
+    assert full['movie_id'].dtype == np.int32 and full['vote_average'].dtype == np.float32
+    assert np.isnan(full['vote_average'][2]) and full['adult'].tolist() == [False, True, False]
+    assert full['release_date'].dtype == movies_full_table()['release_date'].dtype
+    assert full['release_date'].tolist() == movies_full_table()['release_date'].tolist()
+
+    # Nested cells come back as JSON values, numpy arrays included
+    assert full['genres'].tolist() == [['Action', 'Adventure'], ['Adventure'], []]
+    assert full['cast'].tolist() == [['Sam Worthington', 'Zoe Saldana'], ['Johnny Depp'], None]
+    assert full['crew'].tolist() == [{'director': 'James Cameron'}, {'director': 'Gore Verbinski'}, {}]
+    assert full['original_language'].tolist() == ['en', 'en', 'fr']
+
+
+def test_only_requested_columns_are_read(tmp_path, monkeypatch):
+    store_dir = str(tmp_path / 'store')
+    export_artifacts(store_dir, movies_table(), movies_full=movies_full_table())
+    store = ArtifactStore(store_dir)
+
+    opened = []
+    load = ArtifactStore._load
+    monkeypatch.setattr(ArtifactStore, '_load', lambda self, filename, mmap=True: opened.append(filename)
+                        or load(self, filename, mmap))
+
+    frame = store.dataframe(['vote_average', 'genres', 'not_a_column'], table='movies_full')
+    assert frame.columns.tolist() == ['vote_average', 'genres']
+    assert sorted(opened) == ['movies_full.genres.data.npy', 'movies_full.genres.offsets.npy',
+                              'movies_full.vote_average.npy']
+    assert store.column_names() == ['movie_id', 'title', 'tags']
+    assert store.has_table('movies_full') and not store.has_table('ratings')
+
+
+def test_crashed_export_keeps_the_previous_store(tmp_path, monkeypatch):
+    store_dir = str(tmp_path / 'store')
+    tag_matrix, _ = build_tag_matrix(movies_table()['tags'].fillna(''))
+    export_artifacts(store_dir, movies_table(), similarity=np.eye(3), tag_matrix=tag_matrix)
+
+    def crash(directory, name, array):
+        raise OSError('disk full')
+    monkeypatch.setattr('src.artifacts._write_array', crash)
+    with pytest.raises(OSError):
+        export_artifacts(store_dir, movies_table(), similarity=np.ones((3, 3)))
+
+    store = ArtifactStore(store_dir)
+    assert store.num_movies == 3 and store.has_array('tag_data')
+    assert store.dataframe(['title'])['title'].tolist() == movies_table()['title'].tolist()
+    assert not any(name.endswith('.tmp') for name in os.listdir(store_dir))
+
+
+def is_mapped(array):
+    """Whether an array is a memory map or a view of one"""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_arrays_are_memory_mapped(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    tag_matrix, _ = build_tag_matrix(movies_table()['tags'].fillna(''))
+    export_artifacts(store_dir, movies_table(), similarity=np.eye(3, dtype=np.float32), tag_matrix=tag_matrix)
+    store = ArtifactStore(store_dir)
+
+    similarity = store.array('similarity')
+    assert isinstance(similarity, np.memmap) and similarity.mode == 'r' and not similarity.flags.writeable
+    assert np.array_equal(similarity, np.eye(3))
+    assert isinstance(store.column('movie_id'), np.memmap)
+    assert not isinstance(store.array('similarity', mmap=False), np.memmap)
+
+    # The CSR matrix wraps the mapped buffers instead of copying them
+    matrix = store.tag_matrix()
+    assert all(is_mapped(buffer) for buffer in (matrix.data, matrix.indices, matrix.indptr))
+    assert (matrix != tag_matrix).nnz == 0
+
+
+def test_manifest_and_array_mismatch_is_rejected(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    export_artifacts(store_dir, movies_table(), similarity=np.eye(3))
+
+    # An array file replaced behind the manifest's back
+    np.save(os.path.join(store_dir, 'similarity.npy'), np.eye(4))
+    with pytest.raises(ValueError, match="similarity"):
+        ArtifactStore(store_dir).array('similarity')
+
+    manifest_path = os.path.join(store_dir, 'manifest.json')
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['format_version'] = 99
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match="format version"):
+        ArtifactStore(store_dir)
+
+
+@pytest.mark.parametrize('mode', ['dense', 'neighbors'])
+def test_recommender_serves_from_the_mapped_store(tmp_path, mode):
+    from src.neighbors import NeighborIndex
+    from src.recommender import MovieRecommender
+    from test_recommender import write_artifacts
+
+    movies = write_artifacts(str(tmp_path))
+    with open(os.path.join(str(tmp_path), 'similarity.pkl'), 'rb') as f:
+        similarity = pickle.load(f)
+    expected = MovieRecommender(mode='dense', artifacts_dir=str(tmp_path)).recommend('Film 0', 4)
+
+    export_artifacts(str(tmp_path / 'store'), movies, similarity=similarity,
+                     neighbor_index=NeighborIndex.from_similarity(similarity, k=6))
+    recommender = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    assert recommender.artifact_format == 'mmap'
+    mapped = recommender.similarity if mode == 'dense' else recommender.neighbor_index.ids
+    assert isinstance(mapped, np.memmap)
+    assert recommender.recommend('Film 0', 4)['title'].tolist() == expected['title'].tolist()
+
+    # A store whose arrays disagree with its manifest is not served
+    np.save(str(tmp_path / 'store' / ('similarity.npy' if mode == 'dense' else 'neighbor_ids.npy')),
+            np.zeros((2, 2), dtype=np.int32))
+    broken = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    assert not broken._models_loaded() and broken.recommend('Film 0', 4).empty
@@ -0,0 +1,114 @@
+"""
+ResultCache eviction, expiry and sharing, and per-model-version keys in MovieRecommender
+"""
+
+import sys
+
+import pandas as pd
+
+sys.path.append('.')
+
+from src.cache import ResultCache
+from src.recommender import MovieRecommender
+from test_recommender import write_artifacts
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl_seconds=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recent
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('src.cache.time.time', lambda: now[0])
+    cache = ResultCache(ttl_seconds=10)
+    cache.put('key', 'value')
+
+    now[0] += 9
+    assert cache.get('key') == 'value'
+    now[0] += 2
+    assert cache.get('key', 'expired') == 'expired'
+    assert cache.stats()['entries'] == 0
+
+
+def test_keys_are_stable_and_order_independent():
+    assert ResultCache.make_key('r', {'b': 1, 'a': [1, 2]}) == ResultCache.make_key('r', {'a': (1, 2), 'b': 1})
+    assert ResultCache.make_key('r', {3, 1, 2}) == ResultCache.make_key('r', [1, 2, 3])
+    assert ResultCache.make_key('r', 'v1') != ResultCache.make_key('r', 'v2')
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'results.db')
+    first, second = ResultCache(path=path), ResultCache(path=path)
+    first.put('key', {'titles': ['Heat']})
+    assert second.get('key') == {'titles': ['Heat']}
+    assert second.stats()['hits'] == 1
+
+
+def test_results_are_cached_per_model_version(tmp_path):
+    write_artifacts(str(tmp_path))
+    cache = ResultCache(path=str(tmp_path / 'results.db'))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path), cache=cache)
+
+    first = recommender.recommend('Film 0', 3)
+    assert recommender.recommend('Film 0', 3).equals(first)
+    assert cache.stats()['hits'] == 1
+
+    # Returned frames are copies: changing one does not change the cached result
+    first.loc[0, 'title'] = 'changed'
+    assert recommender.recommend('Film 0', 3)['title'].iloc[0] != 'changed'
+
+    # Another worker on the same artifacts keeps and shares the entries
+    worker = MovieRecommender(artifacts_dir=str(tmp_path), cache=ResultCache(path=str(tmp_path / 'results.db')))
+    assert worker.model_version == recommender.model_version
+    worker.recommend('Film 0', 3)
+    assert worker.cache.stats()['hits'] == 1
+
+    # A catalog change is a new version, so the old lists are not served for it
+    version = recommender.model_version
+    clone = pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [recommender.new_df['tags'][0]]})
+    recommender.add_movies(clone)
+    assert recommender.model_version != version
+    assert recommender.recommend('Film 0', 3)['title'].iloc[0] == 'New Clone'
+
+
+def test_rebuilt_lazy_artifacts_change_the_version(tmp_path):
+    import os
+    from src.tag_vectors import TAG_MATRIX_NAME, build_tag_matrix, save_tag_matrix
+    from test_recommender import TAGS
+    write_artifacts(str(tmp_path))
+    tag_path = str(tmp_path / TAG_MATRIX_NAME)
+    save_tag_matrix(tag_path, build_tag_matrix(TAGS)[0])
+    cache = ResultCache()
+    recommender = MovieRecommender(mode='sparse', artifacts_dir=str(tmp_path), cache=cache)
+    before = recommender.recommend('Film 0', 3)['title'].tolist()
+
+    # Rebuild the tag vectors only (python -m src.tag_vectors): Film 0 now reads like Film 4
+    save_tag_matrix(tag_path, build_tag_matrix([TAGS[4]] + TAGS[1:])[0])
+    os.utime(tag_path, ns=(os.stat(tag_path).st_atime_ns, os.stat(tag_path).st_mtime_ns + 10**9))
+    reloaded = MovieRecommender(mode='sparse', artifacts_dir=str(tmp_path), cache=cache)
+    fresh = MovieRecommender(mode='sparse', artifacts_dir=str(tmp_path)).recommend('Film 0', 3)['title'].tolist()
+
+    assert reloaded.model_version != recommender.model_version
+    assert fresh != before
+    assert reloaded.recommend('Film 0', 3)['title'].tolist() == fresh
+
+
+def test_diversity_budget_is_part_of_the_key(tmp_path):
+    write_artifacts(str(tmp_path))
+    cache = ResultCache()
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path), cache=cache)
+
+    recommender.recommend('Film 0', 3, diversity=0.5, diversity_budget_ms=5.0)
+    recommender.recommend('Film 0', 3, diversity=0.5, diversity_budget_ms=0.0)
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 2)
+    recommender.recommend('Film 0', 3, diversity=0.5, diversity_budget_ms=0.0)
+    assert cache.stats()['hits'] == 1
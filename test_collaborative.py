@@ -0,0 +1,80 @@
+"""
+ALSRecommender on small synthetic rating matrices
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+sys.path.append('.')
+
+from src.collaborative import ALSRecommender, build_interaction_matrix
+
+
+def test_explicit_als_recovers_a_low_rank_matrix():
+    rng = np.random.default_rng(0)
+    users, items = rng.normal(size=(60, 3)), rng.normal(size=(40, 3))
+    ratings = users @ items.T
+    observed = rng.random(ratings.shape) < 0.6
+
+    model = ALSRecommender(factors=3, regularization=0.01, iterations=40, implicit=False, num_threads=2,
+                           block_nnz=200, seed=1)
+    model.fit_matrix(sp.csr_matrix(np.where(observed, ratings, 0)))
+    predicted = model.user_factors @ model.item_factors.T
+
+    # Held-out entries are predicted, not just the observed ones
+    error = np.sqrt(np.mean((predicted - ratings)[~observed] ** 2))
+    assert error < 0.1 * ratings.std()
+
+
+def test_implicit_als_ranks_the_users_taste_first():
+    # Two audiences with disjoint catalogs; every user has seen most of their own catalog
+    rng = np.random.default_rng(0)
+    rows = []
+    for user in range(40):
+        catalog = range(0, 10) if user < 20 else range(10, 20)
+        rows += [(user, item, 4.0) for item in catalog if rng.random() < 0.7]
+    ratings = pd.DataFrame(rows, columns=['userId', 'movieId', 'rating'])
+
+    model = ALSRecommender(factors=2, iterations=15, num_threads=2, seed=0).fit(ratings)
+    for user in range(40):
+        unseen_own = 10 - (ratings['userId'] == user).sum()
+        result = model.recommend(user, unseen_own)['movieId']
+        own = range(0, 10) if user < 20 else range(10, 20)
+        assert len(result) == unseen_own and set(result) <= set(own)
+
+
+def test_recommendations_skip_seen_movies():
+    ratings = pd.DataFrame({'userId': [1, 1, 2, 2, 2], 'movieId': [10, 20, 10, 20, 30],
+                            'rating': [5.0, 4.0, 5.0, 4.0, 3.0]})
+    model = ALSRecommender(factors=2, iterations=3, num_threads=1).fit(ratings)
+
+    assert model.recommend(1, 5)['movieId'].tolist() == [30]
+    assert model.recommend(2, 5).empty
+    assert len(model.recommend(1, 5, exclude_seen=False)) == 3
+    assert model.recommend(99, 5).empty
+
+
+def test_save_load_round_trip(tmp_path):
+    ratings = pd.DataFrame({'userId': [1, 1, 2, 3, 3], 'movieId': [10, 20, 20, 10, 30],
+                            'rating': [5.0, 3.0, 4.0, 2.0, 5.0]})
+    movies = pd.DataFrame({'movieId': [10, 20, 30], 'title': ['Heat (1995)', 'Up (2009)', 'Alien (1979)']})
+    model = ALSRecommender(factors=2, iterations=3, num_threads=1).fit(ratings, movies)
+    path = str(tmp_path / 'als_model.npz')
+    model.save(path)
+    loaded = ALSRecommender.load(path)
+
+    assert loaded.implicit and loaded.factors == 2
+    np.testing.assert_array_equal(loaded.item_factors, model.item_factors)
+    for user in (1, 2, 3):
+        pd.testing.assert_frame_equal(loaded.recommend(user, 3), model.recommend(user, 3))
+    assert set(loaded.recommend(2, 3)['title']) == {'Heat (1995)', 'Alien (1979)'}
+
+
+def test_interaction_matrix_keeps_the_last_duplicate():
+    ratings = pd.DataFrame({'userId': [7, 7, 3], 'movieId': [5, 5, 9], 'rating': [1.0, 4.0, 2.0]})
+    matrix, user_ids, item_ids = build_interaction_matrix(ratings)
+    assert user_ids.tolist() == [3, 7] and item_ids.tolist() == [5, 9]
+    assert matrix.toarray().tolist() == [[0, 2], [4, 0]]
@@ -0,0 +1,93 @@
+"""
+Item-item co-occurrence index and recommend(backend='cooccurrence')
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from src.cooccurrence import COOCCURRENCE_INDEX_NAME, build_cooccurrence_index, catalog_item_rows
+from src.recommender import MovieRecommender
+from test_recommender import write_artifacts
+
+
+def random_ratings(num_users=80, num_items=30, seed=0):
+    rng = np.random.default_rng(seed)
+    cells = rng.random((num_users, num_items)) < 0.2
+    users, items = np.nonzero(cells)
+    return pd.DataFrame({'userId': users + 1, 'movieId': items + 1000,
+                         'rating': rng.choice([1.0, 2.5, 4.0, 5.0], len(users))})
+
+
+def test_scores_match_a_dense_cosine_reference():
+    ratings = random_ratings()
+    num_items = 30
+    item_rows = pd.Series(np.arange(num_items), index=np.arange(num_items) + 1000)
+    index = build_cooccurrence_index(ratings, item_rows, num_items, k=8, block_size=7, num_threads=2)
+
+    liked = ratings[ratings['rating'] >= 4.0]
+    binary = np.zeros((ratings['userId'].max() + 1, num_items))
+    binary[liked['userId'], liked['movieId'] - 1000] = 1
+    counts = binary.T @ binary
+    norms = np.sqrt(np.diag(counts))
+    cosine = counts / np.outer(norms, norms)
+
+    assert index.ids.shape == (num_items, 8)
+    for item in range(num_items):
+        assert index.ids[item, 0] == item and index.scores[item, 0] == 1.0
+        neighbors, scores = index.ids[item, 1:], index.scores[item, 1:]
+        finite = np.isfinite(scores)
+        np.testing.assert_allclose(scores[finite], cosine[item, neighbors[finite]], rtol=1e-5)
+
+        # The best co-rated movies, best first
+        reference = np.delete(cosine[item], item)
+        expected = np.sort(reference[reference > 0])[::-1][:7]
+        np.testing.assert_allclose(scores[finite], expected, rtol=1e-5)
+
+
+def test_slots_without_co_ratings_are_padded_with_minus_inf():
+    ratings = pd.DataFrame({'userId': [1, 1, 2, 2, 3], 'movieId': [10, 11, 10, 11, 12],
+                            'rating': [5.0, 4.0, 4.5, 5.0, 2.0]})
+    item_rows = pd.Series([0, 1, 2, 3], index=[10, 11, 12, 13])
+    index = build_cooccurrence_index(ratings, item_rows, 4, k=4)
+
+    assert index.ids[0, :2].tolist() == [0, 1] and np.allclose(index.scores[0, :2], 1.0)
+    assert np.isneginf(index.scores[0, 2:]).all()
+    # No likes at all (12 was rated 2.0, 13 never): only the movie itself
+    for item in (2, 3):
+        assert index.ids[item, 0] == item and np.isneginf(index.scores[item, 1:]).all()
+
+
+def test_links_map_movielens_ids_to_catalog_rows():
+    catalog_ids = np.array([862, 8844, 15602, 862])
+    links = pd.DataFrame({'movieId': [1, 2, 3, 4], 'tmdbId': [862.0, 8844.0, np.nan, 999.0]})
+    assert catalog_item_rows(catalog_ids, links).to_dict() == {1: 0, 2: 1}
+    assert catalog_item_rows(catalog_ids).to_dict() == {862: 0, 8844: 1, 15602: 2}
+
+    # Ratings of unmapped movies are ignored
+    ratings = pd.DataFrame({'userId': [1, 1, 1], 'movieId': [1, 2, 4], 'rating': [5.0, 5.0, 5.0]})
+    index = build_cooccurrence_index(ratings, catalog_item_rows(catalog_ids, links), len(catalog_ids), k=3)
+    assert index.ids[0, :2].tolist() == [0, 1] and np.isneginf(index.scores[0, 2])
+
+
+def test_recommend_by_cooccurrence(tmp_path):
+    movies = write_artifacts(str(tmp_path))
+    # Everyone who liked Film 0 also liked Film 7, most liked Film 9 and a few Film 2
+    likes = {0: range(10), 7: range(10), 9: range(7), 2: range(3), 5: range(20, 30)}
+    ratings = pd.DataFrame([(user, int(movies['movie_id'][row]), 5.0) for row, users in likes.items()
+                            for user in users], columns=['userId', 'movieId', 'rating'])
+    index = build_cooccurrence_index(ratings, catalog_item_rows(movies['movie_id'].to_numpy()), len(movies), k=5)
+    index.save(os.path.join(str(tmp_path), COOCCURRENCE_INDEX_NAME))
+
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    result = recommender.recommend('Film 0', 5, backend='cooccurrence')
+    assert result['title'].tolist() == ['Film 7', 'Film 9', 'Film 2']
+    assert result['similarity_score'].tolist()[0] == 1.0
+    assert recommender.recommend('Film 5', 5, backend='cooccurrence').empty
+
+    recommender.remove_movies([107], persist=False)
+    assert recommender.recommend('Film 0', 5, backend='cooccurrence')['title'].tolist() == ['Film 9', 'Film 2']
@@ -0,0 +1,213 @@
+"""
+Tests for MovieDataLoader downloads against a local HTTP stand-in for GroupLens
+"""
+
+import hashlib
+import io
+import os
+import sys
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+
+from src.data_loader import MovieDataLoader
+
+MOVIES_CSV = b"movieId,title,genres\n1,Toy Story (1995),Animation|Children\n2,Heat (1995),Action|Crime\n"
+RATINGS_CSV = b"userId,movieId,rating,timestamp\n1,1,4.0,964982703\n1,2,3.5,964982224\n"
+
+
+def make_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('ml-latest-small/movies.csv', MOVIES_CSV)
+        archive.writestr('ml-latest-small/ratings.csv', RATINGS_CSV)
+        archive.writestr('ml-latest-small/README.txt', b"not extracted")
+        # Escapes data_dir and must be skipped
+        archive.writestr('../ratings.csv', b"evil")
+    return buffer.getvalue()
+
+
+class StandIn:
+    """GroupLens stand-in: serves the archive (with Range support) and its .md5"""
+
+    def __init__(self, archive, truncate_first=False):
+        self.archive = archive
+        self.truncate_first = truncate_first
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stand_in.requests.append((self.path, self.headers.get('Range')))
+                if self.path.endswith('.md5'):
+                    body = f"{hashlib.md5(stand_in.archive).hexdigest()}  ml-latest-small.zip\n".encode()
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                start = 0
+                if self.headers.get('Range'):
+                    start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+                body = stand_in.archive[start:]
+                self.send_response(206 if start else 200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                if stand_in.truncate_first:
+                    # Drop the connection half-way through the first download
+                    stand_in.truncate_first = False
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ml-latest-small.zip"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def archive():
+    return make_archive()
+
+
+def test_interrupted_download_resumes_and_verifies(tmp_path, archive):
+    stand_in = StandIn(archive, truncate_first=True)
+    loader = MovieDataLoader(str(tmp_path))
+    try:
+        # The first run is cut off and keeps the partial file ...
+        assert not loader.download_movielens_dataset(url=stand_in.url, retries=0, chunk_size=64)
+        part_path = tmp_path / 'ml-latest-small.zip.part'
+        received = part_path.stat().st_size
+        assert 0 < received < len(archive)
+
+        # ... which the next run resumes with a Range request and checks against the published md5
+        assert loader.download_movielens_dataset(url=stand_in.url, retries=0, chunk_size=64)
+    finally:
+        stand_in.close()
+
+    assert ('/ml-latest-small.zip', f"bytes={received}-") in stand_in.requests
+    assert ('/ml-latest-small.zip.md5', None) in stand_in.requests
+    assert (tmp_path / 'ml-latest-small' / 'movies.csv').read_bytes() == MOVIES_CSV
+    assert (tmp_path / 'ml-latest-small' / 'ratings.csv').read_bytes() == RATINGS_CSV
+    assert not (tmp_path / 'ml-latest-small' / 'README.txt').exists()
+    assert not (tmp_path.parent / 'ratings.csv').exists()
+    assert not part_path.exists() and not (tmp_path / 'ml-latest-small.zip').exists()
+
+
+def test_retries_resume_within_one_call(tmp_path, archive):
+    stand_in = StandIn(archive, truncate_first=True)
+    try:
+        assert MovieDataLoader(str(tmp_path)).download_movielens_dataset(url=stand_in.url, retries=1, chunk_size=64)
+    finally:
+        stand_in.close()
+
+    resumed = [int(r[1][6:-1]) for r in stand_in.requests if r[1] is not None]
+    assert len(resumed) == 1 and 0 < resumed[0] <= len(archive) // 2
+    assert (tmp_path / 'ml-latest-small' / 'movies.csv').read_bytes() == MOVIES_CSV
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, archive):
+    stand_in = StandIn(archive)
+    try:
+        assert not MovieDataLoader(str(tmp_path)).download_movielens_dataset(url=stand_in.url,
+                                                                             checksum='md5:' + '0' * 32)
+    finally:
+        stand_in.close()
+
+    # Nothing unverified is left behind or extracted
+    assert sorted(os.listdir(tmp_path)) == []
+
+
+def write_movielens(directory):
+    (directory / 'movies.csv').write_bytes(MOVIES_CSV)
+    (directory / 'ratings.csv').write_bytes(RATINGS_CSV)
+    return MovieDataLoader(str(directory))
+
+
+def load_without_parsing(loader, monkeypatch, **kwargs):
+    """load_from_csv that fails if any CSV text has to be parsed"""
+    def no_parse(*args, **kw):
+        raise AssertionError("parsed the CSV instead of using the cache")
+    with monkeypatch.context() as patch:
+        patch.setattr('src.data_loader._read_csv', no_parse)
+        return loader.load_from_csv(**kwargs)
+
+
+def test_csv_cache_is_reused_with_compact_dtypes(tmp_path, monkeypatch):
+    loader = write_movielens(tmp_path)
+    assert loader.load_from_csv()
+    parsed = loader.ratings_df.copy()
+    assert (tmp_path / 'ratings.csv.cache.npz').exists()
+
+    assert load_without_parsing(loader, monkeypatch)
+    pd.testing.assert_frame_equal(loader.ratings_df, parsed)
+    assert loader.movies_df['title'].tolist() == ['Toy Story (1995)', 'Heat (1995)']
+    assert str(loader.ratings_df['userId'].dtype) == 'int32' and str(loader.ratings_df['rating'].dtype) == 'float32'
+
+    assert load_without_parsing(loader, monkeypatch, ratings_columns=['userId', 'rating'])
+    assert loader.ratings_df.columns.tolist() == ['userId', 'rating']
+
+
+def test_csv_cache_invalidation(tmp_path, monkeypatch):
+    loader = write_movielens(tmp_path)
+    ratings = tmp_path / 'ratings.csv'
+    assert loader.load_from_csv()
+
+    # A new mtime with the same content keeps the cache (checked by hash, then refreshed)
+    os.utime(ratings, ns=(ratings.stat().st_atime_ns, ratings.stat().st_mtime_ns + 10**9))
+    assert load_without_parsing(loader, monkeypatch)
+
+    # Same size, different content: the hash no longer matches
+    ratings.write_bytes(RATINGS_CSV.replace(b"4.0", b"2.0"))
+    os.utime(ratings, ns=(ratings.stat().st_atime_ns, ratings.stat().st_mtime_ns + 2 * 10**9))
+    assert loader.load_from_csv()
+    assert loader.ratings_df['rating'].tolist() == [2.0, 3.5]
+
+    # A different size
+    ratings.write_bytes(RATINGS_CSV + b"2,1,5.0,964982931\n")
+    assert loader.load_from_csv()
+    assert len(loader.ratings_df) == 3
+    assert load_without_parsing(loader, monkeypatch)
+    assert len(loader.ratings_df) == 3
+
+
+def test_csv_cache_changed_dtypes_are_a_miss(tmp_path, monkeypatch):
+    from src.data_loader import RATINGS_DTYPES, _read_csv_cache
+    loader = write_movielens(tmp_path)
+    assert loader.load_from_csv()
+    ratings = str(tmp_path / 'ratings.csv')
+    assert _read_csv_cache(ratings, RATINGS_DTYPES) is not None
+    assert _read_csv_cache(ratings, {**RATINGS_DTYPES, 'rating': 'float64'}) is None
+
+
+@pytest.mark.parametrize('damage', [
+    lambda data: data[:len(data) // 2],
+    lambda data: b"not a zip file",
+    lambda data: make_archive(),
+])
+def test_damaged_csv_cache_is_rebuilt(tmp_path, monkeypatch, damage):
+    loader = write_movielens(tmp_path)
+    assert loader.load_from_csv()
+    cache = tmp_path / 'ratings.csv.cache.npz'
+    cache.write_bytes(damage(cache.read_bytes()))
+
+    assert loader.load_from_csv()
+    assert loader.ratings_df['rating'].tolist() == [4.0, 3.5]
+    # ... and rewritten, so the next start is fast again
+    assert load_without_parsing(loader, monkeypatch)
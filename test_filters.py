@@ -0,0 +1,84 @@
+"""
+Attribute filter masks checked against a plain per-movie evaluation
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+
+from src.filters import AttributeIndex, split_genres
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Science Fiction']
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(7)
+    n = 203  # not a multiple of 8, so the packed bitmaps have a partial last byte
+    return pd.DataFrame({
+        'genres': ['|'.join(rng.choice(GENRES, rng.integers(0, 3), replace=False)) for _ in range(n)],
+        'language': rng.choice(['en', 'fr', 'ja', None], n),
+        'year': np.where(rng.random(n) < 0.1, -1, rng.integers(1950, 2024, n)),
+        'rating': np.where(rng.random(n) < 0.1, np.nan, np.round(rng.uniform(2, 9.5, n), 1)),
+    })
+
+
+def expected_mask(catalog, filters):
+    """One movie at a time, straight from the filter descriptions"""
+    mask = []
+    for movie in catalog.itertuples():
+        genres = set(split_genres(movie.genres))
+        year, rating = movie.year, movie.rating
+        keep = True
+        if filters.get('genres'):
+            keep &= bool(genres & set(split_genres(filters['genres'])))
+        if filters.get('exclude_genres'):
+            keep &= not genres & set(split_genres(filters['exclude_genres']))
+        if filters.get('languages'):
+            keep &= movie.language in filters['languages']
+        if filters.get('decades'):
+            keep &= year > 0 and year // 10 * 10 in filters['decades']
+        if filters.get('rating_buckets'):
+            keep &= bool(np.isfinite(rating)) and int(rating) in filters['rating_buckets']
+        if filters.get('min_year') is not None:
+            keep &= year >= filters['min_year']
+        if filters.get('max_year') is not None:
+            keep &= 0 < year <= filters['max_year']
+        if filters.get('min_rating') is not None:
+            keep &= bool(rating >= filters['min_rating'])
+        if filters.get('max_rating') is not None:
+            keep &= bool(rating <= filters['max_rating'])
+        mask.append(keep)
+    return np.array(mask)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'genres': ['Action', 'Comedy']},
+    {'genres': ['science fiction']},
+    {'exclude_genres': ['Horror']},
+    {'languages': ['fr', 'ja'], 'min_year': 1990},
+    {'decades': [1980, 2000], 'exclude_genres': ['Drama', 'Action']},
+    {'rating_buckets': [7, 8], 'max_year': 2010},
+    {'min_rating': 6.5, 'max_rating': 8, 'genres': ['Drama']},
+    {'genres': ['Western']},
+])
+def test_mask_matches_per_movie_evaluation(catalog, filters):
+    index = AttributeIndex(catalog['genres'], catalog['language'], catalog['year'].to_numpy(),
+                           catalog['rating'].to_numpy(), len(catalog))
+    mask = index.mask(filters)
+    assert mask.tolist() == expected_mask(catalog, filters).tolist()
+    # Cached masks are shared, so they must not be writable
+    assert index.mask(dict(filters)) is mask and not mask.flags.writeable
+
+
+def test_unknown_filter_and_missing_ratings(catalog):
+    index = AttributeIndex(catalog['genres'], None, catalog['year'].to_numpy(), None, len(catalog))
+    with pytest.raises(ValueError):
+        index.mask({'min_votes': 100})
+    # Without vote averages no movie is known to pass a rating filter
+    assert not index.mask({'min_rating': 5}).any()
@@ -0,0 +1,100 @@
+"""
+Staged artifact build: content-hash cache, downstream reruns and parallel parsing
+"""
+
+import json
+import os
+import pickle
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from src.artifacts import ArtifactStore
+from src.pipeline import build, parse_stage, tags_stage
+
+WORDS = ['space', 'alien', 'love', 'paris', 'murder', 'detective', 'pirate', 'treasure', 'robot', 'war']
+
+
+def tmdb_movies(n, seed=0):
+    """TMDB-style movies CSV rows with cast/crew, as tmdb_5000 merged with credits"""
+    rng = np.random.default_rng(seed)
+
+    def names(count):
+        return json.dumps([{'id': int(i), 'name': f"Name {i}"} for i in rng.integers(0, 50, count)])
+
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'title': [f"Movie {i}" for i in range(1, n + 1)],
+        'overview': [' '.join(rng.choice(WORDS, 6)) + ' running jumped' for _ in range(n)],
+        'genres': [names(2) for _ in range(n)],
+        'keywords': [names(3) for _ in range(n)],
+        'cast': [names(4) for _ in range(n)],
+        'crew': [json.dumps([{'job': 'Director', 'name': f"Director {i % 7}"}, {'job': 'Writer', 'name': 'W'}])
+                 for i in range(n)],
+        'vote_average': rng.uniform(4, 9, n).round(1),
+        'popularity': rng.uniform(0, 100, n),
+    })
+
+
+def run(tmp_path, capsys, **options):
+    """build() over tmp_path/movies.csv; returns {stage: cached?}"""
+    capsys.readouterr()
+    build(str(tmp_path / 'movies.csv'), output_dir=str(tmp_path / 'artifacts'), workers=1, **{'k': 5, **options})
+    lines = capsys.readouterr().out.splitlines()
+    return {match.group(1): line.endswith('(cached)')
+            for line in lines for match in [re.match(r'⏱️ (\w+)', line)] if match and match.group(1) != 'write'}
+
+
+def test_unchanged_input_skips_every_stage(tmp_path, capsys):
+    tmdb_movies(30).to_csv(tmp_path / 'movies.csv', index=False)
+    assert not any(run(tmp_path, capsys).values())
+    assert run(tmp_path, capsys) == {'load': True, 'parse': True, 'tags': True, 'vectorize': True,
+                                     'neighbors': True}
+
+    store = ArtifactStore(str(tmp_path / 'artifacts' / 'store'))
+    assert store.num_movies == 30 and store.has_array('neighbor_ids') and not store.has_array('similarity')
+
+
+def test_changes_rerun_only_downstream_stages(tmp_path, capsys):
+    tmdb_movies(30).to_csv(tmp_path / 'movies.csv', index=False)
+    run(tmp_path, capsys)
+
+    # Neighbor count: only the neighbor lists are recomputed
+    assert run(tmp_path, capsys, k=3) == {'load': True, 'parse': True, 'tags': True, 'vectorize': True,
+                                          'neighbors': False}
+    # Vocabulary size: vectorizing and everything after it
+    assert run(tmp_path, capsys, max_features=20) == {'load': True, 'parse': True, 'tags': True,
+                                                      'vectorize': False, 'neighbors': False}
+    # The dense matrix is one more stage on the cached vectors
+    assert run(tmp_path, capsys, dense=True) == {'load': True, 'parse': True, 'tags': True, 'vectorize': True,
+                                                 'neighbors': True, 'similarity': False}
+
+    # New data: every stage
+    tmdb_movies(31).to_csv(tmp_path / 'movies.csv', index=False)
+    assert not any(run(tmp_path, capsys).values())
+    assert ArtifactStore(str(tmp_path / 'artifacts' / 'store')).num_movies == 31
+
+
+def test_worker_processes_match_the_serial_stages(tmp_path):
+    movies = tmdb_movies(1200).rename(columns={'id': 'movie_id'})
+    serial = parse_stage(movies, workers=1)
+    parallel = parse_stage(movies, workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+    pd.testing.assert_frame_equal(tags_stage(parallel, workers=2), tags_stage(serial, workers=1))
+    assert tags_stage(serial, workers=1)['tags'][0].split()[-1] == 'director0'
+
+
+def test_rebuild_removes_a_stale_catalog_delta(tmp_path, capsys):
+    tmdb_movies(30).to_csv(tmp_path / 'movies.csv', index=False)
+    run(tmp_path, capsys)
+    delta_path = tmp_path / 'artifacts' / 'catalog_delta.pkl'
+    with open(delta_path, 'wb') as f:
+        pickle.dump([('remove', [1])], f)
+
+    run(tmp_path, capsys)
+    assert not delta_path.exists()
+    assert os.path.exists(tmp_path / 'artifacts' / 'vectorizer.pkl')
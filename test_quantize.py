@@ -0,0 +1,65 @@
+"""
+Quantized similarity: growth for added movies and the top-k agreement report
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+
+from src.quantize import QuantizedSimilarity, quantize_similarity, topk_agreement
+
+
+def cosine_matrix(n, features, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((n, features)) * (rng.random((n, features)) < 0.3)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors @ vectors.T
+
+
+@pytest.mark.parametrize('dtype', ['int8', 'float16'])
+def test_grow_stays_quantized_and_accurate(monkeypatch, dtype):
+    full = cosine_matrix(60, 20)
+    old = QuantizedSimilarity(*quantize_similarity(full[:50, :50], dtype))
+
+    # Growing must not dequantize the whole matrix
+    monkeypatch.setattr(QuantizedSimilarity, '__array__', lambda *args, **kwargs: pytest.fail("dequantized"))
+    grown = old.grow(full[50:])
+
+    assert grown.shape == (60, 60) and grown.values.dtype == old.values.dtype
+    kept = np.ones(50, dtype=bool)
+    if dtype == 'int8':
+        kept = np.abs(full[:50, 50:]).max(axis=1) <= old.scales * 127
+    np.testing.assert_array_equal(grown.values[:50, :50][kept], old.values[kept])
+
+    tolerance = 1 / 254 if dtype == 'int8' else 1e-3
+    assert np.abs(grown[np.arange(60)] - full).max() <= tolerance + 1e-6
+
+
+def test_grow_rescales_only_rows_whose_range_is_exceeded():
+    old = QuantizedSimilarity(*quantize_similarity(np.array([[0.5, 0.1], [0.1, 0.2]]), 'int8'))
+    grown = old.grow(np.array([[0.9, 0.0, 1.0]]))
+
+    assert grown.scales[0] == pytest.approx(0.9 / 127)
+    assert grown.scales[1] == old.scales[1]
+    np.testing.assert_allclose(grown[np.arange(3)], [[0.5, 0.1, 0.9], [0.1, 0.2, 0.0], [0.9, 0.0, 1.0]],
+                               atol=0.9 / 254)
+
+
+def test_agreement_reports_tied_rows():
+    # Scores from few distinct values: many rows have ties in their top 10
+    rng = np.random.default_rng(3)
+    reference = np.round(rng.random((80, 80)), 1)
+    # Rounding errors far below the gap between values only reorder tied movies
+    perturbed = reference + rng.normal(0, 1e-4, reference.shape)
+
+    report = topk_agreement(reference, perturbed, k=10)
+    assert report['tied_rows'] == 1.0
+    assert report['exact_up_to_ties'] == 1.0
+    assert report['exact_lists'] < 0.5
+
+    distinct = cosine_matrix(80, 40, seed=1)
+    report = topk_agreement(distinct, distinct, k=10)
+    assert (report['exact_lists'], report['exact_up_to_ties'], report['overlap_at_k']) == (1.0, 1.0, 1.0)
@@ -0,0 +1,130 @@
+"""
+Hybrid re-ranking and MMR diversification of recommendation candidates
+"""
+
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+
+from src.ranking import DEFAULT_WEIGHTS, HybridRanker, mmr_order
+from src.recommender import MovieRecommender
+from test_recommender import write_artifacts
+
+
+def test_blend_is_the_weighted_sum_of_scaled_signals():
+    popularity = np.array([0.0, 9.0, 99.0, 999.0])
+    votes = np.array([5.0, 6.0, 7.0, 9.0])
+    years = np.array([1990, 2000, 2010, 2020])
+    ranker = HybridRanker(popularity, votes, years, 4)
+
+    log_popularity = np.log1p(popularity)
+    expected_features = np.column_stack([log_popularity / log_popularity.max(), (votes - 5) / 4, (years - 1990) / 30])
+    np.testing.assert_allclose(ranker.features, expected_features, rtol=1e-6)
+
+    candidates, similarity = np.array([3, 0, 2]), np.array([0.2, 0.9, 0.5])
+    weights = {'similarity': 0.5, 'popularity': 0.2, 'vote_average': 0.2, 'recency': 0.1}
+    expected = 0.5 * similarity + expected_features[candidates] @ np.array([0.2, 0.2, 0.1])
+    np.testing.assert_allclose(ranker.blend(candidates, similarity, weights), expected, rtol=1e-6)
+
+    # Similarity alone keeps the similarity order; popularity alone follows popularity
+    assert ranker.rerank(candidates, similarity, 3, {'similarity': 1, 'popularity': 0, 'vote_average': 0,
+                                                     'recency': 0})[0].tolist() == [0, 2, 3]
+    assert ranker.rerank(candidates, similarity, 2, {'similarity': 0, 'popularity': 1, 'vote_average': 0,
+                                                     'recency': 0})[0].tolist() == [3, 2]
+
+    # Unspecified weights come from the defaults; unknown names are rejected
+    assert HybridRanker.resolve_weights({'popularity': 0.5}) == {**DEFAULT_WEIGHTS, 'popularity': 0.5}
+    with pytest.raises(ValueError):
+        HybridRanker.resolve_weights({'budget': 1.0})
+
+
+def test_missing_signals_fall_back_to_neutral_values():
+    # No popularity column, one unknown vote average, an unknown (0) year
+    ranker = HybridRanker(None, np.array([5.0, np.nan, 9.0]), np.array([2000, 2010, 0]), 3)
+    assert ranker.features[:, 0].tolist() == [0, 0, 0]
+    assert ranker.features[:, 1].tolist() == [0, 0.5, 1]
+    assert ranker.features[:, 2].tolist() == [0, 1, 0.5]
+
+    # Without any metadata the blend is the similarity order
+    bare = HybridRanker(None, None, None, 3)
+    assert bare.rerank(np.array([0, 1, 2]), np.array([0.1, 0.7, 0.4]), 3)[0].tolist() == [1, 2, 0]
+
+
+def test_ties_keep_candidate_order_and_excluded_stay_last():
+    ranker = HybridRanker(np.array([5.0, 5.0, 5.0, 5.0]), None, None, 4)
+    candidates = np.array([3, 1, 2, 0])
+    similarity = np.array([0.5, -np.inf, 0.5, 0.5])
+
+    ranked, scores = ranker.rerank(candidates, similarity, 4)
+    assert ranked.tolist() == [3, 2, 0, 1] and np.isneginf(scores[-1])
+    assert ranker.rerank(candidates, similarity, 4)[0].tolist() == ranked.tolist()
+
+    # Batches rank each row the same way
+    batch, _ = ranker.rerank(np.stack([candidates, candidates[::-1]]), np.stack([similarity, similarity[::-1]]), 3)
+    assert batch.tolist() == [[3, 2, 0], [0, 2, 3]]
+
+
+def test_recommend_with_hybrid_ranking(tmp_path):
+    movies = write_artifacts(str(tmp_path))
+    # Film 3 (a weaker match for Film 0) is by far the most popular
+    full = pd.DataFrame({'movie_id': movies['movie_id'], 'popularity': np.where(movies.index == 3, 1000.0, 1.0),
+                         'vote_average': 6.0, 'year': 2000})
+    with open(os.path.join(str(tmp_path), 'movies_full.pkl'), 'wb') as f:
+        pickle.dump(full, f)
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+
+    plain = recommender.recommend('Film 0', 3)['title'].tolist()
+    boosted = recommender.recommend('Film 0', 3, hybrid=True, rank_weights={'similarity': 0.5, 'popularity': 0.5})
+    assert 'Film 3' not in plain[:1] and boosted['title'].tolist()[0] == 'Film 3'
+    assert recommender.recommend('Film 0', 3, hybrid=True, rank_weights={
+        'similarity': 1, 'popularity': 0, 'vote_average': 0, 'recency': 0})['title'].tolist() == plain
+
+
+def near_duplicates():
+    """Six candidates: three near-identical sequels (0-2) scoring highest, then three distinct movies"""
+    relevance = np.array([0.95, 0.94, 0.93, 0.80, 0.70, 0.60])
+    pairwise = np.eye(6)
+    pairwise[:3, :3] = 0.98
+    np.fill_diagonal(pairwise, 1.0)
+    return relevance, pairwise
+
+
+def test_no_diversity_keeps_relevance_order():
+    # diversity is 1 - the usual MMR lambda: diversity=0 is lambda=1, pure relevance
+    relevance, pairwise = near_duplicates()
+    assert mmr_order(relevance, pairwise, 6, diversity=0.0, time_budget_ms=None).tolist() == [0, 1, 2, 3, 4, 5]
+
+    tied = np.array([0.5, 0.9, 0.5, 0.9])
+    assert mmr_order(tied, np.eye(4), 4, diversity=0.0, time_budget_ms=None).tolist() == [1, 3, 0, 2]
+
+
+def test_diversity_spreads_near_duplicates():
+    relevance, pairwise = near_duplicates()
+    # Pure diversity (lambda=0): after one sequel, every distinct movie comes before the other two
+    assert mmr_order(relevance, pairwise, 4, diversity=1.0, time_budget_ms=None).tolist()[1:] == [3, 4, 5]
+    # A balanced trade-off keeps the best sequel first, then the distinct movies
+    assert mmr_order(relevance, pairwise, 4, diversity=0.5, time_budget_ms=None).tolist() == [0, 3, 4, 5]
+
+
+def test_exhausted_budget_falls_back_to_relevance_order():
+    relevance, pairwise = near_duplicates()
+    assert mmr_order(relevance, pairwise, 4, diversity=0.5, time_budget_ms=0.0).tolist() == [0, 1, 2, 3]
+    assert mmr_order(relevance, pairwise, 10, diversity=0.5, time_budget_ms=0.0).tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_recommend_with_diversity(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    plain = recommender.recommend('Film 0', 4)
+    assert recommender.recommend('Film 0', 4, diversity=0.0).equals(plain)
+
+    diverse = recommender.recommend('Film 0', 4, diversity=0.8, diversity_budget_ms=1000)['title'].tolist()
+    assert diverse[0] == plain['title'][0] and diverse != plain['title'].tolist()
+    assert recommender.recommend('Film 0', 4, diversity=0.8, diversity_budget_ms=0)['title'].tolist() == \
+        plain['title'].tolist()
@@ -0,0 +1,270 @@
+"""
+Regression tests for MovieRecommender on a small catalog built in a temp directory
+"""
+
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+
+from src.recommender import MovieRecommender
+from src.tag_vectors import build_tag_matrix
+
+TAGS = [
+    'space alien war laser', 'space alien ship crew', 'space ship laser robot', 'robot future city war',
+    'love paris romance wedding', 'romance wedding comedy family', 'family comedy dog holiday',
+    'dog holiday snow christmas', 'detective murder city night', 'murder mystery detective island',
+    'island pirate ship treasure', 'pirate treasure map adventure',
+]
+
+
+def write_artifacts(artifacts_dir, tags=TAGS):
+    """movie_list.pkl, similarity.pkl and vectorizer.pkl as the notebook writes them"""
+    os.makedirs(artifacts_dir, exist_ok=True)
+    movies = pd.DataFrame({
+        'movie_id': np.arange(100, 100 + len(tags)),
+        'title': [f"Film {i}" for i in range(len(tags))],
+        'tags': tags,
+    })
+    tag_matrix, vectorizer = build_tag_matrix(movies['tags'])
+    similarity = (tag_matrix @ tag_matrix.T).toarray().astype(np.float64)
+
+    for name, value in [('movie_list.pkl', movies), ('similarity.pkl', similarity), ('vectorizer.pkl', vectorizer)]:
+        with open(os.path.join(artifacts_dir, name), 'wb') as f:
+            pickle.dump(value, f)
+    return movies
+
+
+@pytest.mark.parametrize('mode', ['dense', 'neighbors', 'sparse'])
+def test_added_clone_never_recommends_itself(tmp_path, mode):
+    movies = write_artifacts(str(tmp_path))
+    if mode != 'dense':
+        from src.neighbors import NeighborIndex
+        from src.tag_vectors import TAG_MATRIX_NAME, save_tag_matrix
+        tag_matrix, _ = build_tag_matrix(movies['tags'])
+        save_tag_matrix(os.path.join(str(tmp_path), TAG_MATRIX_NAME), tag_matrix)
+        NeighborIndex.from_tag_matrix(tag_matrix, k=6).save(os.path.join(str(tmp_path), 'neighbors.npz'))
+
+    recommender = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    clone = pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [TAGS[0]]})
+    assert recommender.add_movies(clone) == 1
+
+    for title in ['Film 0', 'New Clone']:
+        single = recommender.recommend(title, 5)['title'].tolist()
+        batch = recommender.recommend_many([title], 5)[title]['title'].tolist()
+        assert title not in single and title not in batch
+        assert len(single) == 5 and single == batch
+
+    # The persisted delta is replayed on restart
+    restarted = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    assert 'New Clone' not in restarted.recommend('New Clone', 5)['title'].tolist()
+    assert restarted.recommend('Film 0', 1)['title'].tolist() == ['New Clone']
+
+
+def test_added_movies_reach_the_approximate_index(tmp_path):
+    from src.ann import ANN_INDEX_NAME, IVFIndex
+    movies = write_artifacts(str(tmp_path))
+    tag_matrix, _ = build_tag_matrix(movies['tags'])
+    IVFIndex.build(tag_matrix, nlist=3).save(os.path.join(str(tmp_path), ANN_INDEX_NAME))
+
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    clone = pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [TAGS[0]]})
+    recommender.add_movies(clone)
+    assert recommender.recommend('Film 0', 1, approximate=True)['title'].tolist() == ['New Clone']
+
+    restarted = MovieRecommender(artifacts_dir=str(tmp_path))
+    assert restarted.recommend('Film 0', 1, approximate=True)['title'].tolist() == ['New Clone']
+    assert restarted.recommend('New Clone', 1, approximate=True)['title'].tolist() == ['Film 0']
+
+
+def test_dense_recommendations_match_the_notebook(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    similarity = recommender.similarity
+
+    for index, title in enumerate(recommender.new_df['title']):
+        # The notebook: sort the whole row and skip the first entry (the movie itself)
+        ranked = sorted(list(enumerate(similarity[index])), reverse=True, key=lambda x: x[1])[1:6]
+        expected = [recommender.new_df['title'].iloc[i] for i, _ in ranked]
+        assert recommender.recommend(title, 5)['title'].tolist() == expected
+        assert recommender.recommend_many([title], 5)[title]['title'].tolist() == expected
+
+
+@pytest.mark.parametrize('mode', ['dense', 'sparse'])
+def test_filters_apply_before_top_k(tmp_path, mode):
+    movies = write_artifacts(str(tmp_path))
+    if mode == 'sparse':
+        from src.tag_vectors import TAG_MATRIX_NAME, save_tag_matrix
+        save_tag_matrix(os.path.join(str(tmp_path), TAG_MATRIX_NAME), build_tag_matrix(movies['tags'])[0])
+    years = 1990 + np.arange(len(movies)) * 3
+    full = pd.DataFrame({'movie_id': movies['movie_id'], 'year': years,
+                         'vote_average': np.linspace(5, 8.5, len(movies)),
+                         'genres': ['Drama|Horror' if i % 3 == 0 else 'Comedy' for i in range(len(movies))]})
+    with open(os.path.join(str(tmp_path), 'movies_full.pkl'), 'wb') as f:
+        pickle.dump(full, f)
+
+    recommender = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    filters = {'min_year': 2000, 'exclude_genres': ['horror']}
+    passing = set(movies['title'][(years >= 2000) & (np.arange(len(movies)) % 3 != 0)])
+
+    result = recommender.recommend('Film 1', 4, filters=filters)['title'].tolist()
+    assert len(result) == 4 and set(result) <= passing and 'Film 1' not in result
+
+    # Same as ranking the full row and keeping the first four that pass
+    unfiltered = recommender.recommend('Film 1', len(movies) - 1)['title'].tolist()
+    assert result == [title for title in unfiltered if title in passing][:4]
+
+
+def test_explanations_follow_movie_ids_for_shared_titles(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    # Two remakes share a title; only the second one shares the seed's space tags
+    remakes = pd.DataFrame({'movie_id': [500, 501], 'title': ['Remake', 'Remake'],
+                            'tags': ['love paris romance', 'space alien laser']})
+    recommender.add_movies(remakes, persist=False)
+
+    result = recommender.recommend('Film 0', 3)
+    assert 501 in result['movie_id'].tolist() and 500 not in result['movie_id'].tolist()
+
+    explanations = recommender.explain_recommendations('Film 0', result['movie_id'].tolist())
+    assert {name for name, _ in explanations[501]} >= {'space', 'alien', 'laser'}
+    assert 500 not in explanations
+
+
+def rebuild(path_names, artifacts_dir):
+    """Give rebuilt files a later mtime, as a rebuild a moment later would"""
+    for name in path_names:
+        path = os.path.join(artifacts_dir, name)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_lazy_artifacts_come_from_the_loaded_build(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    version = recommender.model_version
+
+    # Rebuilt with other tags before the vectorizer was first needed
+    write_artifacts(str(tmp_path), tags=TAGS[4:] + TAGS[:4])
+    rebuild(['movie_list.pkl', 'similarity.pkl', 'vectorizer.pkl'], str(tmp_path))
+
+    assert recommender.explain_recommendations('Film 0', [101]) == {}
+    clone = pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [TAGS[0]]})
+    assert recommender.add_movies(clone, persist=False) == 0
+    assert recommender.model_version == version
+
+    # A reload serves (and explains with) the rebuilt artifacts
+    reloaded = MovieRecommender(artifacts_dir=str(tmp_path))
+    assert reloaded.model_version != version
+    assert {name for name, _ in reloaded.explain_recommendations('Film 0', [101])[101]} >= {'romance', 'wedding'}
+
+
+def test_lazy_tag_vectors_come_from_the_loaded_store(tmp_path):
+    from src.artifacts import export_artifacts
+    movies = write_artifacts(str(tmp_path))
+    store_dir = os.path.join(str(tmp_path), 'store')
+
+    def export(tags):
+        tag_matrix, _ = build_tag_matrix(tags)
+        movies['tags'] = tags
+        export_artifacts(store_dir, movies, similarity=(tag_matrix @ tag_matrix.T).toarray(), tag_matrix=tag_matrix)
+
+    export(TAGS)
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    assert recommender.artifact_format == 'mmap'
+
+    export(TAGS[4:] + TAGS[:4])
+    rebuild([os.path.join('store', 'manifest.json')], str(tmp_path))
+    assert not recommender._ensure_tag_matrix() and recommender._movie_tags() is None
+    assert recommender.recommend('Film 0', 3, diversity=0.5).empty is False
+
+
+def test_unreadable_catalog_delta_fails_the_load(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    clone = pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [TAGS[0]]})
+    recommender.add_movies(clone)
+    delta = tmp_path / 'catalog_delta.pkl'
+    delta.write_bytes(delta.read_bytes()[:40])
+
+    broken = MovieRecommender(artifacts_dir=str(tmp_path))
+    assert not broken._models_loaded() and broken.model_version is None
+    assert broken.recommend('Film 0', 3).empty
+    assert broken.check_models() == ['movie list not loaded']
+
+
+def test_catalog_delta_is_replaced_atomically(tmp_path, monkeypatch):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    recommender.add_movies(pd.DataFrame({'movie_id': [999], 'title': ['New Clone'], 'tags': [TAGS[0]]}))
+    saved = (tmp_path / 'catalog_delta.pkl').read_bytes()
+
+    def crash(events, f):
+        f.write(b'\x80\x04partial')
+        raise OSError('disk full')
+    monkeypatch.setattr('src.recommender.pickle.dump', crash)
+    with pytest.raises(OSError):
+        recommender.remove_movies([999])
+    assert (tmp_path / 'catalog_delta.pkl').read_bytes() == saved
+
+    monkeypatch.undo()
+    assert MovieRecommender(artifacts_dir=str(tmp_path)).recommend('Film 0', 1)['title'].tolist() == ['New Clone']
+
+
+@pytest.mark.parametrize('mode', ['dense', 'neighbors', 'sparse'])
+def test_profile_never_recommends_seeds_or_excluded_titles(tmp_path, mode):
+    movies = write_artifacts(str(tmp_path))
+    if mode != 'dense':
+        from src.neighbors import NeighborIndex
+        from src.tag_vectors import TAG_MATRIX_NAME, save_tag_matrix
+        tag_matrix, _ = build_tag_matrix(movies['tags'])
+        save_tag_matrix(os.path.join(str(tmp_path), TAG_MATRIX_NAME), tag_matrix)
+        NeighborIndex.from_tag_matrix(tag_matrix, k=6).save(os.path.join(str(tmp_path), 'neighbors.npz'))
+
+    recommender = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+    result = recommender.recommend_for_profile(['Film 0', 'Film 1'], len(movies), exclude=['Film 2', 'Unknown'])
+    titles = result['title'].tolist()
+    assert titles[0] == 'Film 3'
+    assert not {'Film 0', 'Film 1', 'Film 2'} & set(titles)
+
+    # Removed movies stay out as well
+    recommender.remove_movies([103])
+    assert 'Film 3' not in recommender.recommend_for_profile(['Film 0', 'Film 1'], len(movies))['title'].tolist()
+
+
+@pytest.mark.parametrize('mode', ['dense', 'sparse'])
+def test_negative_ratings_push_similar_movies_down(tmp_path, mode):
+    movies = write_artifacts(str(tmp_path))
+    if mode == 'sparse':
+        from src.tag_vectors import TAG_MATRIX_NAME, save_tag_matrix
+        save_tag_matrix(os.path.join(str(tmp_path), TAG_MATRIX_NAME), build_tag_matrix(movies['tags'])[0])
+    recommender = MovieRecommender(mode=mode, artifacts_dir=str(tmp_path))
+
+    liked = recommender.recommend_for_profile({'Film 0': 5.0}, len(movies))
+    disliked = recommender.recommend_for_profile({'Film 0': 5.0, 'Film 8': -5.0}, len(movies))
+    liked_scores = dict(zip(liked['title'], liked['similarity_score']))
+    disliked_scores = dict(zip(disliked['title'], disliked['similarity_score']))
+
+    # Film 3 shares 'city' with the disliked detective movie, Film 9 only resembles that one
+    assert disliked_scores['Film 3'] < liked_scores['Film 3']
+    assert disliked['title'].tolist()[-1] == 'Film 9' and disliked_scores['Film 9'] < 0
+    assert 'Film 8' not in disliked_scores
+
+
+def test_empty_or_unknown_profile_returns_nothing(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+
+    assert recommender.recommend_for_profile([], 5).empty
+    assert recommender.recommend_for_profile({}, 5).empty
+    assert recommender.recommend_for_profile(['Unknown', 'Also Unknown'], 5).empty
+    assert recommender.recommend_for_profile({'Film 0': 0.0, 'Film 1': 0}, 5).empty
+
+    # Unknown titles are skipped when a known one is left
+    assert recommender.recommend_for_profile(['Unknown', 'Film 0'], 3)['title'].tolist() == \
+        recommender.recommend_for_profile(['Film 0'], 3)['title'].tolist()
@@ -0,0 +1,88 @@
+"""
+ModelReloader: checked swaps, one reload at a time and a debounced artifact watcher
+"""
+
+import sys
+import threading
+import time
+
+sys.path.append('.')
+
+from src.reload import ModelReloader
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_failed_check_keeps_the_old_model():
+    served = ['old']
+    reloader = ModelReloader(load=lambda: 'broken', swap=served.append,
+                             check=lambda model: ['no recommendations'] if model == 'broken' else [])
+    assert reloader.reload(wait=True)
+    assert served == ['old']
+    assert reloader.status['state'] == 'failed' and reloader.status['problems'] == ['no recommendations']
+    assert reloader.reloads == 0
+
+    # A load that raises is rejected the same way
+    def fail():
+        raise FileNotFoundError('similarity.pkl')
+    reloader.load = fail
+    assert reloader.reload(wait=True)
+    assert served == ['old'] and reloader.status['problems'] == ['similarity.pkl']
+
+    reloader.load = lambda: 'new'
+    assert reloader.reload(wait=True)
+    assert served == ['old', 'new'] and reloader.status['state'] == 'ok' and reloader.reloads == 1
+
+
+def test_reloads_do_not_run_concurrently():
+    release = threading.Event()
+    running, peak, swapped = [0], [0], []
+    lock = threading.Lock()
+
+    def load():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return 'model'
+
+    reloader = ModelReloader(load=load, swap=swapped.append)
+    assert reloader.reload()
+    assert wait_until(lambda: running[0] == 1)
+    assert reloader.status['state'] == 'loading'
+    assert not reloader.reload() and not reloader.reload()
+
+    release.set()
+    assert wait_until(lambda: reloader.status['state'] == 'ok')
+    assert peak[0] == 1 and swapped == ['model']
+    assert reloader.reload(wait=True) and swapped == ['model', 'model']
+
+
+def test_watcher_waits_for_artifacts_to_settle():
+    # Versions seen by successive polls: loaded as 'a', then written over three polls, then still
+    versions = iter(['a', 'b', 'c', 'd', 'e', 'e', 'e'])
+    seen = []
+
+    def version():
+        seen.append(next(versions, 'e'))
+        return seen[-1]
+
+    loads = []
+    reloader = ModelReloader(load=lambda: loads.append(list(seen)) or 'model', swap=lambda model: None)
+    reloader.watch(version, interval=0.01)
+    try:
+        assert wait_until(lambda: len(seen) >= 10)
+    finally:
+        reloader.stop()
+
+    # One reload, only once 'e' held still for a poll; none while the files kept changing
+    assert len(loads) == 1
+    assert loads[0] == ['a', 'b', 'c', 'd', 'e', 'e']
+    assert reloader.reloads == 1
@@ -0,0 +1,55 @@
+"""
+Synthetic ratings: per-user counts, no repeated movies, and the built-in sample dataset
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+
+from src import synthetic
+from src.data_loader import MovieDataLoader
+from src.synthetic import generate_movies, generate_ratings
+
+
+@pytest.mark.parametrize('exact_cells', [synthetic.EXACT_SAMPLING_CELLS, 0])
+def test_uniform_counts_without_repeats(monkeypatch, exact_cells):
+    monkeypatch.setattr(synthetic, 'EXACT_SAMPLING_CELLS', exact_cells)
+    ratings = generate_ratings(np.arange(1, 101), np.full(100, 3.5), 2000, min_ratings=10, max_ratings=50,
+                               counts='uniform', chunk_users=700, seed=1)
+    counts = ratings.groupby('userId').size()
+
+    assert not ratings.duplicated(['userId', 'movieId']).any()
+    assert counts.index.tolist() == list(range(1, 2001))
+    assert counts.max() <= 50 and counts.mean() == pytest.approx(30, abs=1)
+    if exact_cells:
+        # Exact sampling gives every user their drawn count
+        assert counts.min() == 10
+    assert ratings['rating'].between(0.5, 5).all() and (ratings['rating'] * 2 % 1 == 0).all()
+
+
+def test_popularity_skew_and_long_tail():
+    movies = generate_movies(500, exponent=1.0, seed=2)
+    ratings = generate_ratings(movies['movieId'], movies['quality'], 3000, popularity=movies['popularity'],
+                               ratings_per_user=20, seed=3)
+    by_movie = ratings['movieId'].value_counts()
+    most_popular = movies['movieId'][movies['popularity'].idxmax()]
+    assert by_movie.index[0] == most_popular
+    counts = ratings.groupby('userId').size()
+    assert counts.max() > 3 * counts.median()
+
+
+def test_sample_dataset_keeps_its_distribution():
+    data = MovieDataLoader().create_enhanced_sample_data()
+    ratings, movies = data['ratings'], data['movies']
+    counts = ratings.groupby('userId').size()
+
+    assert len(movies) == 100 and ratings['userId'].nunique() == 1000
+    assert counts.between(10, 50).all() and counts.mean() == pytest.approx(30, abs=1.5)
+    assert not ratings.duplicated(['userId', 'movieId']).any()
+    # Ratings follow the IMDb rating (0-10) on the 0.5-5 scale
+    mean_by_movie = ratings.groupby('movieId')['rating'].mean()
+    imdb = movies.set_index('movieId')['imdb_rating'] / 2
+    assert np.corrcoef(mean_by_movie, imdb[mean_by_movie.index])[0, 1] > 0.8
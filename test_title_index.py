@@ -0,0 +1,131 @@
+"""
+Title lookup and ranked partial-title search
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+from src.recommender import MovieRecommender
+from src.title_index import TitleIndex, TrigramSearchIndex, normalize_title, title_year
+from test_recommender import write_artifacts
+
+TITLES = ['Dark Water', 'The Dark Knight', 'Dark', 'Darkman', 'In the Dark', 'Dark City', 'Bright Star', 'Dark']
+
+
+def test_titles_fold_accents_case_and_punctuation():
+    assert normalize_title('Amélie') == normalize_title(' AMÉLIE! ') == 'amelie'
+    assert normalize_title('Crouching Tiger, Hidden Dragon') == 'crouching tiger hidden dragon'
+    assert normalize_title('WALL·E') == 'wall e'
+
+    index = TitleIndex(['Amélie', 'Léon: The Professional', 'Se7en'])
+    assert index.lookup('amelie') == 0 and index.lookup(' AMÉLIE! ') == 0
+    assert index.lookup('leon the professional') == 1 and index.lookup('LEON -- THE PROFESSIONAL') == 1
+    assert index.lookup('se7en') == 2 and index.lookup('Seven') is None
+
+
+def test_year_suffix_is_an_alias():
+    index = TitleIndex(['Toy Story (1995)', 'Heat (1995)', 'Heat'])
+    assert title_year('Toy Story (1995)') == 1995 and title_year('Toy Story') is None
+    assert index.lookup('Toy Story (1995)') == 0
+    assert index.lookup('toy story') == 0
+    assert index.rows('Heat') == [1, 2]
+
+
+def test_duplicate_titles_are_narrowed_down_by_year():
+    titles = ['Dune', 'Little Women', 'Dune', 'Little Women', 'Little Women']
+    years = [1984, 1994, 2021, 2019, 1949]
+    index = TitleIndex(titles, years=years)
+
+    assert index.lookup('Dune') == 0
+    assert index.lookup('Dune', year=2021) == 2
+    assert index.lookup('Dune (2021)') == 2
+    assert index.lookup('Little Women', year=2019) == 3 and index.lookup('little women (1949)') == 4
+    # An unknown year falls back to the first row
+    assert index.lookup('Dune', year=2000) == 0
+
+    # Years may be resolved lazily, and only when a duplicate title needs them
+    calls = []
+
+    def load_years():
+        calls.append(1)
+        return years
+    lazy = TitleIndex(titles + ['Heat'], years=load_years)
+    assert lazy.lookup('Heat', year=1995) == 5 and not calls
+    assert lazy.lookup('Dune', year=2021) == 2 and len(calls) == 1
+    assert lazy.lookup('Little Women', year=2019) == 3 and len(calls) == 1
+
+
+def test_movie_id_wins_over_the_title():
+    index = TitleIndex(['Dune', 'Dune', 'Heat'], movie_ids=[438631, 841, 949])
+    assert index.lookup('Dune', movie_id=841) == 1
+    assert index.lookup('Heat', movie_id=841) == 1
+    assert index.lookup(movie_id=949) == 2
+    assert index.lookup('Dune', movie_id=12345) is None
+    assert index.lookup() is None
+
+
+def test_inactive_rows_are_left_out():
+    index = TitleIndex(['Dune', 'Dune', 'Heat'], movie_ids=[438631, 841, 949],
+                       years=[1984, 2021, 1995], active=np.array([False, True, True]))
+    assert index.lookup('Dune') == 1 and index.lookup('Dune', year=1984) == 1
+    assert index.lookup(movie_id=438631) is None
+
+
+def test_search_ranks_exact_then_prefix_then_substring():
+    popularity = [5, 90, 1, 50, 99, 5, 100, 2]
+    index = TrigramSearchIndex(TITLES, popularity)
+    ranked = [TITLES[row] for row in index.search('dark', 10)]
+
+    # Exact (by popularity), prefix (Darkman before the tied Dark Water / Dark City), substring
+    assert ranked == ['Dark', 'Dark', 'Darkman', 'Dark Water', 'Dark City', 'In the Dark', 'The Dark Knight']
+    assert index.search('dark', 10)[:2].tolist() == [7, 2]
+    assert index.search('dark', 3).tolist() == [7, 2, 3]
+    assert index.search('ark', 10).tolist() == [4, 1, 3, 0, 5, 7, 2]
+
+
+def test_popularity_ties_keep_catalog_order():
+    index = TrigramSearchIndex(['Alien', 'Aliens', 'Alien Nation', 'The Alien'])
+    assert index.search('alien', 10).tolist() == [0, 1, 2, 3]
+    assert index.search('lien', 2).tolist() == [0, 1]
+
+
+def test_short_queries_match_prefixes_only():
+    index = TrigramSearchIndex(TITLES, [5, 90, 1, 50, 99, 5, 100, 2])
+    assert [TITLES[row] for row in index.search('da', 10)] == ['Darkman', 'Dark Water', 'Dark City', 'Dark', 'Dark']
+    assert [TITLES[row] for row in index.search('d', 2)] == ['Darkman', 'Dark Water']
+    assert index.search('ar', 10).tolist() == []
+
+
+def test_search_matches_a_brute_force_ranking():
+    rng = np.random.default_rng(0)
+    syllables = ['ka', 'ri', 'on', 'dar', 'ing', 'the', 'lo', 've', 'ring']
+    titles = [' '.join(''.join(rng.choice(syllables, rng.integers(1, 4))) for _ in range(rng.integers(1, 4)))
+              for _ in range(2000)]
+    popularity = rng.integers(0, 4, len(titles)).astype(float)
+    index = TrigramSearchIndex(titles, popularity)
+
+    for query in ['ka', 'dar', 'ring', 'ingka', 'on the', 'rilo', 'lo ve', 'x', 'dari']:
+        matches = []
+        for row, key in enumerate(index.keys):
+            tier = 0 if key == query else 1 if key.startswith(query) else 2 if len(query) >= 3 and query in key else None
+            if tier is not None:
+                matches.append((tier, -popularity[row], row))
+        for limit in (1, 10, 100):
+            assert index.search(query, limit).tolist() == [row for _, _, row in sorted(matches)[:limit]]
+
+
+def test_recommender_builds_the_search_index_at_load(tmp_path):
+    write_artifacts(str(tmp_path))
+    recommender = MovieRecommender(artifacts_dir=str(tmp_path))
+    assert recommender._search_index_build is not None
+    assert recommender.search_movies('film 1', 3)['title'].tolist() == ['Film 1', 'Film 10', 'Film 11']
+
+    # Catalog changes rebuild it without the removed movies
+    recommender.add_movies(pd.DataFrame({'movie_id': [999], 'title': ['Film 100'], 'tags': ['space']}),
+                           persist=False)
+    recommender.remove_movies([101], persist=False)
+    assert recommender.search_movies('film 1', 3)['title'].tolist() == ['Film 10', 'Film 11', 'Film 100']
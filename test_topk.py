@@ -0,0 +1,37 @@
+"""
+Top-k selection must reproduce the notebook's sorted(enumerate(...)) order, ties included
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+
+from src.utils.topk import top_k_indices, top_k_indices_batch
+
+
+def baseline_top_k(scores, k):
+    """The notebook's ranking: stable sort by score, descending"""
+    return [i for i, _ in sorted(enumerate(scores), reverse=True, key=lambda x: x[1])[:k]]
+
+
+@pytest.mark.parametrize('k', [1, 5, 10, 49, 50, 80])
+def test_ties_follow_baseline_order(k):
+    rng = np.random.default_rng(k)
+    # Few distinct values, so most of the k-th place is shared by many movies
+    scores = rng.integers(0, 6, size=(40, 50)).astype(np.float64) / 5
+
+    batch = top_k_indices_batch(scores, k)
+    for row, expected in zip(scores, batch):
+        assert top_k_indices(row, k).tolist() == baseline_top_k(row, k)
+        assert expected.tolist() == baseline_top_k(row, k)
+
+
+def test_float32_rows_and_edge_sizes():
+    scores = np.array([0.5, 0.25, 0.5, 1.0, 0.25], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [3, 0, 2]
+    assert top_k_indices(scores, 0).tolist() == []
+    assert top_k_indices(scores, 100).tolist() == baseline_top_k(scores, 5)
+    assert top_k_indices_batch(scores[None, :], 2).tolist() == [[3, 0]]
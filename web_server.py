@@ -22,7 +22,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
     from src.data_loader import MovieDataLoader
     from src.ai.gemini import GeminiMovieRecommender
-    from src.recommender import MovieRecommender
+    from src.recommender import MovieRecommender, artifact_files_version, available_mode
+    from src.explain import summarize
+    from src.cache import ResultCache
+    from src.title_index import normalize_title
+    from src.reload import ModelReloader
 except ImportError as e:
     print(f"Warning: Could not import modules: {e}")
 
@@ -34,6 +38,8 @@ movies_df = None
 gemini_ai = None
 movie_recommender = None
 tmdb_api_key = None
+result_cache = None
+model_reloader = None
 
 # List of TMDB API keys (replace with your actual keys)
 TMDB_API_KEYS = [
@@ -43,7 +49,7 @@ TMDB_API_KEYS = [
 
 def initialize_data():
     """Initialize TMDB API and AI models"""
-    global movies_df, gemini_ai, movie_recommender, tmdb_api_key
+    global movies_df, gemini_ai, movie_recommender, tmdb_api_key, result_cache, model_reloader
     
     try:
         # Randomly select a TMDB API key from the list
@@ -79,12 +85,46 @@ def initialize_data():
                 print(f"⚠️ Gemini AI initialization failed: {e}")
                 gemini_ai = None
         
+        # Result cache shared by the recommender and the API routes;
+        # RESULT_CACHE_PATH points several workers at one SQLite file
+        result_cache = ResultCache(
+            max_entries=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", "600")),
+            path=os.getenv("RESULT_CACHE_PATH")
+        )
+        
         # Initialize movie recommender
-        movie_recommender = MovieRecommender()
+        movie_recommender = create_recommender()
+        
+        # Rebuilt artifacts are loaded in the background and swapped in once checked;
+        # MODEL_WATCH_INTERVAL > 0 also polls the artifact files for changes (the same
+        # files the model version is built from, so every reload also changes cache keys)
+        model_reloader = ModelReloader(load=create_recommender,
+                                       swap=swap_recommender,
+                                       check=lambda recommender: recommender.check_models())
+        watch_interval = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+        if watch_interval > 0:
+            model_reloader.watch(lambda: artifact_files_version('artifacts'), watch_interval)
+            print(f"👀 Watching artifacts for changes every {watch_interval:g}s")
         
     except Exception as e:
         print(f"❌ Error initializing data: {e}")
 
+def create_recommender():
+    """
+    Recommender over artifacts/; SIMILARITY_MODE=dense|neighbors|sparse picks the mode
+    (default: whatever the artifacts hold, so a pipeline build without --dense serves
+    neighbors) and SIMILARITY_DTYPE=int8|float16 serves the quantized matrix
+    """
+    similarity_dtype = os.getenv("SIMILARITY_DTYPE") or None
+    mode = os.getenv("SIMILARITY_MODE") or available_mode('artifacts', similarity_dtype)
+    return MovieRecommender(mode=mode, cache=result_cache, similarity_dtype=similarity_dtype)
+
+def swap_recommender(recommender):
+    """Publish a reloaded recommender; requests already running keep the one they started with"""
+    global movie_recommender
+    movie_recommender = recommender
+
 @app.route('/')
 def index():
     """Serve the React frontend"""
@@ -394,9 +434,51 @@ def search_movies():
 
 @app.route('/api/recommendations/<movie_title>')
 def get_recommendations(movie_title):
-    """Get AI-powered recommendations for a movie"""
+    """Get recommendations for a movie, explained by the tag features they share with it"""
     try:
-        if gemini_ai:
+        # One model for the whole request, even if a reload swaps the global meanwhile
+        recommender = movie_recommender
+        use_local = os.getenv("RECOMMENDATION_SOURCE", "local") != "gemini" or not gemini_ai
+        if use_local and recommender is not None and recommender.new_df is not None:
+            cache_key = None
+            if result_cache is not None:
+                cache_key = ResultCache.make_key('api/recommendations', recommender.model_version,
+                                                 normalize_title(movie_title))
+                cached = result_cache.get(cache_key)
+                if cached is not None:
+                    return jsonify(cached)
+            
+            result = recommender.recommend(movie_title, 6)
+            if result.empty:
+                return jsonify({'error': f"Movie '{movie_title}' not found"}), 404
+            
+            # Local explanations from the tag vectors, no network round trip; results are
+            # matched by movie id, since remakes can share a title
+            movie_ids = result['movie_id'].tolist() if 'movie_id' in result.columns else [None] * len(result)
+            explanations = recommender.explain_recommendations(movie_title, [i for i in movie_ids if i is not None])
+            
+            recommendations = []
+            shared_by_title = []
+            for title, score, movie_id in zip(result['title'], result['similarity_score'], movie_ids):
+                shared = explanations.get(movie_id, [])
+                shared_by_title.append((title, shared))
+                recommendations.append({
+                    'title': title,
+                    'movie_id': movie_id,
+                    'similarity_score': float(score),
+                    'tags': ' '.join(name for name, _ in shared),
+                    'shared_features': [{'feature': name, 'weight': weight} for name, weight in shared],
+                    'poster': get_poster_url(title, movie_id)
+                })
+            
+            payload = {
+                'recommendations': recommendations,
+                'ai_analysis': summarize(movie_title, shared_by_title)
+            }
+            if cache_key is not None:
+                result_cache.put(cache_key, payload)
+            return jsonify(payload)
+        elif gemini_ai:
             result = gemini_ai.get_enhanced_recommendations(movie_title, 6)
             
             if 'error' not in result:
@@ -421,6 +503,36 @@ def get_recommendations(movie_title):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Hit/miss counters of the recommendation result cache"""
+    if result_cache is None:
+        return jsonify({'error': 'Result cache not initialized'}), 503
+    return jsonify(result_cache.stats())
+
+@app.route('/api/admin/reload', methods=['GET', 'POST'])
+def reload_models():
+    """
+    POST starts a background reload of the model artifacts, GET reports the last one.
+    Needs the X-Admin-Token header matching ADMIN_TOKEN; without a token only
+    ADMIN_ALLOW_LOCAL=1 opens it, and then to local requests only.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if admin_token:
+        if request.headers.get('X-Admin-Token') != admin_token:
+            return jsonify({'error': 'Invalid admin token'}), 403
+    elif os.getenv("ADMIN_ALLOW_LOCAL") != "1" or request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Set ADMIN_TOKEN (or ADMIN_ALLOW_LOCAL=1 for local requests) to reload'}), 403
+    
+    if model_reloader is None:
+        return jsonify({'error': 'Model reloader not initialized'}), 503
+    
+    if request.method == 'POST':
+        started = model_reloader.reload()
+        return jsonify({'started': started, **model_reloader.status}), 202 if started else 409
+    return jsonify({**model_reloader.status,
+                    'model_version': movie_recommender.model_version if movie_recommender is not None else None})
+
 @app.route('/api/movie/<int:movie_id>')
 def get_movie_details(movie_id):
     """Get detailed information about a specific movie from TMDB API"""